@@ -0,0 +1,399 @@
+import os
+import time
+import logging
+import itertools
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+import psutil
+
+# Estimated peak memory of a full parse, as a multiple of the file size, until calibrated.
+# This is the 3x rule the parsers used to check against free memory on their own.
+DEFAULT_MEMORY_FACTOR = 3.0
+
+# Calibrated factors are kept within these bounds so one odd measurement cannot
+# make a log type unparseable or unprotected
+MIN_MEMORY_FACTOR = 1.0
+MAX_MEMORY_FACTOR = 20.0
+
+# Weight of a lower measurement in the calibrated factor; a higher one replaces it at
+# once, so the factor is a slowly decaying maximum of the measurements
+CALIBRATION_WEIGHT = 0.3
+
+# Smaller parses are dominated by interpreter noise and not used for calibration
+CALIBRATION_MIN_BYTES = 4 * 1024 * 1024
+
+# Smallest reservation made for a full parse
+MIN_RESERVATION_BYTES = 8 * 1024 * 1024
+
+# Reservation of a job downgraded to streaming mode, whose memory does not grow with the file
+STREAMING_RESERVATION_BYTES = 32 * 1024 * 1024
+
+# Share of physical memory parse jobs may reserve together
+DEFAULT_BUDGET_FRACTION = 0.75
+
+# How long a job waits for budget before it is rejected
+QUEUE_TIMEOUT_SECONDS = 30.0
+
+# RSS sampling interval while jobs are running
+SAMPLE_INTERVAL_SECONDS = 0.1
+
+class AdmissionError(Exception):
+    """Raised when a parse job cannot get its memory reservation."""
+
+    def __init__(self, message: str, retry_after: int = int(QUEUE_TIMEOUT_SECONDS)):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _process_rss() -> int:
+    """Resident memory of this process and its workers (parallel parses run in child processes)."""
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    try:
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                pass
+    except psutil.Error:
+        pass
+    return rss
+
+
+def _available_memory() -> Optional[int]:
+    """Memory the system can still hand out, or None if it cannot be read."""
+    try:
+        return psutil.virtual_memory().available
+    except Exception as e:
+        logging.warning(f"Memory check failed: {str(e)}")
+        return None
+
+
+def _mb(size: int) -> str:
+    return f"{size / (1024 * 1024):.0f}MB"
+
+
+class Reservation:
+    """
+    Memory reserved for one parse job; use as a context manager around the job.
+
+    mode is 'full' when the job may parse the whole file into memory and
+    'streaming' when it was downgraded and must process the file incrementally.
+    """
+
+    def __init__(self, controller: 'AdmissionController', job_id: int, path: str, log_type: str,
+                 log_format: str, file_size: int, estimate: int, mode: str, queued_seconds: float):
+        self.controller = controller
+        self.id = job_id
+        self.path = path
+        self.log_type = log_type
+        self.log_format = log_format
+        self.file_size = file_size
+        self.estimate = estimate
+        self.mode = mode
+        self.queued_seconds = queued_seconds
+        self.started = time.time()
+        self.start_rss = 0
+        self.peak_rss = 0
+        # Set when another job ran at the same time; its RSS then says nothing about this one
+        self.shared = False
+
+    def __enter__(self) -> 'Reservation':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    def release(self):
+        """Return the reserved memory; calibrates the estimate if the job ran alone."""
+        self.controller._release(self)
+
+    def to_dict(self) -> Dict:
+        """Describe the reservation for the API."""
+        return {
+            'id': self.id,
+            'path': self.path,
+            'log_type': self.log_type,
+            'log_format': self.log_format,
+            'mode': self.mode,
+            'file_size': self.file_size,
+            'reserved_bytes': self.estimate,
+            'peak_rss_growth': max(self.peak_rss - self.start_rss, 0),
+            'queued_seconds': round(self.queued_seconds, 3),
+            'running_seconds': round(time.time() - self.started, 3)
+        }
+
+
+class _NestedReservation:
+    """Stand-in returned when the calling thread already holds a reservation for the same file."""
+
+    def __init__(self, outer: Reservation):
+        self.mode = outer.mode
+        self.estimate = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def release(self):
+        pass
+
+
+class AdmissionController:
+    """
+    Central memory budget for parse jobs.
+
+    Every job that holds a whole file in memory asks for a reservation first.
+    The estimate is file size times a factor per (log type, format), calibrated
+    from the peak RSS of jobs that ran alone, measured over the lowest RSS seen
+    while no job was running: freed memory is mostly kept by the allocator and
+    reused, so growth over the RSS a job starts with shrinks with every parse. A job that does not fit
+    the remaining budget is downgraded to streaming mode if it can run that way,
+    otherwise it waits in a FIFO queue until enough is released, and is rejected
+    with AdmissionError after QUEUE_TIMEOUT_SECONDS.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None, queue_timeout: float = QUEUE_TIMEOUT_SECONDS):
+        """
+        Args:
+            budget_bytes (int): Memory all reservations may use together (default: a share of physical memory)
+            queue_timeout (float): Seconds a job waits for budget before it is rejected
+        """
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._active: Dict[int, Reservation] = {}
+        self._waiting = deque()
+        self._reserved = 0
+        self._factors: Dict[tuple, float] = {}
+        self._samples: Dict[tuple, int] = {}
+        self._idle_rss: Optional[int] = None
+        self._held = threading.local()
+        self._sampler = None
+        self.queue_timeout = queue_timeout
+        self.set_budget(budget_bytes)
+
+    def set_budget(self, budget_bytes: Optional[int] = None):
+        """Set the total budget; None uses DEFAULT_BUDGET_FRACTION of physical memory."""
+        if budget_bytes is None:
+            budget_bytes = int(psutil.virtual_memory().total * DEFAULT_BUDGET_FRACTION)
+        with self._cond:
+            self.budget_bytes = budget_bytes
+            self._cond.notify_all()
+
+    def factor(self, log_type: str, log_format: str) -> float:
+        """Current memory factor for a log type and format."""
+        return self._factors.get((log_type, log_format), DEFAULT_MEMORY_FACTOR)
+
+    def estimate(self, log_type: str, log_format: str, file_size: int) -> int:
+        """Estimated peak memory of a full parse of a file."""
+        return max(int(file_size * self.factor(log_type, log_format)), MIN_RESERVATION_BYTES)
+
+    def admit(self, path: str, log_type: str, log_format: str, file_size: int,
+              streamable: bool = False) -> Reservation:
+        """
+        Reserve memory for a parse job, waiting for budget if necessary.
+
+        Args:
+            path (str): File (or dataset directory) the job parses
+            log_type (str): 'modsecurity', 'apache-error' or 'apache-access'
+            log_format (str): Format of the file as detected by its parser (e.g. 'json', 'native')
+            file_size (int): Size of the input in bytes
+            streamable (bool): The caller can process the file incrementally instead; such jobs
+                are downgraded to mode 'streaming' rather than queued
+
+        Returns:
+            Reservation: Use as a context manager around the job; check its mode
+
+        Raises:
+            AdmissionError: The job can never fit, or no budget was released in time
+        """
+        key = os.path.normpath(path)
+        held = getattr(self._held, 'paths', None)
+        if held and key in held:
+            return _NestedReservation(held[key])
+
+        estimate = self.estimate(log_type, log_format, file_size)
+        queued_at = time.monotonic()
+        with self._cond:
+            if not self._waiting and self._fits(estimate):
+                mode = 'full'
+            elif streamable:
+                mode = 'streaming'
+                logging.info(f"Parse of {path} downgraded to streaming: {_mb(estimate)} does not fit the memory "
+                             f"budget ({_mb(self._reserved)} of {_mb(self.budget_bytes)} reserved)")
+                estimate = STREAMING_RESERVATION_BYTES
+            else:
+                self._check_satisfiable(estimate)
+                mode = 'full'
+                self._wait(estimate, queued_at)
+            reservation = self._start(path, log_type, log_format, file_size, estimate, mode,
+                                      time.monotonic() - queued_at)
+
+        if not hasattr(self._held, 'paths'):
+            self._held.paths = {}
+        self._held.paths[key] = reservation
+        return reservation
+
+    def _fits(self, estimate: int) -> bool:
+        """Check the budget and free memory for a job. Caller holds the lock."""
+        if self._reserved + estimate > self.budget_bytes:
+            return False
+        available = _available_memory()
+        return available is None or estimate <= available
+
+    def _check_satisfiable(self, estimate: int):
+        """Reject a job immediately if waiting cannot help. Caller holds the lock."""
+        if estimate > self.budget_bytes:
+            raise AdmissionError(f"Insufficient memory. Budget: {_mb(self.budget_bytes)}, "
+                                 f"Required: {_mb(estimate)} (estimated for this file).")
+        if not self._active:
+            available = _available_memory()
+            if available is not None and estimate > available:
+                raise AdmissionError(f"Insufficient memory. Available: {_mb(available)}, "
+                                     f"Required: {_mb(estimate)} (estimated for this file).")
+
+    def _wait(self, estimate: int, queued_at: float):
+        """Wait in the queue until the job is first and fits. Caller holds the lock."""
+        ticket = object()
+        self._waiting.append((ticket, estimate))
+        try:
+            while True:
+                if self._waiting[0][0] is ticket and self._fits(estimate):
+                    return
+                remaining = self.queue_timeout - (time.monotonic() - queued_at)
+                if remaining <= 0:
+                    raise AdmissionError(f"Parse queue is full: waited {self.queue_timeout:.0f}s for "
+                                         f"{_mb(estimate)} of memory ({_mb(self._reserved)} of "
+                                         f"{_mb(self.budget_bytes)} reserved). Try again later.")
+                # Wake up periodically as well, free memory can change without a release
+                self._cond.wait(min(remaining, 1.0))
+        finally:
+            self._waiting.remove((ticket, estimate))
+            self._cond.notify_all()
+
+    def _start(self, path, log_type, log_format, file_size, estimate, mode, queued_seconds) -> Reservation:
+        """Record a new reservation and start RSS sampling. Caller holds the lock."""
+        reservation = Reservation(self, next(self._ids), path, log_type, log_format, file_size,
+                                  estimate, mode, queued_seconds)
+        if self._active:
+            reservation.shared = True
+            for other in self._active.values():
+                other.shared = True
+        reservation.start_rss = reservation.peak_rss = _process_rss()
+        if not self._active and (self._idle_rss is None or reservation.start_rss < self._idle_rss):
+            self._idle_rss = reservation.start_rss
+        self._active[reservation.id] = reservation
+        self._reserved += estimate
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+        return reservation
+
+    def _sample(self):
+        """Track the peak RSS of running jobs until none are left."""
+        while True:
+            with self._cond:
+                if not self._active:
+                    self._sampler = None
+                    return
+            rss = _process_rss()
+            with self._cond:
+                for reservation in self._active.values():
+                    reservation.peak_rss = max(reservation.peak_rss, rss)
+            time.sleep(SAMPLE_INTERVAL_SECONDS)
+
+    def _release(self, reservation: Reservation):
+        held = getattr(self._held, 'paths', {})
+        if held.get(os.path.normpath(reservation.path)) is reservation:
+            del held[os.path.normpath(reservation.path)]
+
+        rss = _process_rss()
+        with self._cond:
+            if self._active.pop(reservation.id, None) is None:
+                return
+            self._reserved -= reservation.estimate
+            reservation.peak_rss = max(reservation.peak_rss, rss)
+            if (reservation.mode == 'full' and not reservation.shared
+                    and reservation.file_size >= CALIBRATION_MIN_BYTES):
+                self._calibrate(reservation)
+            self._cond.notify_all()
+
+    def _calibrate(self, reservation: Reservation):
+        """Fold the peak RSS of a job over the idle baseline into its factor. Caller holds the lock."""
+        key = (reservation.log_type, reservation.log_format)
+        baseline = min(reservation.start_rss, self._idle_rss or reservation.start_rss)
+        measured = (reservation.peak_rss - baseline) / reservation.file_size
+        measured = min(max(measured, MIN_MEMORY_FACTOR), MAX_MEMORY_FACTOR)
+        previous = self._factors.get(key, DEFAULT_MEMORY_FACTOR)
+        if measured >= previous:
+            self._factors[key] = measured
+        else:
+            self._factors[key] = previous + (measured - previous) * CALIBRATION_WEIGHT
+        self._samples[key] = self._samples.get(key, 0) + 1
+        logging.debug(f"Memory factor for {key[0]}/{key[1]}: measured {measured:.2f}, now {self._factors[key]:.2f}")
+
+    def snapshot(self) -> Dict:
+        """Budget, running reservations, queued jobs and calibrated factors, for the API."""
+        with self._cond:
+            return {
+                'budget_bytes': self.budget_bytes,
+                'reserved_bytes': self._reserved,
+                'available_bytes': _available_memory(),
+                'reservations': [reservation.to_dict() for reservation in self._active.values()],
+                'queued': [{'reserved_bytes': estimate} for _, estimate in self._waiting],
+                'factors': [{'log_type': log_type, 'log_format': log_format, 'factor': round(factor, 3),
+                             'samples': self._samples.get((log_type, log_format), 0)}
+                            for (log_type, log_format), factor in sorted(self._factors.items())],
+                'default_factor': DEFAULT_MEMORY_FACTOR,
+                'queue_timeout_seconds': self.queue_timeout
+            }
+
+
+# Shared by all parsers in the process
+_controller = AdmissionController()
+
+
+def admit(path: str, log_type: str, log_format: str, file_size: int, streamable: bool = False) -> Reservation:
+    """Reserve memory for a parse job with the process-wide controller (see AdmissionController.admit)."""
+    return _controller.admit(path, log_type, log_format, file_size, streamable)
+
+
+def set_budget(budget_bytes: Optional[int] = None):
+    """Set the memory budget of the process-wide controller; None uses a share of physical memory."""
+    _controller.set_budget(budget_bytes)
+
+
+def get_snapshot() -> Dict:
+    """Current budget, reservations and queue of the process-wide controller."""
+    return _controller.snapshot()
+
+
+if __name__ == "__main__":
+    # Repeated parses of the same file must not lower the estimate, although after the
+    # first one the allocator reuses the memory it kept and RSS hardly grows any more
+    print("Calibration check")
+    print("=" * 50)
+    idle_rss = 100 * 1024 * 1024
+    file_size = 2 * CALIBRATION_MIN_BYTES
+    fake_rss = idle_rss
+
+    def _process_rss() -> int:
+        return fake_rss
+
+    controller = AdmissionController(budget_bytes=1 << 40)
+    factors = []
+    for run in range(6):
+        with controller.admit('/tmp/check.log', 'apache-error', 'standard', file_size):
+            fake_rss = idle_rss + 9 * file_size
+        # Most of the peak stays resident after the job
+        fake_rss = idle_rss + 8 * file_size
+        factors.append(controller.factor('apache-error', 'standard'))
+        print(f"Run {run + 1}: factor {factors[-1]:.2f}")
+    assert all(later >= earlier for earlier, later in zip(factors, factors[1:])), factors
+    assert factors[-1] >= 9.0, factors
+    print("✓ Repeated parses keep the calibrated factor")
@@ -0,0 +1,487 @@
+import re
+import os
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import admission
+from ip_columns import IpColumn
+from log_decoding import MONTHS, translate_newlines
+from log_reader import split_file_chunks
+
+# Well-known LogFormat nicknames from the stock Apache configuration
+LOG_FORMATS = {
+    'common': '%h %l %u %t "%r" %>s %b',
+    'combined': '%h %l %u %t "%r" %>s %b "%{Referer}i" "%{User-Agent}i"',
+    'vhost_combined': '%v:%p %h %l %u %t "%r" %>s %O "%{Referer}i" "%{User-Agent}i"',
+    'combined_duration': '%h %l %u %t "%r" %>s %b "%{Referer}i" "%{User-Agent}i" %D'
+}
+
+# Order in which nicknames are tried when no format is given
+DETECTION_ORDER = ['combined_duration', 'combined', 'vhost_combined', 'common']
+
+# Files larger than this are split into chunks and parsed in a process pool
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+CHUNK_SIZE_BYTES = 8 * 1024 * 1024
+
+# Number of entries kept in the top-N aggregates
+TOP_N = 10
+
+# Directive -> (group name, unquoted regex). Quoted fields use QUOTED_FIELD instead.
+DIRECTIVES = {
+    'h': ('client_ip', r'\S+'),
+    'a': ('client_ip', r'\S+'),
+    'A': ('local_ip', r'\S+'),
+    'l': ('ident', r'\S+'),
+    'u': ('user', r'\S+'),
+    't': ('time', r'\[[^\]]+\]'),
+    'r': ('request', r'\S+'),
+    's': ('status', r'\d{3}'),
+    '>s': ('status', r'\d{3}'),
+    'b': ('bytes', r'\d+|-'),
+    'B': ('bytes', r'\d+'),
+    'O': ('bytes', r'\d+|-'),
+    'I': ('bytes_in', r'\d+|-'),
+    'D': ('duration_us', r'\d+'),
+    'T': ('duration_s', r'\d+'),
+    'v': ('vhost', r'\S+'),
+    'V': ('vhost', r'\S+'),
+    'p': ('port', r'\d+'),
+    'P': ('pid', r'\d+'),
+    'm': ('method', r'\S+'),
+    'U': ('url_path', r'\S+'),
+    'q': ('query', r'\S*'),
+    'H': ('protocol', r'\S+'),
+    'X': ('connection_status', r'\S'),
+    'k': ('keepalive', r'\d+'),
+    'L': ('log_id', r'\S+'),
+}
+
+# Header directives with a dedicated field name
+HEADER_FIELDS = {
+    'referer': 'referer',
+    'user-agent': 'user_agent',
+    'x-forwarded-for': 'forwarded_for',
+    'host': 'host'
+}
+
+QUOTED_FIELD = r'(?:[^"\\]|\\.)*'
+DIRECTIVE_PATTERN = re.compile(r'%(?:\{([^}]*)\})?([<>]?[a-zA-Z%])')
+
+
+def compile_log_format(log_format: str) -> str:
+    """
+    Compile an Apache LogFormat string into a single regex pattern string.
+
+    Each directive becomes a named group; repeated directives and unknown ones
+    become non-capturing groups. Directives wrapped in double quotes accept
+    escaped quotes inside the value.
+
+    Args:
+        log_format (str): LogFormat string or nickname from LOG_FORMATS
+
+    Returns:
+        str: Regex pattern anchored at both ends
+    """
+    log_format = LOG_FORMATS.get(log_format, log_format)
+    parts = []
+    used_names = set()
+    position = 0
+
+    for match in DIRECTIVE_PATTERN.finditer(log_format):
+        parts.append(re.escape(log_format[position:match.start()]))
+        position = match.end()
+        argument, directive = match.group(1), match.group(2)
+
+        if directive == '%':
+            parts.append('%')
+            continue
+
+        quoted = match.start() > 0 and log_format[match.start() - 1] == '"'
+        name = None
+        regex = r'\S+'
+        if directive == 'i' and argument is not None:
+            name = HEADER_FIELDS.get(argument.lower(),
+                                     'header_' + re.sub(r'\W', '_', argument.lower()))
+        elif argument is None and directive in DIRECTIVES:
+            name, regex = DIRECTIVES[directive]
+        elif directive.lstrip('<>') in DIRECTIVES and argument is None:
+            name, regex = DIRECTIVES[directive.lstrip('<>')]
+        elif directive == 't':
+            # %{format}t uses a custom strftime layout we do not try to parse
+            name = 'time_custom'
+
+        if quoted:
+            regex = QUOTED_FIELD
+        if name and name not in used_names:
+            used_names.add(name)
+            parts.append(f'(?P<{name}>{regex})')
+        else:
+            parts.append(f'(?:{regex})')
+
+    parts.append(re.escape(log_format[position:]))
+    return '^' + ''.join(parts) + r'\s*$'
+
+
+@lru_cache(maxsize=32)
+def get_compiled_format(log_format: str) -> re.Pattern:
+    """Compile and cache the regex for a LogFormat string or nickname."""
+    return re.compile(compile_log_format(log_format))
+
+
+def parse_access_time(raw_time: str) -> Optional[str]:
+    """
+    Convert an access log time like '[10/Oct/2000:13:55:36 -0700]' to ISO format.
+
+    Slicing fixed positions avoids strptime, which dominates parse time on access logs.
+    """
+    try:
+        value = raw_time.strip('[]')
+        month = MONTHS[value[3:6]]
+        return (f"{value[7:11]}-{month:02d}-{value[0:2]}T"
+                f"{value[12:14]}:{value[15:17]}:{value[18:20]}")
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def detect_log_format(sample_lines: List[str]) -> Dict:
+    """
+    Detect which LogFormat nickname matches the sample lines best.
+
+    Args:
+        sample_lines (List[str]): Lines from the head of the file
+
+    Returns:
+        Dict: {'format': nickname or 'unknown', 'confidence': float}
+    """
+    lines = [line.rstrip('\r\n') for line in sample_lines if line.strip()][:50]
+    if not lines:
+        return {'format': 'unknown', 'confidence': 0.0}
+
+    best_format, best_hits = 'unknown', 0
+    for nickname in DETECTION_ORDER:
+        pattern = get_compiled_format(nickname)
+        hits = sum(1 for line in lines if pattern.match(line))
+        if hits > best_hits:
+            best_format, best_hits = nickname, hits
+    return {'format': best_format, 'confidence': round(best_hits / len(lines), 2)}
+
+
+def _empty_aggregates() -> Dict:
+    return {
+        'total_lines': 0,
+        'parsed_lines': 0,
+        'failed_lines': 0,
+        'total_bytes': 0,
+        'status_counts': Counter(),
+        'method_counts': Counter(),
+        'path_counts': Counter(),
+        'user_agent_counts': Counter(),
+        'ip_counts': Counter(),
+        'second_counts': Counter()
+    }
+
+
+def _merge_aggregates(target: Dict, partial: Dict):
+    for key in ('total_lines', 'parsed_lines', 'failed_lines', 'total_bytes'):
+        target[key] += partial[key]
+    for key in ('status_counts', 'method_counts', 'path_counts', 'user_agent_counts',
+                'ip_counts', 'second_counts'):
+        target[key].update(partial[key])
+
+
+def parse_lines(lines, log_format: str, keep_entries: bool = True) -> Tuple[List[Dict], Dict]:
+    """
+    Parse access log lines into entries and partial aggregates.
+
+    Args:
+        lines: Iterable of text lines
+        log_format (str): LogFormat string or nickname
+        keep_entries (bool): Whether to build per-line entry dicts
+
+    Returns:
+        Tuple[List[Dict], Dict]: Entries (empty if keep_entries is False) and aggregates
+    """
+    pattern = get_compiled_format(log_format)
+    aggregates = _empty_aggregates()
+    status_counts = aggregates['status_counts']
+    method_counts = aggregates['method_counts']
+    path_counts = aggregates['path_counts']
+    user_agent_counts = aggregates['user_agent_counts']
+    ip_counts = aggregates['ip_counts']
+    second_counts = aggregates['second_counts']
+    time_cache = {}
+    entries = []
+    total_lines = 0
+    failed_lines = 0
+    total_bytes = 0
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line:
+            continue
+        total_lines += 1
+        match = pattern.match(line)
+        if not match:
+            failed_lines += 1
+            continue
+
+        groups = match.groupdict()
+
+        raw_time = groups.get('time')
+        timestamp = time_cache.get(raw_time)
+        if timestamp is None and raw_time:
+            timestamp = parse_access_time(raw_time)
+            time_cache[raw_time] = timestamp
+
+        method = groups.get('method')
+        path = groups.get('url_path')
+        protocol = groups.get('protocol')
+        request = groups.get('request')
+        if request is not None:
+            request_parts = request.split(' ')
+            if len(request_parts) == 3:
+                method, path, protocol = request_parts
+            else:
+                method, path, protocol = None, request or None, None
+
+        status = groups.get('status')
+        status = int(status) if status else None
+        size = groups.get('bytes')
+        size = int(size) if size and size != '-' else 0
+        client_ip = groups.get('client_ip')
+        user_agent = groups.get('user_agent')
+
+        total_bytes += size
+        if status:
+            status_counts[status] += 1
+        if method:
+            method_counts[method] += 1
+        if path:
+            path_counts[path.split('?', 1)[0]] += 1
+        if user_agent:
+            user_agent_counts[user_agent] += 1
+        if client_ip:
+            ip_counts[client_ip] += 1
+        if timestamp:
+            second_counts[timestamp] += 1
+
+        if keep_entries:
+            duration_us = groups.get('duration_us')
+            if duration_us is None and groups.get('duration_s'):
+                duration_us = int(groups['duration_s']) * 1000000
+            entries.append({
+                'timestamp': timestamp,
+                'client_ip': client_ip,
+                'user': groups.get('user') if groups.get('user') != '-' else None,
+                'method': method,
+                'path': path,
+                'protocol': protocol,
+                'status': status,
+                'bytes': size,
+                'referer': groups.get('referer') if groups.get('referer') != '-' else None,
+                'user_agent': user_agent,
+                'vhost': groups.get('vhost'),
+                'duration_us': int(duration_us) if duration_us is not None else None
+            })
+
+    aggregates['total_lines'] = total_lines
+    aggregates['failed_lines'] = failed_lines
+    aggregates['parsed_lines'] = total_lines - failed_lines
+    aggregates['total_bytes'] = total_bytes
+    return entries, aggregates
+
+
+def _parse_chunk(args) -> Tuple[List[Dict], Dict]:
+    """Process pool worker: parse the byte range [start, end) of a file."""
+    file_path, start, end, log_format, keep_entries = args
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # Split like the serial path's universal-newline reading; splitlines() would also
+    # break lines at \x0b, \x0c, \x1c-\x1e, \x85 and \u2028
+    lines = translate_newlines(data).decode('utf-8', errors='ignore').split('\n')
+    if not lines[-1]:
+        lines.pop()
+    return parse_lines(lines, log_format, keep_entries)
+
+
+def read_sample_lines(file_path: str, max_lines: int = 50) -> List[str]:
+    """Read up to max_lines non-empty lines from the head of a file."""
+    sample_lines = []
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            if line.strip():
+                sample_lines.append(line)
+                if len(sample_lines) >= max_lines:
+                    break
+    return sample_lines
+
+
+def parse_access_log(file_path: str, log_format: Optional[str] = None, keep_entries: bool = True,
+                     max_file_size_mb: int = 1024, workers: Optional[int] = None) -> Tuple[List[Dict], Dict]:
+    """
+    Parse an Apache access log file.
+
+    Files larger than PARALLEL_MIN_BYTES are split into newline-aligned chunks that
+    are parsed in a process pool; per-chunk aggregates are merged afterwards.
+
+    Args:
+        file_path (str): Path to the log file
+        log_format (Optional[str]): LogFormat string or nickname; detected if None
+        keep_entries (bool): Whether to return per-line entries (dashboards only need aggregates)
+        max_file_size_mb (int): Maximum file size in MB (default: 1024MB = 1GB)
+        workers (Optional[int]): Process pool size (default: CPU count)
+
+    Returns:
+        Tuple[List[Dict], Dict]: Entries (newest first) and statistics/aggregates
+
+    Raises:
+        admission.AdmissionError: No memory could be reserved for the entries
+    """
+    if not os.path.exists(file_path):
+        logging.error(f"Log file not found: {file_path}")
+        return [], {'error': 'Log file not found.'}
+
+    file_size = os.path.getsize(file_path)
+    if file_size > max_file_size_mb * 1024 * 1024:
+        message = f"File size ({file_size / (1024*1024):.1f}MB) exceeds maximum allowed size ({max_file_size_mb}MB)."
+        logging.error(message)
+        return [], {'error': message}
+
+    format_info = {'format': log_format, 'confidence': None}
+    if not log_format:
+        format_info = detect_log_format(read_sample_lines(file_path))
+        log_format = format_info['format'] if format_info['format'] != 'unknown' else 'combined'
+
+    # Entries cost far more memory than the aggregates, only reserve memory when keeping them
+    reservation = nullcontext()
+    if keep_entries:
+        reservation = admission.admit(file_path, 'apache-access', log_format, file_size)
+
+    aggregates = _empty_aggregates()
+    entries = []
+
+    with reservation:
+        try:
+            if file_size >= PARALLEL_MIN_BYTES:
+                chunks = split_file_chunks(file_path, CHUNK_SIZE_BYTES)
+                tasks = [(file_path, start, end, log_format, keep_entries) for start, end in chunks]
+                max_workers = min(workers or os.cpu_count() or 1, len(tasks))
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    for chunk_entries, chunk_aggregates in executor.map(_parse_chunk, tasks):
+                        entries.extend(chunk_entries)
+                        _merge_aggregates(aggregates, chunk_aggregates)
+            else:
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    entries, aggregates = parse_lines(f, log_format, keep_entries)
+        except IOError as e:
+            logging.error(f"Error reading file {file_path}: {str(e)}")
+            return [], {'error': f"Error reading file: {str(e)}"}
+
+        if keep_entries:
+            entries.sort(key=lambda x: x.get('timestamp') or '1900-01-01T00:00:00', reverse=True)
+
+    stats = summarize_aggregates(aggregates)
+    stats['log_format'] = LOG_FORMATS.get(log_format, log_format)
+    stats['detected_format'] = format_info
+    return entries, stats
+
+
+def summarize_aggregates(aggregates: Dict) -> Dict:
+    """
+    Turn merged aggregates into the statistics and dashboard blocks.
+
+    Args:
+        aggregates (Dict): Aggregates produced by parse_lines
+
+    Returns:
+        Dict: Counts, distributions, top-N lists, requests-per-second and timeline
+    """
+    total_lines = aggregates['total_lines']
+    success_rate = (aggregates['parsed_lines'] / total_lines * 100) if total_lines else 0.0
+
+    second_counts = aggregates['second_counts']
+    timestamp_range = {'min': None, 'max': None}
+    requests_per_second = {'average': 0.0, 'peak': 0, 'peak_time': None}
+    hourly_counts = Counter()
+    if second_counts:
+        timestamp_range = {'min': min(second_counts), 'max': max(second_counts)}
+        peak_time, peak = max(second_counts.items(), key=lambda item: item[1])
+        span = (datetime.fromisoformat(timestamp_range['max']) -
+                datetime.fromisoformat(timestamp_range['min'])).total_seconds() + 1
+        requests_per_second = {
+            'average': round(sum(second_counts.values()) / span, 3),
+            'peak': peak,
+            'peak_time': peak_time
+        }
+        for second, count in second_counts.items():
+            hourly_counts[second[:13].replace('T', ' ') + ':00'] += count
+
+    status_counts = aggregates['status_counts']
+    status_class_counts = Counter()
+    for status, count in status_counts.items():
+        status_class_counts[f"{status // 100}xx"] += count
+
+    return {
+        'total_lines': total_lines,
+        'parsed_lines': aggregates['parsed_lines'],
+        'failed_lines': aggregates['failed_lines'],
+        'success_rate': round(success_rate, 2),
+        'total_bytes': aggregates['total_bytes'],
+        'status_distribution': [
+            {'status': status, 'count': count}
+            for status, count in sorted(status_counts.items(), key=lambda x: x[1], reverse=True)
+        ],
+        'status_class_counts': dict(status_class_counts),
+        'method_counts': dict(aggregates['method_counts']),
+        'top_paths': [{'path': path, 'count': count}
+                      for path, count in aggregates['path_counts'].most_common(TOP_N)],
+        'top_user_agents': [{'user_agent': agent, 'count': count}
+                            for agent, count in aggregates['user_agent_counts'].most_common(TOP_N)],
+        'top_ips': dict(aggregates['ip_counts'].most_common(TOP_N)),
+        'top_subnets': IpColumn.from_counts(aggregates['ip_counts']).rollups(),
+        'unique_ips': len(aggregates['ip_counts']),
+        'unique_paths': len(aggregates['path_counts']),
+        'requests_per_second': requests_per_second,
+        'timeline_data': [{'time': hour, 'count': count} for hour, count in sorted(hourly_counts.items())],
+        'timestamp_range': timestamp_range
+    }
+
+
+def get_dashboard_stats(file_path: str, log_format: Optional[str] = None) -> Dict:
+    """
+    Compute dashboard data for an access log without building per-line entries.
+
+    Args:
+        file_path (str): Path to the log file
+        log_format (Optional[str]): LogFormat string or nickname; detected if None
+
+    Returns:
+        Dict: Dashboard statistics or an error message
+    """
+    _, stats = parse_access_log(file_path, log_format, keep_entries=False)
+    return stats
+
+
+if __name__ == "__main__":
+    # Example usage and testing
+    sample_logs = [
+        '127.0.0.1 - frank [10/Oct/2000:13:55:36 -0700] "GET /apache_pb.gif HTTP/1.0" 200 2326 "http://www.example.com/start.html" "Mozilla/4.08 [en] (Win98; I ;Nav)"',
+        '192.168.1.20 - - [10/Oct/2000:13:55:37 -0700] "POST /login.php?next=%2F HTTP/1.1" 302 - "-" "curl/8.0 \\"quoted\\""',
+        '10.0.0.5 - - [10/Oct/2000:13:55:37 -0700] "GET /missing HTTP/1.1" 404 512 "-" "Googlebot/2.1"'
+    ]
+
+    print("Testing Apache Access Log Parser")
+    print("=" * 50)
+    print(f"Detected format: {detect_log_format(sample_logs)}")
+    entries, aggregates = parse_lines(sample_logs, 'combined')
+    for entry in entries:
+        print(entry)
+    stats = summarize_aggregates(aggregates)
+    print(f"Success rate: {stats['success_rate']}%")
+    print(f"Requests per second: {stats['requests_per_second']}")
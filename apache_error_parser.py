@@ -1,10 +1,17 @@
 import re
 import json
 import os
-import psutil
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import logging
+import admission
+from log_decoding import decode_bytes
+from ip_columns import IpColumn
+from log_reader import MappedLogFile
+
+# Continuation lines (stack traces, proxy dumps) kept in the message of one event;
+# further lines are only counted so a runaway dump cannot grow an event without bound
+MAX_CONTINUATION_LINES = 200
 
 class ApacheErrorLogParser:
     """
@@ -29,9 +36,11 @@ class ApacheErrorLogParser:
         # Alternative patterns for different Apache log formats
         self.alt_patterns = [
             # Simplified format: [timestamp] [level] message
+            # (a level never holds ':', so [module:level] lines are left to main_pattern
+            # even when specialize() puts this pattern first)
             re.compile(
                 r'\[(?P<timestamp>[^\]]+)\]\s+'
-                r'\[(?P<severity>[^\]]+)\]\s+'
+                r'\[(?P<severity>[^\]:]+)\]\s+'
                 r'(?P<message>.*)'
             ),
             # Format with file/line info: [timestamp] [module:level] [pid] [client] message, referer: url file: /path/file.php line: 123
@@ -77,9 +86,58 @@ class ApacheErrorLogParser:
             'total_lines': 0,
             'parsed_lines': 0,
             'failed_lines': 0,
+            'continuation_lines': 0,
             'severity_counts': {},
             'module_counts': {}
         }
+        
+        # Pattern order used by parse_line; specialize() puts the detected dialect first
+        self.line_patterns = [self.main_pattern] + self.alt_patterns
+        self.detected_format = None
+    
+    def specialize(self, sample_lines: List[str]) -> Dict[str, Union[str, float]]:
+        """
+        Detect the log dialect from sample lines and reorder patterns so that
+        matching lines need a single regex attempt.
+        
+        Lines that fail the specialized pattern still fall back to the remaining
+        patterns in cascade order. Mixed or unknown files keep the full cascade.
+        
+        Args:
+            sample_lines (List[str]): Lines from the head of the file
+            
+        Returns:
+            Dict: Format detection result
+        """
+        # Continuation lines never reach the regexes, so leave them out of detection
+        stripped = [line.strip() for line in sample_lines if line.strip().startswith('[')][:50]
+        format_info = self.detect_format(stripped)
+        cascade = [self.main_pattern] + self.alt_patterns
+        self.line_patterns = cascade
+        
+        if format_info['format'] == 'alternative_apache_error':
+            # Only specialize if no sample line matched the main pattern, otherwise
+            # the more permissive alternative patterns would misparse those lines
+            if not any(self.main_pattern.match(line) for line in stripped):
+                hits = [sum(1 for line in stripped if pattern.match(line)) for pattern in self.alt_patterns]
+                best = self.alt_patterns[hits.index(max(hits))]
+                self.line_patterns = [best] + [pattern for pattern in cascade if pattern is not best]
+        
+        self.detected_format = format_info
+        return format_info
+    
+    @staticmethod
+    def read_sample_lines(file_path: str, max_lines: int = 50) -> List[str]:
+        """Read up to max_lines non-empty lines from the head of a file for format detection."""
+        sample_lines = []
+        with MappedLogFile(file_path) as log_file:
+            for line in log_file.iter_lines():
+                text = decode_bytes(line)
+                if text.strip():
+                    sample_lines.append(text)
+                    if len(sample_lines) >= max_lines:
+                        break
+        return sample_lines
     
     def normalize_severity(self, severity: str) -> str:
         """Normalize severity level to standard format."""
@@ -254,33 +312,51 @@ class ApacheErrorLogParser:
         line = line.strip()
         self.stats['total_lines'] += 1
         
-        # Try main pattern first
-        match = self.main_pattern.match(line)
-        if not match:
-            # Try alternative patterns
-            for pattern in self.alt_patterns:
+        parsed_entry = self._parse_event_line(line)
+        if parsed_entry is None:
+            self.stats['failed_lines'] += 1
+            return self._unparsed_entry(line)
+        return parsed_entry
+    
+    @staticmethod
+    def _unparsed_entry(line: str) -> Dict[str, Union[str, int, None]]:
+        """Basic structure for a line that matches no event pattern."""
+        return {
+            'timestamp': None,
+            'severity': 'info',
+            'module': 'unknown',
+            'pid': None,
+            'tid': None,
+            'client_ip': None,
+            'client_port': None,
+            'error_code': None,
+            'message': line,
+            'file_reference': None,
+            'line_reference': None,
+            'raw_line': line,
+            'parse_confidence': 0.1,
+            'line_count': 1
+        }
+    
+    def _parse_event_line(self, line: str) -> Optional[Dict[str, Union[str, int, None]]]:
+        """
+        Parse a stripped line that starts an event.
+        
+        Returns:
+            Optional[Dict]: Parsed log entry, or None if the line matches no pattern
+        """
+        # Every pattern starts with "[timestamp]", so continuation lines and other
+        # garbage can be routed to the unparsed structure without running any regex
+        match = None
+        if line[0] == '[':
+            # Try the detected dialect first, then the rest of the cascade
+            for pattern in self.line_patterns:
                 match = pattern.match(line)
                 if match:
                     break
         
         if not match:
-            self.stats['failed_lines'] += 1
-            # Return a basic structure for unparseable lines
-            return {
-                'timestamp': None,
-                'severity': 'info',
-                'module': 'unknown',
-                'pid': None,
-                'tid': None,
-                'client_ip': None,
-                'client_port': None,
-                'error_code': None,
-                'message': line,
-                'file_reference': None,
-                'line_reference': None,
-                'raw_line': line,
-                'parse_confidence': 0.1
-            }
+            return None
         
         groups = match.groupdict()
         
@@ -343,7 +419,8 @@ class ApacheErrorLogParser:
             'file_reference': file_reference,
             'line_reference': line_reference,
             'raw_line': line,
-            'parse_confidence': round(confidence, 2)
+            'parse_confidence': round(confidence, 2),
+            'line_count': 1
         }
         
         # Update statistics
@@ -363,6 +440,9 @@ class ApacheErrorLogParser:
             
         Returns:
             List[Dict]: List of parsed log entries
+            
+        Raises:
+            admission.AdmissionError: No memory could be reserved for the parse
         """
         if not os.path.exists(file_path):
             logging.error(f"Log file not found: {file_path}")
@@ -379,40 +459,19 @@ class ApacheErrorLogParser:
             logging.error(f"Unable to check file size for {file_path}: {str(e)}")
             return []
         
-        # Check available memory to prevent exhaustion
-        try:
-            memory = psutil.virtual_memory()
-            available_mb = memory.available / (1024 * 1024)
-            file_size_mb = file_size / (1024 * 1024)
-            
-            # Require at least 3x the file size in available memory for safe processing
-            # This accounts for Python object overhead and parsing structures
-            required_memory_mb = file_size_mb * 3
-            
-            if available_mb < required_memory_mb:
-                logging.error(f"Insufficient memory. Available: {available_mb:.0f}MB, Required: {required_memory_mb:.0f}MB (3x file size for safe processing).")
-                return []
-                
-            logging.info(f"Memory check passed. Available: {available_mb:.0f}MB, File: {file_size_mb:.1f}MB")
-        except ImportError:
-            logging.warning("psutil not available, skipping memory check")
-        except Exception as e:
-            logging.warning(f"Memory check failed: {str(e)}")
-        
+        # Reserve memory with the admission controller, which accounts for parses already running
+        with admission.admit(file_path, 'apache-error', 'text', file_size):
+            return self._parse_admitted_file(file_path)
+    
+    def _parse_admitted_file(self, file_path: str) -> List[Dict[str, Union[str, int, None]]]:
+        """Parse and sort the entries of a file once memory was reserved for it."""
         entries = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line_num, line in enumerate(f, 1):
-                    try:
-                        parsed_entry = self.parse_line(line)
-                        if parsed_entry:
-                            entries.append(parsed_entry)
-                    except Exception as e:
-                        # Log parsing error for this line but continue processing
-                        logging.warning(f"Error parsing line {line_num} in {file_path}: {str(e)}")
-                        self.stats['failed_lines'] += 1
-                        continue
+            self.specialize(self.read_sample_lines(file_path))
+            
+            with MappedLogFile(file_path) as log_file:
+                entries.extend(self.iter_events(log_file.iter_text_lines(), file_path))
                         
         except IOError as e:
             logging.error(f"Error reading file {file_path}: {str(e)}")
@@ -436,34 +495,88 @@ class ApacheErrorLogParser:
         Returns:
             List[Dict]: List of parsed log entries
         """
-        parsed_entries = []
         lines = content.split('\n')
+        if max_lines:
+            lines = lines[:max_lines]
         
-        for line_num, line in enumerate(lines, 1):
-            if max_lines and line_num > max_lines:
-                break
-            
-            parsed_entry = self.parse_line(line)
-            if parsed_entry:
-                parsed_entries.append(parsed_entry)
+        self.specialize([line for line in lines[:200] if line.strip()])
+        
+        parsed_entries = list(self.iter_events(lines, 'content'))
         
         # Sort entries by timestamp (newest first) for consistent ordering
         parsed_entries.sort(key=lambda x: x.get('timestamp') or '1900-01-01T00:00:00', reverse=True)
         return parsed_entries
     
+    def iter_events(self, lines: Iterable[str], source: str = 'log',
+                    leading: bool = True) -> Iterator[Dict[str, Union[str, int, None]]]:
+        """
+        Parse lines into events, attaching continuation lines to the preceding event.
+        
+        Lines that match no event pattern (PHP stack traces, mod_proxy dumps) are
+        appended to the message of the event before them instead of becoming
+        separate entries; line_count records how many lines an event spans.
+        Only the event being assembled is held back, so the input is streamed.
+        Lines before the first event are returned as unparsed entries.
+        
+        Args:
+            lines (Iterable[str]): Raw log lines
+            source (str): Name used in warning messages
+            leading (bool): Return lines before the first event; False skips them, for
+                lines read from the middle of a file whose first event began earlier
+            
+        Returns:
+            Iterator[Dict]: Parsed log entries in file order
+        """
+        event = None
+        for line_num, line in enumerate(lines, 1):
+            if not line or not line.strip():
+                continue
+            
+            line = line.strip()
+            self.stats['total_lines'] += 1
+            try:
+                parsed_entry = self._parse_event_line(line)
+            except Exception as e:
+                # Log parsing error for this line but continue processing
+                logging.warning(f"Error parsing line {line_num} in {source}: {str(e)}")
+                self.stats['failed_lines'] += 1
+                continue
+            
+            if parsed_entry is not None:
+                if event is not None:
+                    yield event
+                event = parsed_entry
+            elif event is not None:
+                self.stats['continuation_lines'] += 1
+                if event['line_count'] <= MAX_CONTINUATION_LINES:
+                    event['message'] += '\n' + line
+                    event['raw_line'] += '\n' + line
+                event['line_count'] += 1
+            elif leading:
+                self.stats['failed_lines'] += 1
+                yield self._unparsed_entry(line)
+        
+        if event is not None:
+            yield event
+    
     def get_stats(self) -> Dict[str, Union[int, float, Dict[str, int]]]:
         """Get parsing statistics."""
+        # Continuation lines merged into an event are not parse failures
         success_rate = 0.0
         if self.stats['total_lines'] > 0:
-            success_rate = (self.stats['parsed_lines'] / self.stats['total_lines']) * 100
+            success_rate = ((self.stats['parsed_lines'] + self.stats['continuation_lines']) /
+                            self.stats['total_lines']) * 100
         
         return {
             'total_lines': self.stats['total_lines'],
+            'total_events': self.stats['parsed_lines'] + self.stats['failed_lines'],
             'parsed_lines': self.stats['parsed_lines'],
             'failed_lines': self.stats['failed_lines'],
+            'continuation_lines': self.stats['continuation_lines'],
             'success_rate': round(success_rate, 2),
             'severity_counts': self.stats['severity_counts'],
-            'module_counts': self.stats['module_counts']
+            'module_counts': self.stats['module_counts'],
+            'detected_format': self.detected_format
         }
     
     def reset_stats(self):
@@ -472,6 +585,7 @@ class ApacheErrorLogParser:
             'total_lines': 0,
             'parsed_lines': 0,
             'failed_lines': 0,
+            'continuation_lines': 0,
             'severity_counts': {},
             'module_counts': {}
         }
@@ -533,6 +647,9 @@ def parse_apache_error_log(file_path: str) -> Tuple[List[Dict], Dict]:
         
     Returns:
         Tuple[List[Dict], Dict]: Parsed entries and statistics
+        
+    Raises:
+        admission.AdmissionError: No memory could be reserved for the parse
     """
     parser = ApacheErrorLogParser()
     entries = parser.parse_file(file_path)
@@ -545,6 +662,25 @@ def parse_apache_error_log(file_path: str) -> Tuple[List[Dict], Dict]:
     return entries, stats
 
 
+def iter_apache_error_log(file_path: str) -> Iterator[Dict]:
+    """
+    Yield the events of an Apache error log one at a time, in file order.
+    
+    Unlike parse_apache_error_log nothing is collected or sorted, so memory use
+    does not grow with the size of the log.
+    
+    Args:
+        file_path (str): Path to the log file
+        
+    Returns:
+        Iterator[Dict]: Parsed log entries
+    """
+    parser = ApacheErrorLogParser()
+    parser.specialize(parser.read_sample_lines(file_path))
+    with MappedLogFile(file_path) as log_file:
+        yield from parser.iter_events(log_file.iter_text_lines(), file_path)
+
+
 def calculate_timestamp_range(logs: List[Dict]) -> Dict:
     """
     Calculate timestamp range from parsed log entries.
@@ -591,23 +727,55 @@ def parse_apache_error_content(content: str, max_lines: Optional[int] = None) ->
     return entries, stats
 
 
-def get_dashboard_stats(logs: List[Dict]) -> Dict:
+def message_group(entry: Dict) -> str:
+    """
+    Key grouping an entry's message on the dashboard: the first 100 chars of its
+    first line, so events differing only in their stack trace are grouped together.
+    """
+    message = entry.get('message', '').split('\n', 1)[0]
+    if not message:
+        return ''
+    return message[:100] + ('...' if len(message) > 100 else '')
+
+
+def hour_bucket(entry: Dict) -> Optional[str]:
+    """Hour of an entry's timestamp as 'YYYY-MM-DD HH:00', or None if it has no usable timestamp."""
+    timestamp = entry.get('timestamp')
+    if not timestamp or timestamp == 'N/A' or not isinstance(timestamp, str):
+        return None
+    try:
+        if 'T' in timestamp:  # ISO format
+            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        else:
+            # Try to parse other formats
+            dt = datetime.strptime(timestamp.split('.')[0], '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        # Skip unparseable timestamps
+        return None
+    return dt.strftime('%Y-%m-%d %H:00')
+
+
+def get_dashboard_stats(logs: List[Dict], client_ips: Optional[IpColumn] = None,
+                        prefixes: Optional[Dict[int, Tuple[int, ...]]] = None) -> Dict:
     """
     Generate dashboard statistics from parsed Apache error log entries.
     
     Args:
         logs (List[Dict]): List of parsed log entries
+        client_ips (Optional[IpColumn]): Client address column of the entries, built if None
+        prefixes (Optional[Dict]): Subnet prefix lengths per address family for top_subnets
         
     Returns:
         Dict: Dashboard statistics including severity distribution, timeline data, 
-              top modules, and frequent error messages
+              top modules, frequent error messages and client subnets
     """
     if not logs:
         return {
             'severity_distribution': [],
             'timeline_data': [],
             'top_modules': [],
-            'frequent_messages': []
+            'frequent_messages': [],
+            'top_subnets': []
         }
     
     severity_counts = {}
@@ -624,29 +792,14 @@ def get_dashboard_stats(logs: List[Dict]) -> Dict:
         module = log_entry.get('module', 'unknown')
         module_counts[module] = module_counts.get(module, 0) + 1
         
-        # Count error messages (first 100 chars for grouping)
-        message = log_entry.get('message', '')
-        if message:
-            short_message = message[:100] + ('...' if len(message) > 100 else '')
+        short_message = message_group(log_entry)
+        if short_message:
             message_counts[short_message] = message_counts.get(short_message, 0) + 1
         
         # Timeline data - group by hour
-        timestamp = log_entry.get('timestamp')
-        if timestamp and timestamp != 'N/A':
-            try:
-                # Parse ISO format timestamp and group by hour
-                if isinstance(timestamp, str):
-                    if 'T' in timestamp:  # ISO format
-                        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                    else:
-                        # Try to parse other formats
-                        dt = datetime.strptime(timestamp.split('.')[0], '%Y-%m-%d %H:%M:%S')
-                    
-                    hour_key = dt.strftime('%Y-%m-%d %H:00')
-                    timeline_data[hour_key] = timeline_data.get(hour_key, 0) + 1
-            except (ValueError, AttributeError):
-                # Skip unparseable timestamps
-                pass
+        hour_key = hour_bucket(log_entry)
+        if hour_key:
+            timeline_data[hour_key] = timeline_data.get(hour_key, 0) + 1
     
     # Convert to lists for frontend
     severity_distribution = [
@@ -677,6 +830,7 @@ def get_dashboard_stats(logs: List[Dict]) -> Dict:
         'timeline_data': timeline_list,
         'top_modules': top_modules,
         'frequent_messages': frequent_messages,
+        'top_subnets': (client_ips or IpColumn.from_records(logs, 'client_ip')).rollups(prefixes),
         'total_entries': len(logs),
         'unique_modules': len(module_counts),
         'unique_severities': len(severity_counts)
@@ -722,4 +876,16 @@ if __name__ == "__main__":
     # Test format detection
     print(f"\nFormat Detection:")
     format_info = parser.detect_format(sample_logs)
-    print(f"Detected format: {format_info['format']} (confidence: {format_info['confidence']:.2f})") 
\ No newline at end of file
+    print(f"Detected format: {format_info['format']} (confidence: {format_info['confidence']:.2f})")
+    
+    # A file whose head is in the simplified dialect must still parse standard lines in full
+    print(f"\nMixed dialect check:")
+    mixed_parser = ApacheErrorLogParser()
+    mixed_parser.specialize([f"[Tue Oct 10 14:32:{second:02d} 2023] [error] simplified message"
+                             for second in range(20)])
+    for log_line in sample_logs:
+        expected = ApacheErrorLogParser().parse_line(log_line)
+        result = mixed_parser.parse_line(log_line)
+        fields = ('severity', 'module', 'pid', 'client_ip', 'error_code', 'message')
+        assert all(result[field] == expected[field] for field in fields), log_line
+    print("✓ Standard lines parse the same after specializing on the simplified dialect") 
\ No newline at end of file
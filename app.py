@@ -1,22 +1,55 @@
-from flask import Flask, jsonify, render_template, request, redirect, url_for
+from flask import Flask, Response, g, jsonify, render_template, request, redirect, url_for, stream_with_context
 import re
 import os
+import zlib
+import hashlib
 import logging
-from datetime import datetime, timedelta
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
 from collections import Counter, defaultdict
 from werkzeug.utils import secure_filename
+from werkzeug.http import is_resource_modified
+from werkzeug.exceptions import RequestEntityTooLarge
 import glob
+import shutil
 import threading
 import time
 import apache_error_parser
+import apache_access_parser
 import modsecurity_parser
+import log_correlation
+import log_store
+import log_summary
+import audit_archive
+import log_decoding
+import log_export
+import page_cache
+import columnar
+import blob_store
+import upload_pipeline
+import admission
+import log_sampling
+import ip_columns
+from storage_ledger import StorageLedger
+
+try:
+    import brotli  # Optional: preferred over gzip when the client accepts it
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MODSECURITY_FOLDER'] = 'uploads/modsec'
 app.config['APACHE_ERROR_FOLDER'] = 'uploads/apache/error'
 app.config['APACHE_ACCESS_FOLDER'] = 'uploads/apache/access'
+app.config['BLOB_FOLDER'] = 'uploads/blobs'  # Upload contents by SHA-256; upload names are symlinks to them
 app.config['MAX_CONTENT_LENGTH'] = 300 * 1024 * 1024  # 300MB max file size
+app.config['LOG_DECODE_ERRORS'] = 'surrogateescape'  # Keeps invalid UTF-8 bytes recoverable
+app.config['PARSE_MEMORY_BUDGET'] = None  # Bytes all running parses may reserve together; None = 75% of RAM
+app.config['CONCURRENT_AUDIT_ROOTS'] = []  # Server directories the directory= concurrent ingest may copy from; empty = disabled
+
+log_decoding.set_decode_errors(app.config['LOG_DECODE_ERRORS'])
+admission.set_budget(app.config['PARSE_MEMORY_BUDGET'])
 
 # Security headers function
 @app.after_request
@@ -43,7 +76,9 @@ def add_security_headers(response):
     response.headers['X-XSS-Protection'] = '1; mode=block'
     response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
     
-    return response
+    # Cache validators and compression for the JSON API
+    add_cache_validators(response)
+    return compress_response(response)
 
 # Ensure upload directories exist (they should already exist)
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -59,55 +94,104 @@ CLEANUP_OLDER_THAN_DAYS = 30  # Delete files older than 30 days
 MAX_STORAGE_SIZE_MB = 5000  # Maximum 5GB total storage
 CLEANUP_INTERVAL_HOURS = 168  # Run cleanup every 7 days
 
+LEDGER_RECONCILE_INTERVAL_MINUTES = 60  # Re-sync the storage ledger with disk every hour
+
+# Upload folder holding the named uploads of each log type
+UPLOAD_FOLDERS = {
+    'modsecurity': app.config['MODSECURITY_FOLDER'],
+    'apache-error': app.config['APACHE_ERROR_FOLDER'],
+    'apache-access': app.config['APACHE_ACCESS_FOLDER']
+}
+
 # Storage management and cleanup functionality
-def get_directory_size(directory):
-    """Calculate total size of directory in bytes."""
-    total_size = 0
-    try:
-        for dirpath, dirnames, filenames in os.walk(directory):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                if os.path.exists(filepath):
-                    total_size += os.path.getsize(filepath)
-    except Exception as e:
-        print(f"Error calculating directory size: {e}")
-    return total_size
+storage_ledger = StorageLedger(app.config['UPLOAD_FOLDER'])
+
+def get_blob_dir(log_type):
+    """Directory holding the upload contents of a log type."""
+    return os.path.join(app.config['BLOB_FOLDER'], log_type)
+
+def is_blob_path(path):
+    """Check whether a path lies in one of the blob directories."""
+    return os.path.dirname(os.path.dirname(os.path.normpath(path))) == os.path.normpath(app.config['BLOB_FOLDER'])
+
+def get_cleanup_candidates(directory):
+    """Files and concurrent-mode dataset directories in an upload folder as (path, mtime, size)."""
+    return storage_ledger.files(directory) + storage_ledger.directories(directory)
+
+def get_blob_candidates():
+    """
+    Stored upload contents as (path, mtime, size), one entry per blob.
+
+    The size includes the blob's manifest and SQLite store; the mtime is that of
+    the most recent upload of the content, so re-uploads keep it from expiring.
+    """
+    aliases = blob_store.alias_index(UPLOAD_FOLDERS.values())
+    candidates = []
+    for log_type in UPLOAD_FOLDERS:
+        for blob_path, modified_time, size in blob_store.group_blob_files(storage_ledger.files(get_blob_dir(log_type))):
+            for alias_path in aliases.get(blob_path, []):
+                try:
+                    modified_time = max(modified_time, os.lstat(alias_path).st_mtime)
+                except OSError:
+                    pass
+            candidates.append((blob_path, modified_time, size))
+    return candidates
+
+def remove_upload(path):
+    """Delete an uploaded file, blob or dataset directory and drop it from the ledger."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+        storage_ledger.forget_tree(path)
+    elif is_blob_path(path):
+        aliases = blob_store.alias_index(UPLOAD_FOLDERS.values()).get(os.path.normpath(path), [])
+        for removed in blob_store.remove_blob(path, aliases):
+            storage_ledger.forget(removed)
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        storage_ledger.forget(path)
 
 def cleanup_old_files():
     """Remove files older than specified days and manage storage limits."""
     cleanup_count = 0
     total_cleaned_size = 0
     
-    # Get cutoff date
-    cutoff_date = datetime.now() - timedelta(days=CLEANUP_OLDER_THAN_DAYS)
+    # Get cutoff time
+    cutoff_time = (datetime.now() - timedelta(days=CLEANUP_OLDER_THAN_DAYS)).timestamp()
     
     # Directories to clean
     directories_to_clean = [
         app.config['APACHE_ERROR_FOLDER'],
+        app.config['APACHE_ACCESS_FOLDER'],
         app.config['MODSECURITY_FOLDER']
     ]
     
     for directory in directories_to_clean:
-        try:
-            for filename in os.listdir(directory):
-                filepath = os.path.join(directory, filename)
-                
-                if os.path.isfile(filepath):
-                    # Check file age
-                    file_modified_time = datetime.fromtimestamp(os.path.getmtime(filepath))
-                    
-                    if file_modified_time < cutoff_date:
-                        file_size = os.path.getsize(filepath)
-                        os.remove(filepath)
-                        cleanup_count += 1
-                        total_cleaned_size += file_size
-                        print(f"Cleaned up old file: {filepath}")
-                        
-        except Exception as e:
-            print(f"Error during cleanup of {directory}: {e}")
+        for filepath, modified_time, file_size in get_cleanup_candidates(directory):
+            # Check file age
+            if modified_time < cutoff_time:
+                try:
+                    remove_upload(filepath)
+                    cleanup_count += 1
+                    total_cleaned_size += file_size
+                    print(f"Cleaned up old file: {filepath}")
+                except Exception as e:
+                    print(f"Error during cleanup of {filepath}: {e}")
+    
+    for filepath, modified_time, file_size in get_blob_candidates():
+        if modified_time < cutoff_time:
+            try:
+                remove_upload(filepath)
+                cleanup_count += 1
+                total_cleaned_size += file_size
+                print(f"Cleaned up old file: {filepath}")
+            except Exception as e:
+                print(f"Error during cleanup of {filepath}: {e}")
     
     # Check storage limits and clean oldest files if needed
-    total_storage_size = get_directory_size(app.config['UPLOAD_FOLDER'])
+    total_storage_size = storage_ledger.total_size()
     max_storage_bytes = MAX_STORAGE_SIZE_MB * 1024 * 1024
     
     if total_storage_size > max_storage_bytes:
@@ -123,35 +207,27 @@ def cleanup_by_storage_limit():
     """Remove oldest files when storage limit is exceeded."""
     cleanup_count = 0
     
-    # Get all files with modification times
+    # Get all files with modification times from the ledger
     all_files = []
-    directories = [app.config['APACHE_ERROR_FOLDER'], app.config['MODSECURITY_FOLDER']]
+    for directory in [app.config['APACHE_ERROR_FOLDER'], app.config['APACHE_ACCESS_FOLDER'],
+                      app.config['MODSECURITY_FOLDER']]:
+        all_files.extend(get_cleanup_candidates(directory))
     
-    for directory in directories:
-        try:
-            for filename in os.listdir(directory):
-                filepath = os.path.join(directory, filename)
-                if os.path.isfile(filepath):
-                    modified_time = os.path.getmtime(filepath)
-                    file_size = os.path.getsize(filepath)
-                    all_files.append((filepath, modified_time, file_size))
-        except Exception as e:
-            print(f"Error listing files in {directory}: {e}")
+    # Each stored content counts once, however many upload names point at it
+    all_files.extend(get_blob_candidates())
     
     # Sort by modification time (oldest first)
     all_files.sort(key=lambda x: x[1])
     
     # Remove oldest files until under storage limit
     max_storage_bytes = MAX_STORAGE_SIZE_MB * 1024 * 1024
-    current_storage = get_directory_size(app.config['UPLOAD_FOLDER'])
     
     for filepath, _, file_size in all_files:
-        if current_storage <= max_storage_bytes:
+        if storage_ledger.total_size() <= max_storage_bytes:
             break
             
         try:
-            os.remove(filepath)
-            current_storage -= file_size
+            remove_upload(filepath)
             cleanup_count += 1
             print(f"Removed file due to storage limit: {filepath}")
         except Exception as e:
@@ -160,23 +236,29 @@ def cleanup_by_storage_limit():
     return cleanup_count
 
 def background_cleanup_task():
-    """Background task to run file cleanup periodically."""
+    """Background task to reconcile the storage ledger and run file cleanup periodically."""
+    last_cleanup = None
     while True:
         try:
-            time.sleep(CLEANUP_INTERVAL_HOURS * 3600)  # Convert hours to seconds
-            print("Running scheduled file cleanup...")
-            cleanup_old_files()
+            storage_ledger.reconcile()
+            
+            # Initial cleanup runs as soon as the ledger is populated, then every interval
+            if last_cleanup is None or time.time() - last_cleanup >= CLEANUP_INTERVAL_HOURS * 3600:
+                if last_cleanup is not None:
+                    print("Running scheduled file cleanup...")
+                cleanup_old_files()
+                last_cleanup = time.time()
+            
+            time.sleep(LEDGER_RECONCILE_INTERVAL_MINUTES * 60)
         except Exception as e:
             print(f"Error in background cleanup task: {e}")
             time.sleep(3600)  # Wait 1 hour before retrying
 
-# Start background cleanup task
+# Start background cleanup task; the initial ledger scan and cleanup run there
+# so importing the app does not walk the uploads tree
 cleanup_thread = threading.Thread(target=background_cleanup_task, daemon=True)
 cleanup_thread.start()
 
-# Run initial cleanup on startup
-cleanup_old_files()
-
 def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and \
@@ -192,20 +274,34 @@ def get_available_files():
             'filename': 'modsec_audit.log',
             'display_name': 'modsec_audit.log (default)',
             'is_default': True,
-            'modified': os.path.getmtime('modsec_audit.log')
+            'modified': os.path.getmtime('modsec_audit.log'),
+            'file_size': os.path.getsize('modsec_audit.log'),
+            'summary': log_summary.load_manifest('modsec_audit.log')
         })
     
     # Add uploaded ModSecurity files from uploads/modsec/
     for file_path in glob.glob(os.path.join(app.config['MODSECURITY_FOLDER'], '*')):
-        if os.path.isfile(file_path):
+        if os.path.isdir(file_path) and file_path.endswith(modsecurity_parser.CONCURRENT_DATASET_SUFFIX):
+            filename = os.path.basename(file_path)
+            files.append({
+                'filename': filename,
+                'display_name': f"{filename[:-len(modsecurity_parser.CONCURRENT_DATASET_SUFFIX)]} (concurrent)",
+                'is_default': False,
+                'modified': os.path.getmtime(file_path),
+                'upload_path': file_path,
+                'summary': log_summary.load_manifest(file_path)
+            })
+        elif os.path.isfile(file_path):
             filename = os.path.basename(file_path)
             if allowed_file(filename):
                 files.append({
                     'filename': filename,
                     'display_name': filename,
                     'is_default': False,
-                    'modified': os.path.getmtime(file_path),
-                    'upload_path': file_path
+                    'modified': os.lstat(file_path).st_mtime,
+                    'file_size': os.path.getsize(file_path),
+                    'upload_path': file_path,
+                    'summary': log_summary.load_manifest(blob_store.resolve(file_path))
                 })
     
     # Sort by modification time (newest first)
@@ -226,8 +322,32 @@ def get_available_apache_error_files():
                     'filename': filename,
                     'display_name': filename,
                     'is_default': False,
-                    'modified': os.path.getmtime(file_path),
-                    'upload_path': file_path
+                    'modified': os.lstat(file_path).st_mtime,
+                    'upload_path': file_path,
+                    'summary': log_summary.load_manifest(blob_store.resolve(file_path))
+                })
+    
+    # Sort by modification time (newest first)
+    files.sort(key=lambda x: x['modified'], reverse=True)
+    
+    return files
+
+def get_available_apache_access_files():
+    """Get list of available Apache access log files."""
+    files = []
+    
+    # Add uploaded Apache access files from uploads/apache/access/
+    for file_path in glob.glob(os.path.join(app.config['APACHE_ACCESS_FOLDER'], '*')):
+        if os.path.isfile(file_path):
+            filename = os.path.basename(file_path)
+            if allowed_file(filename):
+                files.append({
+                    'filename': filename,
+                    'display_name': filename,
+                    'is_default': False,
+                    'modified': os.lstat(file_path).st_mtime,
+                    'upload_path': file_path,
+                    'summary': log_summary.load_manifest(blob_store.resolve(file_path))
                 })
     
     # Sort by modification time (newest first)
@@ -235,26 +355,330 @@ def get_available_apache_error_files():
     
     return files
 
+def get_upload_path(filename, log_type='modsecurity'):
+    """Get the path of an upload name in the folder of its log type (defaults to modsecurity)."""
+    return os.path.join(UPLOAD_FOLDERS.get(log_type, app.config['MODSECURITY_FOLDER']), secure_filename(filename))
+
 def get_file_path(filename, log_type='modsecurity'):
-    """Get the full path for a log file."""
+    """
+    Get the full path for a log file.
+
+    Upload names that alias a stored blob resolve to the blob, so parse caches,
+    manifests and SQLite stores are shared by every name of the same content.
+    """
     if filename == 'modsec_audit.log' and os.path.exists('modsec_audit.log'):
         return 'modsec_audit.log'
     
-    # Check appropriate folder based on log type
-    if log_type == 'apache-error':
-        upload_path = os.path.join(app.config['APACHE_ERROR_FOLDER'], secure_filename(filename))
-    else:  # Default to modsecurity
-        upload_path = os.path.join(app.config['MODSECURITY_FOLDER'], secure_filename(filename))
-    
+    upload_path = get_upload_path(filename, log_type)
     if os.path.exists(upload_path):
-        return upload_path
+        return blob_store.resolve(upload_path)
+    
+    return None
+
+def store_upload(file, log_type):
+    """
+    Store an uploaded log file by content and give it an upload name.
+
+    The upload is hashed while it is written to the blob directory. New content
+    gets a timestamped name; content that is already stored keeps its existing
+    name in the folder, so nothing is copied or parsed again.
+
+    Args:
+        file (FileStorage): The uploaded file
+        log_type (str): 'modsecurity', 'apache-error' or 'apache-access'
+
+    Returns:
+        Tuple[str, str, str, str, bool]: (upload name, blob path, upload timestamp, SHA-256, duplicate flag)
+    """
+    blob_path, digest, duplicate = blob_store.save_blob(file.stream, get_blob_dir(log_type))
+    filename, timestamp = name_upload(file.filename, blob_path, duplicate, log_type)
+    return filename, blob_path, timestamp, digest, duplicate
+
+def name_upload(original_filename, blob_path, duplicate, log_type):
+    """
+    Give a stored blob its upload name.
+
+    Duplicate content uploaded under the same original name gets its existing
+    name back; under another name it gets a name of its own, which shares the
+    blob and everything derived from it (manifest, SQLite store).
+
+    Returns:
+        Tuple[str, str]: (upload name, upload timestamp)
+    """
+    folder = UPLOAD_FOLDERS[log_type]
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    name, ext = os.path.splitext(secure_filename(original_filename))
     
+    alias_path = None
+    if duplicate:
+        # Names given below: <name>_<YYYYmmdd_HHMMSS>[_<counter>]<ext>
+        name_pattern = re.compile(re.escape(name) + r'_\d{8}_\d{6}(?:_\d+)?' + re.escape(ext))
+        alias_path = blob_store.find_alias(folder, blob_path, name_pattern)
+    if alias_path:
+        blob_store.touch_alias(alias_path)
+    else:
+        # Add timestamp to avoid conflicts
+        alias_path = os.path.join(folder, f"{name}_{timestamp}{ext}")
+        counter = 1
+        while os.path.lexists(alias_path):
+            alias_path = os.path.join(folder, f"{name}_{timestamp}_{counter}{ext}")
+            counter += 1
+        blob_store.create_alias(alias_path, blob_path)
+    
+    if not duplicate:
+        storage_ledger.record(blob_path)
+    return os.path.basename(alias_path), timestamp
+
+def delete_upload(filename, log_type):
+    """Delete an upload name; stored content is removed with its last name."""
+    upload_path = get_upload_path(filename, log_type)
+    if blob_store.is_alias(upload_path):
+        blob_path = blob_store.resolve(upload_path)
+        os.remove(upload_path)
+        if not blob_store.alias_index(UPLOAD_FOLDERS.values()).get(blob_path):
+            for removed in blob_store.remove_blob(blob_path):
+                storage_ledger.forget(removed)
+        return
+    
+    os.remove(upload_path)
+    storage_ledger.forget(upload_path)
+    log_store.delete_store(upload_path)
+    storage_ledger.forget(log_store.get_store_path(upload_path))
+    log_summary.delete_manifest(upload_path)
+    storage_ledger.forget(log_summary.get_manifest_path(upload_path))
+
+def admit_full_parse(file_path, log_type):
+    """Reserve memory for parsing a whole log file, or get a 'streaming' reservation when over budget."""
+    if log_type == 'modsecurity' and os.path.isdir(file_path):
+        log_format = 'concurrent'
+        file_size = sum(size for _, size in modsecurity_parser.list_concurrent_audit_files(file_path))
+    else:
+        log_format = modsecurity_parser.detect_audit_log_format(file_path) if log_type == 'modsecurity' else 'text'
+        file_size = os.path.getsize(file_path)
+    return admission.admit(file_path, log_type, log_format, file_size, streamable=True)
+
+def ingest_log_file(file_path, log_type, records=None):
+    """
+    Parse a log file (unless its parsed records are given) and write it into its SQLite query store.
+    
+    When the memory budget has no room for a full parse the file is ingested
+    while it is streamed instead, in file order.
+    """
+    with (admit_full_parse(file_path, log_type) if records is None else nullcontext()) as reservation:
+        streaming = reservation is not None and reservation.mode == 'streaming'
+        if log_type == 'apache-error':
+            if streaming:
+                entries = apache_error_parser.iter_apache_error_log(file_path)
+            else:
+                entries = records if records is not None else apache_error_parser.parse_apache_error_log(file_path)[0]
+            result = log_store.ingest_apache_error_entries(file_path, entries)
+        else:
+            if streaming:
+                transactions = modsecurity_parser.iter_modsec_transactions(file_path)
+            else:
+                transactions = records if records is not None else modsecurity_parser.parse_modsec_log(file_path)
+            if isinstance(transactions, dict) and 'error' in transactions:
+                return transactions
+            result = log_store.ingest_modsec_transactions(file_path, transactions)
+    
+    storage_ledger.record(log_store.get_store_path(file_path))
+    return result
+
+def write_summary_manifest(file_path, log_type, summary=None):
+    """Compute (or store the given) summary manifest for an uploaded file and account for it in the ledger."""
+    if summary is not None:
+        summary = log_summary.store_manifest(file_path, summary)
+    else:
+        summary = log_summary.write_manifest(file_path, log_type)
+    storage_ledger.record(log_summary.get_manifest_path(file_path))
+    return summary
+
+def get_upload_summary(file_path, log_type, duplicate, summary=None):
+    """Summary manifest of an upload, reusing the stored one for content that was uploaded before."""
+    stored = log_summary.load_manifest(file_path) if duplicate else None
+    return stored or write_summary_manifest(file_path, log_type, summary)
+
+def ingest_upload(file_path, log_type, duplicate, records=None):
+    """Ingest an upload into its SQLite store, reusing an up-to-date store for content that was uploaded before."""
+    if duplicate:
+        status = log_store.get_store_status(file_path)
+        if status['ingested'] and not status['stale'] and status['log_type'] == log_type:
+            return log_store.get_row_counts(file_path, log_type)
+    return ingest_log_file(file_path, log_type, records)
+
+def wants_ingest():
+    """Check whether an upload request asked for SQLite ingest."""
+    return request.form.get('ingest', request.args.get('ingest', '')).lower() in ('1', 'true', 'yes')
+
+@app.errorhandler(admission.AdmissionError)
+def admission_rejected(error):
+    """503 response for a parse that got no memory reservation, asking the client to retry later."""
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+# Conditional requests and compression for the JSON API
+# GET endpoints whose JSON depends only on the query string and the log files it names,
+# as (query parameter, log type, default file name) for each file
+CONDITIONAL_ENDPOINTS = {
+    'get_modsecurity_logs': [('file', 'modsecurity', 'modsec_audit.log')],
+    'get_modsecurity_dashboard': [('file', 'modsecurity', 'modsec_audit.log')],
+    'get_modsecurity_rules': [('file', 'modsecurity', 'modsec_audit.log')],
+    'get_modsecurity_latency': [('file', 'modsecurity', 'modsec_audit.log')],
+    'get_apache_error_logs': [('file', 'apache-error', None)],
+    'get_apache_error_dashboard': [('file', 'apache-error', None)],
+    'get_apache_access_logs': [('file', 'apache-access', None)],
+    'get_apache_access_dashboard': [('file', 'apache-access', None)],
+    'get_correlation': [('modsec_file', 'modsecurity', None), ('apache_file', 'apache-error', None)]
+}
+
+# Part of every ETag; bump when parsing or the JSON of a conditional endpoint changes,
+# so responses cached with the old output are not revalidated. Fixed, so all workers
+# and restarts of the same version agree.
+API_FORMAT_VERSION = 1
+
+COMPRESS_MIN_BYTES = 1024  # Smaller JSON bodies are sent as they are
+COMPRESS_STREAM_BYTES = 1024 * 1024  # Larger bodies are compressed while they are sent
+COMPRESS_CHUNK_BYTES = 256 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def get_file_identity(file_path):
+    """Identity of a log file (or concurrent-mode dataset directory) as (size, mtime_ns, inode)."""
+    if not os.path.isdir(file_path):
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+    total_size = 0
+    newest = os.stat(file_path).st_mtime_ns
+    audit_files = modsecurity_parser.list_concurrent_audit_files(file_path)
+    for path, size in audit_files:
+        total_size += size
+        newest = max(newest, os.stat(path).st_mtime_ns)
+    return total_size, newest, len(audit_files)
+
+def get_response_validators():
+    """
+    Compute the ETag and Last-Modified date of a conditional GET API request.
+
+    The ETag hashes the identity of every file the request reads together with
+    the request path, the query parameters and the decode policy, so it can be
+    checked without parsing anything.
+
+    Returns:
+        tuple: (etag, last_modified datetime), or None if the request is not cacheable
+    """
+    specs = CONDITIONAL_ENDPOINTS.get(request.endpoint)
+    if request.method not in ('GET', 'HEAD') or not specs:
+        return None
+
+    identity = [API_FORMAT_VERSION, log_decoding.get_decode_errors(), request.path,
+                sorted(request.args.items(multi=True))]
+    newest = 0
+    for param, log_type, default in specs:
+        filename = request.args.get(param, default)
+        file_path = get_file_path(filename, log_type) if filename else None
+        if not file_path:
+            # Missing files are reported by the view itself
+            return None
+        try:
+            file_identity = get_file_identity(file_path)
+        except OSError:
+            return None
+        identity.append((file_path, file_identity))
+        newest = max(newest, file_identity[1])
+
+    etag = hashlib.sha1(repr(identity).encode('utf-8', 'surrogateescape')).hexdigest()
+    return etag, datetime.fromtimestamp(newest / 1e9, timezone.utc)
+
+@app.before_request
+def answer_conditional_request():
+    """Answer revalidation of an unchanged API response with 304 before the view parses the file."""
+    validators = get_response_validators()
+    if not validators:
+        return None
+    g.response_etag, g.response_last_modified = validators
+    if not is_resource_modified(request.environ, etag=g.response_etag, last_modified=g.response_last_modified):
+        return Response(status=304)
     return None
 
+def add_cache_validators(response):
+    """Attach the ETag and Last-Modified computed for this request to a 200 or 304 response."""
+    etag = g.get('response_etag')
+    if not etag or response.status_code not in (200, 304):
+        return response
+    # Weak: the same data is sent with different content encodings
+    response.set_etag(etag, weak=True)
+    response.last_modified = g.response_last_modified
+    response.headers['Cache-Control'] = 'no-cache'  # Always revalidate, usually with a 304
+    response.vary.add('Accept-Encoding')
+    return response
+
+def iter_compressed(data, encoding):
+    """Compress a body in COMPRESS_CHUNK_BYTES pieces with gzip or brotli."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+        compress, finish = compressor.compress, compressor.flush
+    for start in range(0, len(data), COMPRESS_CHUNK_BYTES):
+        chunk = compress(data[start:start + COMPRESS_CHUNK_BYTES])
+        if chunk:
+            yield chunk
+    yield finish()
+
+def compress_response(response):
+    """
+    Compress a large JSON response with brotli (if installed) or gzip.
+
+    Bodies over COMPRESS_STREAM_BYTES are compressed chunk by chunk while they
+    are sent instead of being held in memory a second time. Streamed responses
+    such as exports are left alone; they handle their own compression.
+    """
+    if (request.method != 'GET' or response.status_code != 200 or response.mimetype != 'application/json'
+            or response.is_streamed or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        encoding = 'br'
+    elif accepted['gzip']:
+        encoding = 'gzip'
+    else:
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    response.headers['Content-Encoding'] = encoding
+    if len(data) > COMPRESS_STREAM_BYTES:
+        response.response = iter_compressed(data, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(b''.join(iter_compressed(data, encoding)))
+    return response
+
+
+
 
 
 
+def get_response_shape(log_type):
+    """
+    Read the fields= projection and format= shape of a /logs request.
 
+    Returns:
+        tuple: (fields or None for all, 'rows' or 'columnar')
+
+    Raises:
+        ValueError: For unknown fields or formats
+    """
+    response_format = request.args.get('format') or 'rows'
+    if response_format not in columnar.RESPONSE_FORMATS:
+        raise ValueError(f"Unknown format: {response_format}. Use one of {', '.join(columnar.RESPONSE_FORMATS)}.")
+    return columnar.parse_fields(request.args.get('fields'), log_type), response_format
 
 @app.route('/api/modsecurity/files')
 def get_modsecurity_files():
@@ -273,39 +697,127 @@ def upload_modsecurity_file():
         return jsonify({'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        
-        # Add timestamp to avoid conflicts
-        name, ext = os.path.splitext(filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{name}_{timestamp}{ext}"
-        
-        upload_folder = app.config['MODSECURITY_FOLDER']
-        file_path = os.path.join(upload_folder, filename)
-        file.save(file_path)
+        filename, file_path, timestamp, digest, duplicate = store_upload(file, 'modsecurity')
         
         # Get file size
         file_size = os.path.getsize(file_path)
         
-        return jsonify({
+        response = {
             'success': True,
             'filename': filename,
             'file_size': file_size,
             'upload_timestamp': timestamp,
-            'message': f'ModSecurity log file uploaded successfully as {filename}'
-        })
+            'sha256': digest,
+            'duplicate': duplicate,
+            'message': f'ModSecurity log file uploaded successfully as {filename}',
+            'summary': get_upload_summary(file_path, 'modsecurity', duplicate)
+        }
+        if wants_ingest():
+            response['ingest'] = ingest_upload(file_path, 'modsecurity', duplicate)
+        
+        return jsonify(response)
     
     return jsonify({'error': 'Invalid file type. Only .log and .txt files are allowed.'}), 400
 
+def resolve_audit_directory(directory):
+    """
+    Resolve a server-side concurrent audit log directory against the CONCURRENT_AUDIT_ROOTS allowlist.
+    
+    Returns:
+        str: The real path of the directory, or None if it is not inside a configured root
+    """
+    real_directory = os.path.realpath(directory)
+    for root in app.config['CONCURRENT_AUDIT_ROOTS']:
+        real_root = os.path.realpath(root)
+        if os.path.commonpath([real_root, real_directory]) == real_root:
+            return real_directory
+    return None
+
+@app.route('/api/modsecurity/upload-concurrent', methods=['POST'])
+def upload_modsecurity_concurrent():
+    """Ingest a concurrent-mode audit log directory from an archive upload or a server-side path."""
+    file = request.files.get('file')
+    directory = request.form.get('directory', '').strip()
+    if (not file or file.filename == '') and not directory:
+        return jsonify({'error': 'Provide an archive file or a directory path'}), 400
+    
+    if file and file.filename:
+        if not audit_archive.is_archive(file.filename):
+            return jsonify({'error': 'Invalid file type. Only .tar, .tar.gz, .tgz and .zip archives are allowed.'}), 400
+        base_name = secure_filename(file.filename)
+        for extension in audit_archive.ARCHIVE_EXTENSIONS:
+            if base_name.lower().endswith(extension):
+                base_name = base_name[:-len(extension)]
+                break
+    else:
+        directory = resolve_audit_directory(directory)
+        if directory is None:
+            return jsonify({'error': 'Directory ingest is not allowed for this path. '
+                                     'Add its audit log root to CONCURRENT_AUDIT_ROOTS.'}), 403
+        base_name = secure_filename(os.path.basename(os.path.normpath(directory))) or 'audit'
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"{base_name}_{timestamp}{modsecurity_parser.CONCURRENT_DATASET_SUFFIX}"
+    dataset_path = os.path.join(app.config['MODSECURITY_FOLDER'], filename)
+    counter = 1
+    while os.path.exists(dataset_path):
+        # Never merge two uploads into the same dataset directory
+        filename = f"{base_name}_{timestamp}_{counter}{modsecurity_parser.CONCURRENT_DATASET_SUFFIX}"
+        dataset_path = os.path.join(app.config['MODSECURITY_FOLDER'], filename)
+        counter += 1
+    
+    try:
+        if file and file.filename:
+            archive_path = dataset_path + '.upload'
+            file.save(archive_path)
+            try:
+                copied = audit_archive.extract_archive(archive_path, dataset_path)
+            finally:
+                os.remove(archive_path)
+        else:
+            copied = audit_archive.copy_directory(directory, dataset_path)
+    except audit_archive.DatasetError as e:
+        if os.path.isdir(dataset_path):
+            shutil.rmtree(dataset_path)
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        if os.path.isdir(dataset_path):
+            shutil.rmtree(dataset_path)
+        logging.error(f'Error ingesting concurrent audit log {base_name}: {str(e)}')
+        return jsonify({'error': 'An internal server error occurred while ingesting the audit log directory.'}), 500
+    
+    storage_ledger.record_tree(dataset_path)
+    
+    return jsonify({
+        'success': True,
+        'filename': filename,
+        'file_count': copied['files'],
+        'file_size': copied['bytes'],
+        'upload_timestamp': timestamp,
+        'message': f'ModSecurity concurrent audit log ingested successfully as {filename}',
+        'summary': write_summary_manifest(dataset_path, 'modsecurity')
+    })
+
 @app.route('/api/modsecurity/logs')
 def get_modsecurity_logs():
-    """Get ModSecurity logs from specified file or default file."""
+    """
+    Get ModSecurity logs from specified file or default file.
+    
+    cidr= keeps the transactions whose source address lies in any of the
+    comma-separated networks (e.g. 203.0.113.0/24,2001:db8::/32).
+    """
     filename = request.args.get('file', 'modsec_audit.log')
     file_path = get_file_path(filename)
     
     if not file_path:
         return jsonify({'error': f'File {filename} not found'}), 404
     
+    try:
+        fields, response_format = get_response_shape('modsecurity')
+        cidr_ranges = ip_columns.parse_cidr(request.args.get('cidr'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     logs = modsecurity_parser.parse_modsec_log(file_path)
     if isinstance(logs, dict) and 'error' in logs:
         return jsonify(logs)
@@ -313,27 +825,137 @@ def get_modsecurity_logs():
     # Calculate timestamp range using parser function
     timestamp_range = modsecurity_parser.calculate_timestamp_range_modsec(logs)
     
-    return jsonify({
-        'logs': logs,
+    if cidr_ranges:
+        logs = ip_columns.filter_records(logs, 'source_ip', cidr_ranges)
+    
+    response_data = {
+        'logs': columnar.shape_records(logs, fields, response_format, 'modsecurity'),
         'timestamp_range': timestamp_range
-    })
+    }
+    if response_format != 'rows':
+        response_data['format'] = response_format
+    return jsonify(response_data)
+
+# Dashboard modes: 'exact' parses the whole file, 'sample' estimates large files from samples
+DASHBOARD_MODES = ('exact', 'sample')
 
 @app.route('/api/modsecurity/dashboard')
 def get_modsecurity_dashboard():
-    """Get ModSecurity dashboard data from specified file or default file."""
+    """
+    Get ModSecurity dashboard data from specified file or default file.
+    
+    mode=sample estimates the dashboard from evenly spaced samples of large files
+    within a fixed time budget (see log_sampling); smaller files get the exact result.
+    prefixes= and prefixes6= set the IPv4/IPv6 prefix lengths of the top_subnets rollups.
+    """
     filename = request.args.get('file', 'modsec_audit.log')
     file_path = get_file_path(filename)
     
     if not file_path:
         return jsonify({'error': f'File {filename} not found'}), 404
     
+    mode = request.args.get('mode', 'exact')
+    if mode not in DASHBOARD_MODES:
+        return jsonify({'error': f"Unknown mode {mode}. Use {' or '.join(DASHBOARD_MODES)}."}), 400
+    try:
+        prefixes = ip_columns.parse_prefixes(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if mode == 'sample' and log_sampling.should_sample(file_path):
+        return jsonify(log_sampling.sample_modsec_dashboard(file_path, prefixes=prefixes))
+    
     logs = modsecurity_parser.parse_modsec_log(file_path)
     if isinstance(logs, dict) and 'error' in logs:
         return jsonify(logs)
     
-    dashboard_data = modsecurity_parser.get_dashboard_data(logs)
+    dashboard_data = modsecurity_parser.get_dashboard_data(logs, prefixes)
     return jsonify(dashboard_data)
 
+@app.route('/api/modsecurity/rules')
+def get_modsecurity_rules():
+    """Get per-rule analytics, or the drill-down for one rule with ?rule=<id>."""
+    filename = request.args.get('file', 'modsec_audit.log')
+    file_path = get_file_path(filename)
+    
+    if not file_path:
+        return jsonify({'error': f'File {filename} not found'}), 404
+    
+    rule_id = request.args.get('rule')
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)  # 1 to 500 rules
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    logs = modsecurity_parser.parse_modsec_log(file_path)
+    if isinstance(logs, dict) and 'error' in logs:
+        return jsonify(logs)
+    
+    rule_data = modsecurity_parser.get_rule_analytics(logs, rule_id=rule_id, limit=limit)
+    if 'error' in rule_data:
+        return jsonify(rule_data), 404
+    return jsonify(rule_data)
+
+@app.route('/api/modsecurity/latency')
+def get_modsecurity_latency():
+    """Get Stopwatch latency percentiles per hour, rule hit and path."""
+    filename = request.args.get('file', 'modsec_audit.log')
+    file_path = get_file_path(filename)
+    
+    if not file_path:
+        return jsonify({'error': f'File {filename} not found'}), 404
+    
+    try:
+        path_limit = min(max(int(request.args.get('limit', 20)), 1), modsecurity_parser.LATENCY_MAX_PATHS + 1)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    logs = modsecurity_parser.parse_modsec_log(file_path)
+    if isinstance(logs, dict) and 'error' in logs:
+        return jsonify(logs)
+    
+    return jsonify(modsecurity_parser.get_latency_analytics(logs, path_limit=path_limit))
+
+def export_response(records, log_type, filename):
+    """
+    Stream the records matching the request's list-view filters as NDJSON or CSV.
+    
+    Query parameters: format (ndjson or csv), gzip (1 to compress), plus the
+    filters accepted by log_export.make_filter.
+    """
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in log_export.EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported export format. Use {' or '.join(log_export.EXPORT_FORMATS)}."}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    
+    matches = log_export.make_filter(request.args, log_type)
+    body = log_export.stream_export((record for record in records if matches(record)),
+                                    export_format, log_type, compress)
+    
+    def logged(chunks):
+        try:
+            yield from chunks
+        except Exception as e:
+            logging.error(f'Error exporting {filename}: {str(e)}')
+            raise
+    
+    download_name = f"{os.path.splitext(filename)[0]}.{export_format}" + ('.gz' if compress else '')
+    return Response(
+        stream_with_context(logged(body)),
+        mimetype='application/gzip' if compress else log_export.EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{download_name}"'}
+    )
+
+@app.route('/api/modsecurity/export')
+def export_modsecurity_logs():
+    """Stream filtered ModSecurity transactions as NDJSON or CSV without building the full list."""
+    filename = request.args.get('file', 'modsec_audit.log')
+    file_path = get_file_path(filename)
+    
+    if not file_path:
+        return jsonify({'error': f'File {filename} not found'}), 404
+    
+    return export_response(modsecurity_parser.iter_modsec_transactions(file_path), 'modsecurity', filename)
+
 # Apache Error Log API endpoints
 @app.route('/api/apache-error/files')
 def get_apache_error_files():
@@ -355,26 +977,25 @@ def upload_apache_error_file():
         return jsonify({'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        
-        # Add timestamp to avoid conflicts
-        name, ext = os.path.splitext(filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{name}_{timestamp}{ext}"
-        
-        file_path = os.path.join(app.config['APACHE_ERROR_FOLDER'], filename)
-        file.save(file_path)
+        filename, file_path, timestamp, digest, duplicate = store_upload(file, 'apache-error')
         
         # Get file size
         file_size = os.path.getsize(file_path)
         
-        return jsonify({
+        response = {
             'success': True,
             'filename': filename,
             'file_size': file_size,
             'upload_timestamp': timestamp,
-            'message': f'Apache error log file uploaded successfully as {filename}'
-        })
+            'sha256': digest,
+            'duplicate': duplicate,
+            'message': f'Apache error log file uploaded successfully as {filename}',
+            'summary': get_upload_summary(file_path, 'apache-error', duplicate)
+        }
+        if wants_ingest():
+            response['ingest'] = ingest_upload(file_path, 'apache-error', duplicate)
+        
+        return jsonify(response)
     
     return jsonify({'error': 'Invalid file type. Only .log and .txt files are allowed.'}), 400
 
@@ -386,7 +1007,7 @@ def delete_apache_error_file(filename):
         if not file_path:
             return jsonify({'error': f'File {filename} not found'}), 404
         
-        os.remove(file_path)
+        delete_upload(filename, 'apache-error')
         return jsonify({
             'success': True,
             'message': f'File {filename} deleted successfully'
@@ -395,9 +1016,50 @@ def delete_apache_error_file(filename):
         logging.error(f'Error deleting file {filename}: {str(e)}')
         return jsonify({'error': 'An internal server error occurred while deleting the file.'}), 500
 
+# Parsed Apache error logs and their encoded pages, shared by the list and dashboard views
+apache_error_pages = page_cache.PageCache()
+
+# Columns the Apache error list can be sorted by
+APACHE_ERROR_SORT_COLUMNS = ('timestamp', 'severity', 'module', 'pid', 'client_ip', 'client_port', 'error_code',
+                             'message', 'line_count')
+
+def get_apache_error_dataset(file_path, parsed=None):
+    """
+    Parsed entries and stats of an Apache error log, from the page cache while the file is unchanged.
+
+    parsed: (entries, stats) already parsed from the file, used instead of parsing it on a cache miss
+    """
+    dataset = apache_error_pages.get_dataset(file_path, (log_decoding.get_decode_errors(), get_file_identity(file_path)),
+                                             lambda: parsed or apache_error_parser.parse_apache_error_log(file_path))
+    # Packing the client addresses right away also lets equal address strings share one object
+    get_client_ip_column(dataset)
+    return dataset
+
+def get_client_ip_column(dataset):
+    """Client addresses of a cached Apache error dataset as an ip_columns.IpColumn, built once."""
+    return dataset.column('client_ip', lambda entries: ip_columns.IpColumn.from_records(entries, 'client_ip'))
+
+def filter_and_sort_entries(entries, view_key, matches):
+    """Apply a list view's filters and sort order (text case-insensitively, entries missing the column last)."""
+    filters, sort_column, descending = view_key
+    if filters:
+        entries = [entry for entry in entries if matches(entry)]
+    if sort_column:
+        present = [entry for entry in entries if entry.get(sort_column) is not None]
+        missing = [entry for entry in entries if entry.get(sort_column) is None]
+        present.sort(key=lambda entry: entry[sort_column].lower() if isinstance(entry[sort_column], str)
+                     else entry[sort_column], reverse=descending)
+        entries = present + missing
+    return entries
+
 @app.route('/api/apache-error/logs')
 def get_apache_error_logs():
-    """Get Apache error logs from specified file with pagination."""
+    """
+    Get Apache error logs from specified file with pagination, filters and sorting.
+    
+    cidr= keeps the entries whose client address lies in any of the comma-separated
+    networks, found by a range scan over the dataset's packed address column.
+    """
     filename = request.args.get('file')
     if not filename:
         return jsonify({'error': 'File parameter is required'}), 400
@@ -406,73 +1068,475 @@ def get_apache_error_logs():
     page = int(request.args.get('page', 1))
     limit = min(int(request.args.get('limit', 100)), 1000)  # Max 1000 per page
     
+    # Sorting parameters (default: file order)
+    sort_column = request.args.get('sort') or None
+    descending = request.args.get('order', 'asc').lower() == 'desc'
+    if sort_column and sort_column not in APACHE_ERROR_SORT_COLUMNS:
+        return jsonify({'error': f"Cannot sort by {sort_column}. Use one of {', '.join(APACHE_ERROR_SORT_COLUMNS)}."}), 400
+    
+    try:
+        fields, response_format = get_response_shape('apache-error')
+        cidr_ranges = ip_columns.parse_cidr(request.args.get('cidr'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    render_key = (fields, response_format)
+    render = None
+    if fields or response_format != 'rows':
+        render = lambda entries: columnar.shape_records(entries, fields, response_format, 'apache-error')
+    
+    file_path = get_file_path(filename, 'apache-error')
+    
+    if not file_path:
+        return jsonify({'error': f'File {filename} not found'}), 404
+    
+    try:
+        dataset = get_apache_error_dataset(file_path)
+        
+        if dataset.entries:
+            filters = log_export.filter_key(request.args, 'apache-error')
+            if cidr_ranges:
+                filters += (('cidr', cidr_ranges),)
+            view_key = (filters, sort_column, descending)
+            
+            def build_view(entries):
+                if cidr_ranges:
+                    # Range scan over the packed addresses before the per-entry filters
+                    entries = ip_columns.filter_records(entries, 'client_ip', cidr_ranges,
+                                                        get_client_ip_column(dataset))
+                return filter_and_sort_entries(entries, view_key, log_export.make_filter(request.args, 'apache-error'))
+            
+            logs = dataset.view(view_key, build_view)
+            total_count = len(logs)
+            
+            # Pages, stats and timestamp range are encoded once and stitched together as bytes
+            response_fields = [
+                ('logs', apache_error_pages.get_page(dataset, view_key, logs, page, limit, render_key, render)),
+                ('total_count', page_cache.encode_json(total_count)),
+                ('page', page_cache.encode_json(page)),
+                ('limit', page_cache.encode_json(limit)),
+                ('total_pages', page_cache.encode_json((total_count + limit - 1) // limit)),
+                ('timestamp_range', dataset.encoded('timestamp_range', lambda: dataset.stats.get(
+                    'timestamp_range', {'min': None, 'max': None}))),
+                ('stats', dataset.encoded('stats', lambda: dataset.stats))
+            ]
+            if response_format != 'rows':
+                response_fields.append(('format', page_cache.encode_json(response_format)))
+            response = Response(page_cache.stitch_object(response_fields), mimetype='application/json')
+            # Encode the following pages once the response has been sent
+            response.call_on_close(lambda: apache_error_pages.prefetch(dataset, view_key, logs, page, limit,
+                                                                       render_key, render))
+            return response
+        else:
+            return jsonify({'error': 'No logs found in file'}), 404
+            
+    except admission.AdmissionError as e:
+        return admission_rejected(e)
+    except Exception as e:
+        logging.error(f'Error parsing Apache error log {filename}: {str(e)}')
+        return jsonify({'error': 'An internal server error occurred while parsing the log file.'}), 500
+
+@app.route('/api/apache-error/dashboard')
+def get_apache_error_dashboard():
+    """
+    Get dashboard data for Apache error logs.
+    
+    mode=sample estimates the dashboard from evenly spaced samples of large files
+    within a fixed time budget (see log_sampling); smaller files get the exact result.
+    prefixes= and prefixes6= set the IPv4/IPv6 prefix lengths of the top_subnets rollups.
+    """
+    filename = request.args.get('file')
+    if not filename:
+        return jsonify({'error': 'File parameter is required'}), 400
+    
+    file_path = get_file_path(filename, 'apache-error')
+    
+    if not file_path:
+        return jsonify({'error': f'File {filename} not found'}), 404
+    
+    mode = request.args.get('mode', 'exact')
+    if mode not in DASHBOARD_MODES:
+        return jsonify({'error': f"Unknown mode {mode}. Use {' or '.join(DASHBOARD_MODES)}."}), 400
+    try:
+        prefixes = ip_columns.parse_prefixes(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        if mode == 'sample' and log_sampling.should_sample(file_path):
+            dashboard_data = log_sampling.sample_apache_error_dashboard(file_path, prefixes=prefixes)
+            dashboard_data['filename'] = filename
+            return jsonify(dashboard_data)
+        
+        dataset = get_apache_error_dataset(file_path)
+        
+        if dataset.entries:
+            def build_dashboard():
+                dashboard_data = apache_error_parser.get_dashboard_stats(dataset.entries, get_client_ip_column(dataset),
+                                                                         prefixes)
+                
+                # Add file stats
+                dashboard_data['file_stats'] = dataset.stats
+                dashboard_data['filename'] = filename
+                return dashboard_data
+            
+            body = dataset.encoded(('dashboard', filename, tuple(prefixes.items())), build_dashboard) + b'\n'
+            return Response(body, mimetype='application/json')
+        else:
+            return jsonify({'error': 'No logs found in file'}), 404
+            
+    except admission.AdmissionError as e:
+        return admission_rejected(e)
+    except Exception as e:
+        logging.error(f'Error generating dashboard data for {filename}: {str(e)}')
+        return jsonify({'error': 'An internal server error occurred while generating dashboard data.'}), 500
+
+@app.route('/api/apache-error/export')
+def export_apache_error_logs():
+    """Stream filtered Apache error log entries as NDJSON or CSV without building the full list."""
+    filename = request.args.get('file')
+    if not filename:
+        return jsonify({'error': 'File parameter is required'}), 400
+    
     file_path = get_file_path(filename, 'apache-error')
     
     if not file_path:
         return jsonify({'error': f'File {filename} not found'}), 404
     
+    return export_response(apache_error_parser.iter_apache_error_log(file_path), 'apache-error', filename)
+
+# Apache Access Log API endpoints
+@app.route('/api/apache-access/files')
+def get_apache_access_files():
+    """Get list of available Apache access log files."""
+    files = get_available_apache_access_files()
+    return jsonify({
+        'files': files,
+        'total': len(files)
+    })
+
+@app.route('/api/apache-access/upload', methods=['POST'])
+def upload_apache_access_file():
+    """Handle Apache access log file upload."""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+    
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    
+    if file and allowed_file(file.filename):
+        filename, file_path, timestamp, digest, duplicate = store_upload(file, 'apache-access')
+        
+        # Get file size
+        file_size = os.path.getsize(file_path)
+        
+        return jsonify({
+            'success': True,
+            'filename': filename,
+            'file_size': file_size,
+            'upload_timestamp': timestamp,
+            'sha256': digest,
+            'duplicate': duplicate,
+            'message': f'Apache access log file uploaded successfully as {filename}',
+            'summary': get_upload_summary(file_path, 'apache-access', duplicate)
+        })
+    
+    return jsonify({'error': 'Invalid file type. Only .log and .txt files are allowed.'}), 400
+
+@app.route('/api/apache-access/files/<filename>', methods=['DELETE'])
+def delete_apache_access_file(filename):
+    """Delete specific Apache access log file."""
     try:
-        # The parser returns (entries, stats) tuple
-        logs, stats = apache_error_parser.parse_apache_error_log(file_path)
+        file_path = get_file_path(filename, 'apache-access')
+        if not file_path:
+            return jsonify({'error': f'File {filename} not found'}), 404
+        
+        delete_upload(filename, 'apache-access')
+        return jsonify({
+            'success': True,
+            'message': f'File {filename} deleted successfully'
+        })
+    except Exception as e:
+        logging.error(f'Error deleting file {filename}: {str(e)}')
+        return jsonify({'error': 'An internal server error occurred while deleting the file.'}), 500
+
+@app.route('/api/apache-access/logs')
+def get_apache_access_logs():
+    """Get Apache access logs from specified file with pagination and an optional cidr= client network filter."""
+    filename = request.args.get('file')
+    if not filename:
+        return jsonify({'error': 'File parameter is required'}), 400
+    
+    # Pagination parameters
+    page = int(request.args.get('page', 1))
+    limit = min(int(request.args.get('limit', 100)), 1000)  # Max 1000 per page
+    
+    file_path = get_file_path(filename, 'apache-access')
+    
+    if not file_path:
+        return jsonify({'error': f'File {filename} not found'}), 404
+    
+    try:
+        cidr_ranges = ip_columns.parse_cidr(request.args.get('cidr'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        logs, stats = apache_access_parser.parse_access_log(file_path, request.args.get('log_format'))
+        if 'error' in stats:
+            return jsonify({'error': stats['error']}), 400
         
         if logs:
+            if cidr_ranges:
+                logs = ip_columns.filter_records(logs, 'client_ip', cidr_ranges)
             total_count = len(logs)
             
             # Apply pagination
             start_idx = (page - 1) * limit
             end_idx = start_idx + limit
-            paginated_logs = logs[start_idx:end_idx]
-            
-            # Use timestamp range from parser (calculated during parsing)
-            timestamp_range = stats.get('timestamp_range', {'min': None, 'max': None})
             
             return jsonify({
-                'logs': paginated_logs,
+                'logs': logs[start_idx:end_idx],
                 'total_count': total_count,
                 'page': page,
                 'limit': limit,
                 'total_pages': (total_count + limit - 1) // limit,
-                'timestamp_range': timestamp_range,
+                'timestamp_range': stats['timestamp_range'],
                 'stats': stats
             })
         else:
             return jsonify({'error': 'No logs found in file'}), 404
             
+    except admission.AdmissionError as e:
+        return admission_rejected(e)
     except Exception as e:
-        logging.error(f'Error parsing Apache error log {filename}: {str(e)}')
+        logging.error(f'Error parsing Apache access log {filename}: {str(e)}')
         return jsonify({'error': 'An internal server error occurred while parsing the log file.'}), 500
 
-@app.route('/api/apache-error/dashboard')
-def get_apache_error_dashboard():
-    """Get dashboard data for Apache error logs."""
+@app.route('/api/apache-access/dashboard')
+def get_apache_access_dashboard():
+    """Get dashboard data for Apache access logs."""
     filename = request.args.get('file')
     if not filename:
         return jsonify({'error': 'File parameter is required'}), 400
     
-    file_path = get_file_path(filename, 'apache-error')
+    file_path = get_file_path(filename, 'apache-access')
     
     if not file_path:
         return jsonify({'error': f'File {filename} not found'}), 404
     
     try:
-        # The parser returns (entries, stats) tuple
-        logs, stats = apache_error_parser.parse_apache_error_log(file_path)
-        
-        if logs:
-            dashboard_data = apache_error_parser.get_dashboard_stats(logs)
-            
-            # Add file stats
-            dashboard_data['file_stats'] = stats
-            dashboard_data['filename'] = filename
-            
-            return jsonify(dashboard_data)
-        else:
+        dashboard_data = apache_access_parser.get_dashboard_stats(file_path, request.args.get('log_format'))
+        if 'error' in dashboard_data:
+            return jsonify({'error': dashboard_data['error']}), 400
+        if not dashboard_data['parsed_lines']:
             return jsonify({'error': 'No logs found in file'}), 404
+        
+        dashboard_data['filename'] = filename
+        return jsonify(dashboard_data)
             
     except Exception as e:
         logging.error(f'Error generating dashboard data for {filename}: {str(e)}')
         return jsonify({'error': 'An internal server error occurred while generating dashboard data.'}), 500
 
+# SQLite ingest and ad-hoc query API endpoints
+@app.route('/api/<log_type>/ingest', methods=['POST'])
+def ingest_file(log_type):
+    """Ingest a parsed log file into its indexed SQLite store."""
+    if log_type not in ('modsecurity', 'apache-error'):
+        return jsonify({'error': f'Unknown log type {log_type}'}), 404
+    
+    filename = request.args.get('file')
+    if not filename:
+        return jsonify({'error': 'File parameter is required'}), 400
+    
+    file_path = get_file_path(filename, log_type)
+    if not file_path:
+        return jsonify({'error': f'File {filename} not found'}), 404
+    
+    try:
+        result = ingest_log_file(file_path, log_type)
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify({
+            'success': True,
+            'filename': filename,
+            'rows': result
+        })
+    except Exception as e:
+        logging.error(f'Error ingesting {filename}: {str(e)}')
+        return jsonify({'error': 'An internal server error occurred while ingesting the log file.'}), 500
+
+@app.route('/api/<log_type>/upload-stream', methods=['POST'])
+def upload_stream(log_type):
+    """
+    Receive a log file as the raw request body and parse it while it is written to disk.
+
+    The body is read in chunks, hashed into blob storage and fed to the streaming
+    parser at the same time, so the summary manifest, the optional SQLite store
+    and (for Apache error logs) the cached first page are ready right after the
+    last byte. MAX_CONTENT_LENGTH is enforced while reading.
+
+    Query parameters: filename (required, .log/.txt), ingest (optional)
+    """
+    if log_type not in upload_pipeline.PIPELINE_LOG_TYPES:
+        return jsonify({'error': f'Unknown log type {log_type}'}), 404
+    
+    original_filename = request.args.get('filename', '')
+    if not original_filename:
+        return jsonify({'error': 'filename parameter is required'}), 400
+    if not allowed_file(original_filename):
+        return jsonify({'error': 'Invalid file type. Only .log and .txt files are allowed.'}), 400
+    
+    max_bytes = app.config['MAX_CONTENT_LENGTH']
+    too_large = {'error': f'File size exceeds the {max_bytes // (1024 * 1024)}MB limit.'}
+    if request.content_length is not None and max_bytes is not None and request.content_length > max_bytes:
+        return jsonify(too_large), 413
+    
+    ingest = wants_ingest()
+    keep_records = ingest or log_type == 'apache-error'
+    if not keep_records:
+        return receive_stream_upload(log_type, original_filename, ingest, keep_records=False)
+    
+    # Keeping the parsed records costs as much memory as a full parse. Over budget the
+    # upload is only summarized while it streams in, and ingested from the stored file.
+    upload_size = request.content_length or max_bytes or 0
+    with admission.admit(original_filename, log_type, 'upload', upload_size, streamable=True) as reservation:
+        return receive_stream_upload(log_type, original_filename, ingest, reservation.mode == 'full')
+
+def receive_stream_upload(log_type, original_filename, ingest, keep_records):
+    """Store and parse the body of an upload-stream request; keep_records passes the parsed records on."""
+    max_bytes = app.config['MAX_CONTENT_LENGTH']
+    too_large = {'error': f'File size exceeds the {max_bytes // (1024 * 1024)}MB limit.'}
+    pipeline = upload_pipeline.ParsePipeline(log_type, keep_records=keep_records,
+                                             source=secure_filename(original_filename))
+    try:
+        blob_path, digest, duplicate = blob_store.save_blob(
+            upload_pipeline.LimitedReader(request.stream, max_bytes), get_blob_dir(log_type), on_chunk=pipeline.feed)
+    except (upload_pipeline.UploadTooLarge, RequestEntityTooLarge):
+        pipeline.abort()
+        return jsonify(too_large), 413
+    except Exception as e:
+        pipeline.abort()
+        logging.error(f'Error receiving upload {original_filename}: {str(e)}')
+        return jsonify({'error': 'An internal server error occurred while receiving the upload.'}), 500
+    
+    try:
+        parsed = pipeline.finish()
+    except Exception:
+        parsed = None  # Fall back to parsing the stored file
+    
+    filename, timestamp = name_upload(original_filename, blob_path, duplicate, log_type)
+    labels = {'modsecurity': 'ModSecurity', 'apache-error': 'Apache error'}
+    response = {
+        'success': True,
+        'filename': filename,
+        'file_size': os.path.getsize(blob_path),
+        'upload_timestamp': timestamp,
+        'sha256': digest,
+        'duplicate': duplicate,
+        'message': f'{labels[log_type]} log file uploaded successfully as {filename}',
+        'summary': get_upload_summary(blob_path, log_type, duplicate, parsed and parsed['summary'])
+    }
+    
+    records = parsed['records'] if parsed else None
+    if log_type == 'apache-error' and records is not None:
+        # Warm the page cache so the first page is served without parsing
+        get_apache_error_dataset(blob_path, (records, parsed['stats']))
+    if ingest:
+        response['ingest'] = ingest_upload(blob_path, log_type, duplicate, records)
+    
+    return jsonify(response)
+
+@app.route('/api/query')
+def query_store():
+    """Run a filtered group-by count against an ingested log file."""
+    filename = request.args.get('file')
+    table = request.args.get('table', '')
+    if not filename or not table:
+        return jsonify({'error': 'file and table parameters are required'}), 400
+    if table not in log_store.QUERY_TABLES:
+        return jsonify({'error': f"Unknown table '{table}'"}), 400
+    
+    log_type = log_store.QUERY_TABLES[table]['log_type']
+    file_path = get_file_path(filename, log_type)
+    if not file_path:
+        return jsonify({'error': f'File {filename} not found'}), 404
+    
+    status = log_store.get_store_status(file_path)
+    if not status['ingested']:
+        return jsonify({'error': f'File {filename} has not been ingested'}), 409
+    
+    group_by = [column for column in request.args.get('group_by', '').split(',') if column]
+    reserved = {'file', 'table', 'group_by', 'start', 'end', 'limit'}
+    filters = {key: value for key, value in request.args.items() if key not in reserved}
+    
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    try:
+        result = log_store.run_group_by_query(
+            file_path, table, group_by, filters,
+            start=request.args.get('start'), end=request.args.get('end'), limit=limit
+        )
+        if 'error' in result:
+            return jsonify(result), 400
+        result['filename'] = filename
+        result['stale'] = status['stale']
+        return jsonify(result)
+    except Exception as e:
+        logging.error(f'Error querying {filename}: {str(e)}')
+        return jsonify({'error': 'An internal server error occurred while running the query.'}), 500
+
+# Cross-log correlation API endpoints
+@app.route('/api/correlation')
+def get_correlation():
+    """Link ModSecurity transactions to Apache error entries by client IP and time."""
+    modsec_filename = request.args.get('modsec_file')
+    apache_filename = request.args.get('apache_file')
+    if not modsec_filename or not apache_filename:
+        return jsonify({'error': 'modsec_file and apache_file parameters are required'}), 400
+    
+    try:
+        tolerance = float(request.args.get('tolerance', 2))
+        limit = min(int(request.args.get('limit', 1000)), 1000)  # Max 1000 pairs
+    except ValueError:
+        return jsonify({'error': 'tolerance and limit must be numeric'}), 400
+    if tolerance < 0 or tolerance > 3600:
+        return jsonify({'error': 'tolerance must be between 0 and 3600 seconds'}), 400
+    
+    modsec_path = get_file_path(modsec_filename)
+    if not modsec_path:
+        return jsonify({'error': f'File {modsec_filename} not found'}), 404
+    apache_path = get_file_path(apache_filename, 'apache-error')
+    if not apache_path:
+        return jsonify({'error': f'File {apache_filename} not found'}), 404
+    
+    try:
+        modsec_logs = modsecurity_parser.parse_modsec_log(modsec_path)
+        if isinstance(modsec_logs, dict) and 'error' in modsec_logs:
+            return jsonify(modsec_logs)
+        
+        apache_logs, _ = apache_error_parser.parse_apache_error_log(apache_path)
+        
+        correlation = log_correlation.correlate_logs(modsec_logs, apache_logs, tolerance, max_pairs=limit)
+        correlation['modsec_file'] = modsec_filename
+        correlation['apache_file'] = apache_filename
+        return jsonify(correlation)
+    
+    except admission.AdmissionError as e:
+        return admission_rejected(e)
+    except Exception as e:
+        logging.error(f'Error correlating {modsec_filename} with {apache_filename}: {str(e)}')
+        return jsonify({'error': 'An internal server error occurred while correlating the log files.'}), 500
+
+@app.route('/api/admission')
+def get_admission_status():
+    """Memory budget of the parse admission controller, its current reservations, queue and calibrated factors."""
+    return jsonify(admission.get_snapshot())
+
 @app.route('/')
 def index():
     return render_template('index.html')
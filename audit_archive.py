@@ -0,0 +1,133 @@
+import os
+import shutil
+import logging
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+# Archive types accepted for concurrent-mode audit log uploads
+ARCHIVE_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.zip')
+
+# Limits applied while extracting or copying a dataset
+MAX_DATASET_SIZE_MB = 1024
+MAX_DATASET_FILES = 500000
+
+# Threads used to copy a server-side directory
+COPY_THREADS = 16
+
+
+class DatasetError(Exception):
+    """Raised when an archive or directory cannot be turned into a dataset."""
+
+
+def is_archive(filename: str) -> bool:
+    """Check whether a filename has a supported archive extension."""
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _safe_target(root: str, member_name: str) -> str:
+    """Resolve an archive member path inside root, rejecting absolute and '..' paths."""
+    target = os.path.realpath(os.path.join(root, member_name))
+    if os.path.commonpath([os.path.realpath(root), target]) != os.path.realpath(root):
+        raise DatasetError(f"Archive member escapes the target directory: {member_name}")
+    return target
+
+
+def _check_limits(file_count: int, total_size: int):
+    if file_count > MAX_DATASET_FILES:
+        raise DatasetError(f"Dataset has more than {MAX_DATASET_FILES} files.")
+    if total_size > MAX_DATASET_SIZE_MB * 1024 * 1024:
+        raise DatasetError(f"Dataset exceeds {MAX_DATASET_SIZE_MB}MB uncompressed.")
+
+
+def extract_archive(archive_path: str, target_dir: str) -> Dict:
+    """
+    Extract a tar or zip archive of a concurrent-mode audit log directory.
+
+    Only regular files are extracted; links, devices and members escaping the
+    target directory are rejected. Size and file-count limits are checked
+    against the archive listing before anything is written.
+
+    Args:
+        archive_path (str): Path of the uploaded archive
+        target_dir (str): Directory to extract into (created if missing)
+
+    Returns:
+        Dict: Number of files and bytes extracted
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    file_count = 0
+    total_size = 0
+
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            members = [member for member in archive.infolist() if not member.is_dir()]
+            _check_limits(len(members), sum(member.file_size for member in members))
+            for member in members:
+                target = _safe_target(target_dir, member.filename)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with archive.open(member) as source, open(target, 'wb') as destination:
+                    shutil.copyfileobj(source, destination)
+                file_count += 1
+                total_size += member.file_size
+    elif tarfile.is_tarfile(archive_path):
+        with tarfile.open(archive_path) as archive:
+            members = [member for member in archive.getmembers() if member.isfile()]
+            _check_limits(len(members), sum(member.size for member in members))
+            for member in members:
+                target = _safe_target(target_dir, member.name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with archive.extractfile(member) as source, open(target, 'wb') as destination:
+                    shutil.copyfileobj(source, destination)
+                file_count += 1
+                total_size += member.size
+    else:
+        raise DatasetError("Unsupported archive format. Use .tar, .tar.gz, .tgz or .zip.")
+
+    return {'files': file_count, 'bytes': total_size}
+
+
+def copy_directory(source_dir: str, target_dir: str) -> Dict:
+    """
+    Copy a server-side concurrent-mode audit log directory into the uploads tree.
+
+    Regular files are copied on a thread pool since the work is dominated by
+    opening thousands of small files. Symlinks are skipped.
+
+    Args:
+        source_dir (str): Directory written by SecAuditLogStorageDir
+        target_dir (str): Directory to copy into (created if missing)
+
+    Returns:
+        Dict: Number of files and bytes copied
+    """
+    if not os.path.isdir(source_dir):
+        raise DatasetError(f"Directory not found: {source_dir}")
+
+    copies = []
+    total_size = 0
+    pending = [source_dir]
+    while pending:
+        directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    relative = os.path.relpath(entry.path, source_dir)
+                    copies.append((entry.path, os.path.join(target_dir, relative)))
+                    total_size += entry.stat(follow_symlinks=False).st_size
+        _check_limits(len(copies), total_size)
+
+    def copy_one(paths):
+        source, target = paths
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+
+    os.makedirs(target_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=COPY_THREADS) as pool:
+        list(pool.map(copy_one, copies))
+
+    logging.info(f"Copied {len(copies)} files from {source_dir}")
+    return {'files': len(copies), 'bytes': total_size}
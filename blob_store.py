@@ -0,0 +1,176 @@
+import os
+import hashlib
+import logging
+import tempfile
+from collections import defaultdict
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+# Extension of stored blobs; the alias keeps the name and extension of the upload
+BLOB_EXTENSION = '.log'
+
+# Bytes read from the upload stream per hash/write step
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# Length of a hex SHA-256 digest, the stem of every blob and of its derived files
+DIGEST_LENGTH = 64
+
+
+def save_blob(stream: BinaryIO, blob_dir: str,
+              on_chunk: Optional[Callable[[bytes], None]] = None) -> Tuple[str, str, bool]:
+    """
+    Write an upload stream to content-addressed storage, hashing it on the way.
+
+    The data goes to a temporary file in blob_dir while it is hashed, then is
+    renamed to <sha256>.log. If a blob with the same digest already exists the
+    temporary file is dropped and the existing blob is returned.
+
+    Args:
+        stream (BinaryIO): Upload stream to read
+        blob_dir (str): Directory holding the blobs of one log type
+        on_chunk (Callable): Called with each chunk after it was written (e.g. to parse it meanwhile)
+
+    Returns:
+        Tuple[str, str, bool]: (blob path, hex digest, True if the content was already stored)
+    """
+    os.makedirs(blob_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=blob_dir, suffix='.upload')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(HASH_CHUNK_BYTES)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk)
+
+        blob_path = os.path.join(blob_dir, digest.hexdigest() + BLOB_EXTENSION)
+        if os.path.exists(blob_path):
+            os.remove(tmp_path)
+            return blob_path, digest.hexdigest(), True
+        os.replace(tmp_path, blob_path)
+        return blob_path, digest.hexdigest(), False
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def is_alias(path: str) -> bool:
+    """Check whether an upload path is an alias (symlink) of a blob."""
+    return os.path.islink(path)
+
+
+def resolve(path: str) -> str:
+    """Return the blob an alias points to, or the path itself for plain files."""
+    if not os.path.islink(path):
+        return path
+    return os.path.normpath(os.path.join(os.path.dirname(path), os.readlink(path)))
+
+
+def create_alias(alias_path: str, blob_path: str):
+    """Point a new upload name at a blob with a relative symlink."""
+    os.symlink(os.path.relpath(blob_path, os.path.dirname(alias_path)), alias_path)
+
+
+def touch_alias(alias_path: str):
+    """Mark an alias as uploaded now, without touching the blob (its caches are keyed on its mtime)."""
+    try:
+        os.utime(alias_path, follow_symlinks=False)
+    except (NotImplementedError, OSError) as e:
+        logging.debug(f"Unable to touch alias {alias_path}: {str(e)}")
+
+
+def alias_index(folders: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Map each blob to the aliases pointing at it.
+
+    Args:
+        folders (Iterable[str]): Upload folders holding aliases
+
+    Returns:
+        Dict[str, List[str]]: Blob path -> alias paths
+    """
+    index = defaultdict(list)
+    for folder in folders:
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_symlink():
+                        index[resolve(entry.path)].append(entry.path)
+        except OSError as e:
+            logging.warning(f"Unable to scan {folder}: {str(e)}")
+    return index
+
+
+def find_alias(folder: str, blob_path: str, name_pattern: Optional[Pattern[str]] = None) -> Optional[str]:
+    """Return an existing alias of a blob in an upload folder, if any (only names matching name_pattern if given)."""
+    aliases = alias_index([folder]).get(os.path.normpath(blob_path), [])
+    if name_pattern is not None:
+        aliases = [alias for alias in aliases if name_pattern.fullmatch(os.path.basename(alias))]
+    return min(aliases) if aliases else None
+
+
+def is_blob_file(path: str) -> bool:
+    """Check whether a path names a blob itself rather than one of its derived files."""
+    name = os.path.basename(path)
+    return len(name) == DIGEST_LENGTH + len(BLOB_EXTENSION) and name.endswith(BLOB_EXTENSION)
+
+
+def group_blob_files(files: Iterable[Tuple[str, float, int]]) -> List[Tuple[str, float, int]]:
+    """
+    Group tracked files of a blob directory by blob.
+
+    Derived files (summary manifests, SQLite stores) are named after their blob,
+    so each blob is reported once with the size of everything stored for it.
+
+    Args:
+        files: (path, mtime, size) tuples of the files in a blob directory
+
+    Returns:
+        List[Tuple[str, float, int]]: (blob path, blob mtime, total size) per blob
+    """
+    blobs = {}
+    sizes = defaultdict(int)
+    for path, mtime, size in files:
+        stem = os.path.basename(path)[:DIGEST_LENGTH]
+        sizes[stem] += size
+        if is_blob_file(path):
+            blobs[stem] = (path, mtime)
+    return [(path, mtime, sizes[stem]) for stem, (path, mtime) in blobs.items()]
+
+
+def derived_files(blob_path: str) -> List[str]:
+    """Files stored next to a blob and named after it (manifests, stores and their journals)."""
+    directory = os.path.dirname(blob_path)
+    prefix = os.path.basename(blob_path) + '.'
+    try:
+        with os.scandir(directory) as entries:
+            return [entry.path for entry in entries if entry.name.startswith(prefix)]
+    except OSError:
+        return []
+
+
+def remove_blob(blob_path: str, aliases: Iterable[str] = ()) -> List[str]:
+    """
+    Delete a blob, its derived files and the aliases pointing at it.
+
+    Returns:
+        List[str]: Paths of the removed blob and derived files
+    """
+    for alias_path in aliases:
+        try:
+            os.remove(alias_path)
+        except FileNotFoundError:
+            pass
+
+    removed = []
+    for path in derived_files(blob_path) + [blob_path]:
+        try:
+            os.remove(path)
+            removed.append(path)
+        except FileNotFoundError:
+            pass
+    return removed
@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Record fields that can be requested with fields=
+LOG_FIELDS = {
+    'modsecurity': ('id', 'timestamp', 'display_timestamp', 'source_ip', 'source_port', 'destination_port',
+                    'request_line', 'response_status', 'messages', 'raw_messages', 'rule_hits', 'stopwatch',
+                    'sections', 'section_count', 'section_list'),
+    'apache-error': ('timestamp', 'severity', 'module', 'pid', 'tid', 'client_ip', 'client_port', 'error_code',
+                     'message', 'file_reference', 'line_reference', 'raw_line', 'parse_confidence', 'line_count')
+}
+
+# Shapes of the logs list: an array of objects, or one array per column
+RESPONSE_FORMATS = ('rows', 'columnar')
+
+# String columns with at most this share of distinct values are dictionary-encoded
+DICTIONARY_MAX_RATIO = 0.5
+
+
+def parse_fields(value: Optional[str], log_type: str) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a comma-separated fields= parameter.
+
+    Args:
+        value (Optional[str]): Parameter value; empty means all fields
+        log_type (str): 'modsecurity' or 'apache-error'
+
+    Returns:
+        Optional[Tuple[str, ...]]: Requested fields in order, or None for all fields
+
+    Raises:
+        ValueError: If a field is not in LOG_FIELDS for the log type
+    """
+    if not value:
+        return None
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in LOG_FIELDS[log_type]]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Use any of {', '.join(LOG_FIELDS[log_type])}.")
+    return fields or None
+
+
+def project_records(records: Sequence[Dict], fields: Optional[Sequence[str]]) -> List[Dict]:
+    """Keep only the given fields of each record (missing fields become None)."""
+    if not fields:
+        return list(records)
+    return [{field: record.get(field) for field in fields} for record in records]
+
+
+def _encode_column(values: List) -> object:
+    """
+    Dictionary-encode a column of repetitive strings (or lists of strings),
+    otherwise return the values as they are.
+    """
+    dictionary = {}
+    total = 0
+    for value in values:
+        items = value if isinstance(value, list) else (value,)
+        for item in items:
+            if item is not None and not isinstance(item, str):
+                return values
+            total += 1
+            if item not in dictionary:
+                dictionary[item] = len(dictionary)
+    if not dictionary or len(dictionary) > total * DICTIONARY_MAX_RATIO:
+        return values
+    codes = [[dictionary[item] for item in value] if isinstance(value, list) else dictionary[value]
+             for value in values]
+    return {'dictionary': list(dictionary), 'codes': codes}
+
+
+def to_columnar(records: Sequence[Dict], fields: Sequence[str]) -> Dict:
+    """
+    Transpose records into one array per field.
+
+    String columns with few distinct values (severities, modules, client IPs,
+    status lines) are sent as {"dictionary": [...], "codes": [...]}, so each
+    distinct value is encoded once and rows carry a small integer. Columns of
+    string lists (ModSecurity messages) share one dictionary for their items
+    and carry a list of codes per row.
+
+    Args:
+        records (Sequence[Dict]): Records to transpose
+        fields (Sequence[str]): Fields to include, in order
+
+    Returns:
+        Dict: {"fields": [...], "count": n, "columns": {field: values or dictionary-encoded column}}
+    """
+    columns = {field: _encode_column([record.get(field) for record in records]) for field in fields}
+    return {'fields': list(fields), 'count': len(records), 'columns': columns}
+
+
+def shape_records(records: Sequence[Dict], fields: Optional[Sequence[str]], response_format: str,
+                  log_type: str) -> object:
+    """Apply a fields= projection and format= shape to a list of records."""
+    if response_format == 'columnar':
+        return to_columnar(records, fields or LOG_FIELDS[log_type])
+    return project_records(records, fields) if fields else records
@@ -0,0 +1,270 @@
+import socket
+import ipaddress
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Prefixes the dashboards roll client addresses up to, per address family
+DEFAULT_PREFIXES = {4: (24, 16), 6: (64, 48)}
+
+# Subnets listed per rollup
+ROLLUP_TOP_N = 10
+
+# Networks a cidr= filter may combine
+MAX_FILTER_NETWORKS = 32
+
+_FAMILY_BITS = {4: 32, 6: 128}
+_LOW_MASK = (1 << 64) - 1
+
+
+def parse_address(text: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Parse an address string into (family, integer value).
+
+    Only plain dotted-quad IPv4 and standard IPv6 notation are accepted.
+    IPv4-mapped IPv6 addresses count as IPv4.
+
+    Returns:
+        Optional[Tuple[int, int]]: (4 or 6, value), or None for empty/'N/A'/unparseable text
+    """
+    if not text or text == 'N/A':
+        return None
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, text), 'big')
+    except OSError:
+        pass
+    try:
+        value = int.from_bytes(socket.inet_pton(socket.AF_INET6, text.strip('[]').split('%', 1)[0]), 'big')
+    except (OSError, ValueError):
+        return None
+    if value >> 32 == 0xFFFF:
+        return 4, value & 0xFFFFFFFF
+    return 6, value
+
+
+def format_subnet(family: int, network: int, prefix: int) -> str:
+    """Format the network part of a rolled-up address (value >> host bits) as 'a.b.c.0/24'."""
+    host_bits = _FAMILY_BITS[family] - prefix
+    if family == 4:
+        return f"{ipaddress.IPv4Address(network << host_bits)}/{prefix}"
+    return f"{ipaddress.IPv6Address(network << host_bits)}/{prefix}"
+
+
+def parse_cidr(value: Optional[str]) -> Optional[Tuple[Tuple[int, int, int], ...]]:
+    """
+    Parse a comma-separated cidr= parameter into integer ranges.
+
+    A bare address is its own /32 (or /128) network; host bits are ignored,
+    so 10.1.2.3/24 means 10.1.2.0/24.
+
+    Returns:
+        Optional[Tuple]: (family, first value, last value) per network, or None for an empty value
+
+    Raises:
+        ValueError: If a network does not parse or there are too many
+    """
+    if not value:
+        return None
+    ranges = []
+    for item in dict.fromkeys(item.strip() for item in value.split(',') if item.strip()):
+        try:
+            network = ipaddress.ip_network(item, strict=False)
+        except ValueError:
+            raise ValueError(f"Invalid CIDR network: {item}")
+        ranges.append((network.version, int(network.network_address), int(network.broadcast_address)))
+    if len(ranges) > MAX_FILTER_NETWORKS:
+        raise ValueError(f"At most {MAX_FILTER_NETWORKS} CIDR networks can be combined")
+    return tuple(ranges) or None
+
+
+def parse_prefixes(args: Mapping) -> Dict[int, Tuple[int, ...]]:
+    """
+    Read the rollup prefixes of a dashboard request.
+
+    Args:
+        args (Mapping): Request arguments; prefixes= and prefixes6= are comma-separated
+            prefix lengths for IPv4 and IPv6 (defaults: DEFAULT_PREFIXES)
+
+    Returns:
+        Dict[int, Tuple[int, ...]]: Prefix lengths per family
+
+    Raises:
+        ValueError: For prefix lengths that are not numbers in range
+    """
+    prefixes = {}
+    for family, name in ((4, 'prefixes'), (6, 'prefixes6')):
+        value = args.get(name)
+        if not value:
+            prefixes[family] = DEFAULT_PREFIXES[family]
+            continue
+        lengths = []
+        for item in value.split(','):
+            item = item.strip()
+            if not item.isdigit() or not 0 < int(item) <= _FAMILY_BITS[family]:
+                raise ValueError(f"Invalid {name} value {item!r}: use prefix lengths from 1 to {_FAMILY_BITS[family]}")
+            lengths.append(int(item))
+        prefixes[family] = tuple(dict.fromkeys(lengths))
+    return prefixes
+
+
+class IpColumn:
+    """
+    Client addresses of a list of records as packed integer columns.
+
+    IPv4 addresses are kept in an array of 32-bit values, IPv6 addresses as
+    pairs of 64-bit halves, each sorted by address with a parallel array of
+    row numbers. That makes a CIDR filter two binary searches over the values
+    (an integer range scan) and a subnet rollup a shift of every value, instead
+    of string work per record.
+    """
+
+    def __init__(self, values: Iterable[Optional[str]], weights: Optional[Iterable[int]] = None):
+        """
+        Parse every address once.
+
+        Args:
+            values (Iterable[Optional[str]]): Address per row; rows that do not parse are left out
+            weights (Iterable[int]): Count per row for rollups (e.g. addresses with their hit counts);
+                every row counts once by default
+        """
+        parsed = {}
+        v4, v6 = [], []
+        weight_list = list(weights) if weights is not None else None
+        self.weighted = weight_list is not None
+        self.rows = 0
+        for row, value in enumerate(values):
+            self.rows += 1
+            if value not in parsed:
+                parsed[value] = parse_address(value)
+            address = parsed[value]
+            if address is None:
+                continue
+            if address[0] == 4:
+                # Value and row packed into one int sort faster than (value, row) tuples
+                v4.append((address[1] << 32) | row)
+            else:
+                v6.append((address[1], row))
+
+        v4.sort()
+        v6.sort()
+        self.v4_values = array('I', (key >> 32 for key in v4))
+        self.v4_rows = array('I', (key & 0xFFFFFFFF for key in v4))
+        self.v6_high = array('Q', (value >> 64 for value, _ in v6))
+        self.v6_low = array('Q', (value & _LOW_MASK for value, _ in v6))
+        self.v6_rows = array('I', (row for _, row in v6))
+        self.v4_weights = array('I', (weight_list[row] for row in self.v4_rows)) if self.weighted else None
+        self.v6_weights = array('I', (weight_list[row] for row in self.v6_rows)) if self.weighted else None
+        self._distinct = {}
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict], field: str) -> 'IpColumn':
+        """
+        Build the column of one field of a list of records.
+
+        Equal address strings in the records are replaced by one shared string
+        object, so a log with few distinct clients keeps one string per client
+        instead of one per record.
+        """
+        shared = {}
+        for record in records:
+            value = record.get(field)
+            if isinstance(value, str):
+                record[field] = shared.setdefault(value, value)
+        return cls(record.get(field) for record in records)
+
+    @classmethod
+    def from_counts(cls, counts: Mapping[str, int]) -> 'IpColumn':
+        """Build a weighted column from address -> count (e.g. a Counter of hits per address)."""
+        return cls(counts.keys(), counts.values())
+
+    def _v6_value(self, index: int) -> int:
+        return (self.v6_high[index] << 64) | self.v6_low[index]
+
+    def _distinct_values(self, family: int) -> List[int]:
+        """Distinct addresses of a family, computed once for all prefixes."""
+        if family not in self._distinct:
+            if family == 4:
+                self._distinct[family] = list(set(self.v4_values))
+            else:
+                self._distinct[family] = list(set(map(self._v6_value, range(len(self.v6_rows)))))
+        return self._distinct[family]
+
+    def rows_in(self, ranges: Iterable[Tuple[int, int, int]]) -> List[int]:
+        """
+        Row numbers whose address lies in any of the ranges, in row order.
+
+        Args:
+            ranges: (family, first value, last value) tuples from parse_cidr
+        """
+        selected = set()
+        for family, first, last in ranges:
+            if family == 4:
+                start = bisect_left(self.v4_values, first)
+                end = bisect_right(self.v4_values, last)
+                selected.update(self.v4_rows[start:end])
+            else:
+                positions = range(len(self.v6_rows))
+                start = bisect_left(positions, first, key=self._v6_value)
+                end = bisect_right(positions, last, key=self._v6_value)
+                selected.update(self.v6_rows[start:end])
+        return sorted(selected)
+
+    def rollup(self, family: int, prefix: int, limit: Optional[int] = ROLLUP_TOP_N) -> List[Dict]:
+        """
+        Rows and distinct addresses per subnet of one prefix length, busiest subnets first.
+
+        Returns:
+            List[Dict]: [{'subnet': '203.0.113.0/24', 'count': rows, 'addresses': distinct addresses}]
+        """
+        shift = _FAMILY_BITS[family] - prefix
+        if family == 4:
+            networks = list(map(shift.__rrshift__, self.v4_values))
+            weights = self.v4_weights
+        else:
+            networks = [self._v6_value(index) >> shift for index in range(len(self.v6_rows))]
+            weights = self.v6_weights
+
+        if weights is None:
+            counts = Counter(networks)
+        else:
+            counts = Counter()
+            for network, weight in zip(networks, weights):
+                counts[network] += weight
+
+        addresses = Counter(map(shift.__rrshift__, self._distinct_values(family)))
+
+        return [{'subnet': format_subnet(family, network, prefix), 'count': count, 'addresses': addresses[network]}
+                for network, count in counts.most_common(limit)]
+
+    def rollups(self, prefixes: Optional[Mapping[int, Sequence[int]]] = None,
+                limit: Optional[int] = ROLLUP_TOP_N) -> List[Dict]:
+        """
+        Subnet rollups for every requested prefix of the families present.
+
+        Returns:
+            List[Dict]: [{'family': 4, 'prefix': 24, 'subnets': [...]}] in the order of the prefixes
+        """
+        prefixes = prefixes or DEFAULT_PREFIXES
+        result = []
+        for family, present in ((4, len(self.v4_rows)), (6, len(self.v6_rows))):
+            if not present:
+                continue
+            for prefix in prefixes.get(family, ()):
+                result.append({'family': family, 'prefix': prefix, 'subnets': self.rollup(family, prefix, limit)})
+        return result
+
+
+def filter_records(records: Sequence[Dict], field: str, ranges: Iterable[Tuple[int, int, int]],
+                   column: Optional[IpColumn] = None) -> List[Dict]:
+    """
+    Records whose address field lies in any of the ranges, in their original order.
+
+    Args:
+        records (Sequence[Dict]): Records to filter
+        field (str): Address field ('source_ip', 'client_ip')
+        ranges: (family, first value, last value) tuples from parse_cidr
+        column (Optional[IpColumn]): Column already built from the records and field
+    """
+    column = column or IpColumn.from_records(records, field)
+    return [records[row] for row in column.rows_in(ranges)]
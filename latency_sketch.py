@@ -0,0 +1,117 @@
+import math
+from typing import Dict, Iterable, Optional
+
+# Relative accuracy of quantile estimates (1% of the true value)
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# Upper bound on buckets per sketch; the lowest buckets are collapsed beyond it
+DEFAULT_MAX_BUCKETS = 2048
+
+
+class QuantileSketch:
+    """
+    DDSketch-style mergeable quantile sketch for positive latency values.
+
+    Values are counted in logarithmically sized buckets, so every quantile
+    estimate is within the relative accuracy of the true value and memory is
+    bounded by the number of buckets, not by the number of values added.
+    Two sketches with the same accuracy merge by adding their bucket counts.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 max_buckets: int = DEFAULT_MAX_BUCKETS):
+        """Initialize an empty sketch."""
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.total = 0.0
+
+    def add(self, value: float):
+        """Add a single non-negative value."""
+        if value < 0:
+            return
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value == 0:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+
+    def update(self, values: Iterable[float]):
+        """Add several values."""
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'QuantileSketch'):
+        """Fold another sketch with the same relative accuracy into this one."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy.")
+        for index, bucket_count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + bucket_count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        """Fold the lowest buckets into one so the sketch stays within max_buckets."""
+        indexes = sorted(self._buckets)
+        excess = len(indexes) - self.max_buckets + 1
+        target = indexes[excess]
+        self._buckets[target] += sum(self._buckets.pop(index) for index in indexes[:excess])
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate the value at quantile q (0 <= q <= 1).
+
+        Returns:
+            Optional[float]: The estimate, or None if the sketch is empty
+        """
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen > rank:
+                estimate = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def to_dict(self, quantiles: Iterable[float] = (0.5, 0.95, 0.99), scale: float = 1.0) -> Dict:
+        """
+        Summarize the sketch for JSON output.
+
+        Args:
+            quantiles: Quantiles to report as p50/p95/p99-style keys
+            scale: Divisor applied to every reported value (e.g. 1000 for microseconds to ms)
+        """
+        def scaled(value):
+            return round(value / scale, 3) if value is not None else None
+
+        summary = {'count': self.count}
+        for q in quantiles:
+            summary[f"p{q * 100:g}"] = scaled(self.quantile(q))
+        summary['mean'] = scaled(self.total / self.count) if self.count else None
+        summary['max'] = scaled(self.max)
+        return summary
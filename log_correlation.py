@@ -0,0 +1,140 @@
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Naive epoch used to turn the parsers' naive ISO timestamps into seconds
+# without involving the local timezone
+EPOCH = datetime(1970, 1, 1)
+
+# Fields copied from each side into a correlated pair
+MODSEC_PAIR_FIELDS = ('id', 'timestamp', 'display_timestamp', 'source_ip', 'source_port',
+                      'request_line', 'response_status', 'messages')
+APACHE_PAIR_FIELDS = ('timestamp', 'severity', 'module', 'pid', 'client_ip', 'client_port',
+                      'error_code', 'message')
+
+
+def iso_to_seconds(iso_timestamp: Optional[str]) -> Optional[float]:
+    """Convert a naive ISO timestamp produced by the parsers to seconds since EPOCH."""
+    if not iso_timestamp:
+        return None
+    try:
+        dt = datetime.fromisoformat(iso_timestamp)
+    except (ValueError, TypeError):
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.replace(tzinfo=None)
+    return (dt - EPOCH).total_seconds()
+
+
+def build_ip_time_index(entries: List[Dict], ip_field: str = 'client_ip') -> Dict[str, Tuple[List[float], List[int]]]:
+    """
+    Build a per-IP index of entry timestamps sorted ascending.
+
+    Args:
+        entries (List[Dict]): Parsed log entries
+        ip_field (str): Name of the field holding the client IP
+
+    Returns:
+        Dict: {ip: (sorted_seconds, entry_indexes)} with both lists aligned
+    """
+    buckets = {}
+    for index, entry in enumerate(entries):
+        ip = entry.get(ip_field)
+        if not ip or ip == 'N/A':
+            continue
+        seconds = iso_to_seconds(entry.get('timestamp'))
+        if seconds is None:
+            continue
+        buckets.setdefault(ip, []).append((seconds, index))
+
+    index = {}
+    for ip, items in buckets.items():
+        items.sort()
+        index[ip] = ([seconds for seconds, _ in items], [i for _, i in items])
+    return index
+
+
+def correlate_logs(modsec_logs: List[Dict], apache_logs: List[Dict], tolerance_seconds: float = 2.0,
+                   max_pairs: Optional[int] = None) -> Dict:
+    """
+    Join ModSecurity transactions with Apache error entries on client IP within a time tolerance.
+
+    Apache entries are indexed per IP by sorted timestamp, so each transaction is matched
+    with two binary searches instead of a scan over the other log.
+
+    Args:
+        modsec_logs (List[Dict]): Parsed ModSecurity transactions
+        apache_logs (List[Dict]): Parsed Apache error entries
+        tolerance_seconds (float): Maximum allowed time difference between linked entries
+        max_pairs (Optional[int]): Maximum number of pairs to return (aggregates always cover all pairs)
+
+    Returns:
+        Dict: Linked pairs and aggregate counts
+    """
+    apache_index = build_ip_time_index(apache_logs, 'client_ip')
+
+    pairs = []
+    total_pairs = 0
+    matched_transactions = 0
+    matched_apache = set()
+    pairs_by_ip = Counter()
+    pairs_by_severity = Counter()
+    pairs_by_status = Counter()
+    pairs_by_module = Counter()
+
+    for transaction in modsec_logs:
+        ip = transaction.get('source_ip')
+        times_and_indexes = apache_index.get(ip)
+        if not times_and_indexes:
+            continue
+        seconds = iso_to_seconds(transaction.get('timestamp'))
+        if seconds is None:
+            continue
+
+        times, indexes = times_and_indexes
+        lo = bisect_left(times, seconds - tolerance_seconds)
+        hi = bisect_right(times, seconds + tolerance_seconds)
+        if lo >= hi:
+            continue
+
+        matched_transactions += 1
+        status_match = re.search(r'(\d{3})', transaction.get('response_status') or '')
+        status_code = status_match.group(1) if status_match else 'N/A'
+
+        for position in range(lo, hi):
+            apache_entry = apache_logs[indexes[position]]
+            matched_apache.add(indexes[position])
+            total_pairs += 1
+            pairs_by_ip[ip] += 1
+            pairs_by_severity[apache_entry.get('severity') or 'unknown'] += 1
+            pairs_by_module[apache_entry.get('module') or 'unknown'] += 1
+            pairs_by_status[status_code] += 1
+
+            if max_pairs is None or len(pairs) < max_pairs:
+                pairs.append({
+                    'client_ip': ip,
+                    'delta_seconds': round(times[position] - seconds, 3),
+                    'modsecurity': {field: transaction.get(field) for field in MODSEC_PAIR_FIELDS},
+                    'apache_error': {field: apache_entry.get(field) for field in APACHE_PAIR_FIELDS}
+                })
+
+    return {
+        'pairs': pairs,
+        'summary': {
+            'tolerance_seconds': tolerance_seconds,
+            'total_pairs': total_pairs,
+            'returned_pairs': len(pairs),
+            'modsecurity_transactions': len(modsec_logs),
+            'apache_entries': len(apache_logs),
+            'matched_transactions': matched_transactions,
+            'unmatched_transactions': len(modsec_logs) - matched_transactions,
+            'matched_apache_entries': len(matched_apache),
+            'unmatched_apache_entries': len(apache_logs) - len(matched_apache),
+            'top_ips': dict(pairs_by_ip.most_common(10)),
+            'severity_counts': dict(pairs_by_severity),
+            'status_counts': dict(pairs_by_status),
+            'module_counts': dict(pairs_by_module)
+        }
+    }
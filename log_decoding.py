@@ -0,0 +1,80 @@
+from typing import Optional
+
+# Error handlers accepted for bytes that are not valid UTF-8. 'surrogateescape' keeps
+# every invalid byte as a lone surrogate, so recover_bytes() returns the exact original
+# bytes; 'ignore' drops them (the historical behaviour) and 'strict' rejects the file.
+DECODE_ERROR_POLICIES = ('surrogateescape', 'backslashreplace', 'replace', 'ignore', 'strict')
+DEFAULT_DECODE_ERRORS = 'surrogateescape'
+
+_decode_errors = DEFAULT_DECODE_ERRORS
+
+# Month abbreviations of CLF-style timestamps such as [10/Oct/2000:13:55:36 -0700]
+MONTHS = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+          'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
+
+
+def set_decode_errors(policy: str):
+    """
+    Select the error handler used when log bytes are decoded.
+
+    Args:
+        policy (str): One of DECODE_ERROR_POLICIES
+    """
+    global _decode_errors
+    if policy not in DECODE_ERROR_POLICIES:
+        raise ValueError(f"Unknown decode error policy: {policy}. Use one of {', '.join(DECODE_ERROR_POLICIES)}.")
+    _decode_errors = policy
+
+
+def get_decode_errors() -> str:
+    """Return the error handler currently used when log bytes are decoded."""
+    return _decode_errors
+
+
+def decode_bytes(data, errors: Optional[str] = None) -> str:
+    """Decode UTF-8 log bytes (or a memoryview of them) with the configured (or given) error policy."""
+    return str(data, 'utf-8', errors or _decode_errors)
+
+
+def recover_bytes(text: str) -> bytes:
+    """
+    Return the original bytes of a decoded field.
+
+    Exact for text decoded with 'surrogateescape'; for the other policies the
+    invalid bytes were already replaced or dropped and cannot be restored.
+    """
+    return text.encode('utf-8', 'surrogateescape')
+
+
+def storable_text(text: Optional[str]) -> Optional[str]:
+    """
+    Make decoded text safe for UTF-8-only sinks such as SQLite.
+
+    Escaped invalid bytes are rendered as \\xNN; valid text is returned unchanged.
+    """
+    if not text or text.isascii():
+        return text
+    try:
+        text.encode('utf-8')
+        return text
+    except UnicodeEncodeError:
+        return recover_bytes(text).decode('utf-8', 'backslashreplace')
+
+
+def translate_newlines(data: bytes) -> bytes:
+    """Translate CRLF and lone CR line endings to LF, like universal-newline text mode."""
+    if b'\r' in data:
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return data
+
+
+def read_text(file_path: str, errors: Optional[str] = None) -> str:
+    """Read and decode a whole (small) file with the configured error policy."""
+    with open(file_path, 'rb') as f:
+        return decode_bytes(translate_newlines(f.read()), errors)
+
+
+def read_bytes(file_path: str) -> bytes:
+    """Read a whole (small) file with line endings translated to LF, without decoding it."""
+    with open(file_path, 'rb') as f:
+        return translate_newlines(f.read())
@@ -0,0 +1,162 @@
+import io
+import csv
+import json
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, Mapping
+
+from log_decoding import storable_text
+
+# Export formats and their content types
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Columns the list views filter on with a case-insensitive substring match
+FILTER_COLUMNS = {
+    'modsecurity': ('id', 'source_ip', 'source_port', 'destination_port', 'request_line',
+                    'response_status', 'messages'),
+    'apache-error': ('module', 'pid', 'client_ip', 'client_port', 'error_code', 'message')
+}
+
+# Columns written to CSV exports; NDJSON exports carry the full record
+CSV_COLUMNS = {
+    'modsecurity': ('id', 'timestamp', 'source_ip', 'source_port', 'destination_port', 'request_line',
+                    'response_status', 'rule_ids', 'messages'),
+    'apache-error': ('timestamp', 'severity', 'module', 'pid', 'tid', 'client_ip', 'client_port',
+                     'error_code', 'message', 'file_reference', 'line_reference', 'line_count')
+}
+
+# Rows are buffered into chunks of about this size before being sent
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _filter_text(record: Dict, column: str) -> str:
+    value = record.get(column)
+    if column == 'messages':
+        return ' '.join(value or []).lower()
+    return str(value if value is not None else '').lower()
+
+
+def make_filter(args: Mapping, log_type: str) -> Callable[[Dict], bool]:
+    """
+    Build a record predicate from the same filters the list views offer.
+
+    Args:
+        args (Mapping): Request arguments. Supported keys:
+            start, end: ISO timestamp bounds, inclusive at their own precision
+                (end=2025-07-28 keeps the whole day)
+            <column>: case-insensitive substring match on a FILTER_COLUMNS column
+            severity: exact severity (Apache error logs)
+            exclude_status: comma-separated status codes to drop (ModSecurity)
+        log_type (str): 'modsecurity' or 'apache-error'
+
+    Returns:
+        Callable: Function returning True for records that pass every filter
+    """
+    start = args.get('start') or None
+    end = args.get('end') or None
+    substrings = {column: args[column].lower() for column in FILTER_COLUMNS[log_type] if args.get(column)}
+    severity = (args.get('severity') or '').lower() if log_type == 'apache-error' else ''
+    excluded_statuses = set()
+    if log_type == 'modsecurity':
+        excluded_statuses = {status.strip() for status in (args.get('exclude_status') or '').split(',')
+                             if status.strip()}
+
+    def matches(record: Dict) -> bool:
+        if start or end:
+            timestamp = record.get('timestamp')
+            if not timestamp:
+                return False
+            if start and timestamp[:len(start)] < start:
+                return False
+            if end and timestamp[:len(end)] > end:
+                return False
+        if severity and (record.get('severity') or '').lower() != severity:
+            return False
+        if excluded_statuses:
+            status = record.get('response_status') or ''
+            if any(code in status for code in excluded_statuses):
+                return False
+        for column, needle in substrings.items():
+            if needle not in _filter_text(record, column):
+                return False
+        return True
+
+    return matches
+
+
+def filter_key(args: Mapping, log_type: str) -> tuple:
+    """Canonical (name, value) pairs of the filters make_filter() applies, for use as a cache key."""
+    names = ('start', 'end') + FILTER_COLUMNS[log_type]
+    names += ('severity',) if log_type == 'apache-error' else ('exclude_status',)
+    return tuple((name, args[name]) for name in names if args.get(name))
+
+
+def _csv_row(record: Dict, log_type: str) -> list:
+    row = []
+    for column in CSV_COLUMNS[log_type]:
+        if column == 'rule_ids':
+            value = ','.join(rule['id'] for rule in record.get('rule_hits', []))
+        elif column == 'messages':
+            value = ' | '.join(record.get('messages') or [])
+        else:
+            value = record.get(column)
+        row.append('' if value is None else value)
+    return row
+
+
+def _encode(text: str) -> bytes:
+    try:
+        return text.encode('utf-8')
+    except UnicodeEncodeError:
+        # Invalid bytes kept by the decode policy are written as \xNN
+        return storable_text(text).encode('utf-8')
+
+
+def stream_export(records: Iterable[Dict], export_format: str, log_type: str,
+                  compress: bool = False) -> Iterator[bytes]:
+    """
+    Serialize records as NDJSON or CSV in bounded chunks, optionally gzip-compressed.
+
+    Records are consumed one at a time and only the current chunk is buffered, so
+    memory use does not depend on the number of records.
+
+    Args:
+        records (Iterable[Dict]): Records to export, typically a filtered parser stream
+        export_format (str): 'ndjson' or 'csv'
+        log_type (str): 'modsecurity' or 'apache-error' (selects the CSV columns)
+        compress (bool): Emit a gzip stream instead of plain text
+
+    Returns:
+        Iterator[bytes]: Chunks of the export body
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # 31: gzip container
+    buffer = io.StringIO()
+
+    if export_format == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS[log_type])
+        write = lambda record: writer.writerow(_csv_row(record, log_type))
+    else:
+        dumps = json.JSONEncoder(separators=(',', ':')).encode
+        write = lambda record: buffer.write(dumps(record) + '\n')
+
+    def take_chunk() -> bytes:
+        chunk = _encode(buffer.getvalue())
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(chunk) if compressor else chunk
+
+    for record in records:
+        write(record)
+        if buffer.tell() >= STREAM_CHUNK_BYTES:
+            chunk = take_chunk()
+            if chunk:
+                yield chunk
+
+    chunk = take_chunk()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
@@ -0,0 +1,214 @@
+import mmap
+import logging
+from itertools import accumulate
+from typing import Iterator, List, Optional, Pattern, Tuple
+
+from log_decoding import decode_bytes, translate_newlines
+
+# Size of the line-aligned blocks handed to the parsers
+READ_BLOCK_BYTES = 8 * 1024 * 1024
+
+# Default size of the newline-aligned ranges parsed in parallel
+CHUNK_SIZE_BYTES = 8 * 1024 * 1024
+
+# The sparse line index records the offset of every Nth line
+LINE_INDEX_INTERVAL = 1000
+
+
+class MappedLogFile:
+    """
+    Read-only memory map of a log file with random access helpers.
+
+    Blocks and chunks are always cut after a newline, so they never split a
+    line (or a multi-byte UTF-8 sequence) and can be decoded on their own.
+    Line offsets are found through a sparse index built on first use, and
+    view() hands out zero-copy memoryview slices of the mapping.
+
+    Lines end at LF; the text helpers also translate CRLF and lone CR like
+    universal-newline text mode.
+    """
+
+    def __init__(self, file_path: str, index_interval: int = LINE_INDEX_INTERVAL):
+        """Map a file for reading. Empty files are supported."""
+        self.file_path = file_path
+        self.index_interval = index_interval
+        self._line_offsets: Optional[List[int]] = None
+        self._line_count: Optional[int] = None
+        with open(file_path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # mmap refuses zero-length files; bytes offers the same read API
+                self._map = b''
+        self.size = len(self._map)
+
+    def __enter__(self) -> 'MappedLogFile':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Unmap the file. Views still held by callers keep the mapping alive until released."""
+        if isinstance(self._map, mmap.mmap):
+            try:
+                self._map.close()
+            except BufferError:
+                logging.debug(f"Views of {self.file_path} still in use, leaving the mapping to be collected")
+
+    def view(self, start: int = 0, end: Optional[int] = None) -> memoryview:
+        """Zero-copy view of the byte range [start, end)."""
+        return memoryview(self._map)[start:self.size if end is None else end]
+
+    def read(self, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Copy of the byte range [start, end)."""
+        return self._map[start:self.size if end is None else end]
+
+    def read_text(self, start: int = 0, end: Optional[int] = None) -> str:
+        """Decode the byte range [start, end) with the configured error policy."""
+        end = self.size if end is None else end
+        if self._map.find(b'\r', start, end) >= 0:
+            return decode_bytes(translate_newlines(self._map[start:end]))
+        return decode_bytes(self.view(start, end))
+
+    def next_line_start(self, offset: int) -> int:
+        """Offset of the first line starting at or after offset (the file size at the end)."""
+        if offset <= 0:
+            return 0
+        newline = self._map.find(b'\n', offset - 1)
+        return self.size if newline < 0 else newline + 1
+
+    def search(self, pattern: Pattern[bytes], start: int = 0) -> Optional[int]:
+        """Offset of the first match of a compiled bytes pattern at or after start, or None."""
+        match = pattern.search(self._map, start)
+        return match.start() if match else None
+
+    def chunk_boundaries(self, chunk_size: int = CHUNK_SIZE_BYTES) -> List[Tuple[int, int]]:
+        """Split the file into newline-aligned (start, end) byte ranges of roughly chunk_size bytes."""
+        chunks = []
+        start = 0
+        while start < self.size:
+            end = self.next_line_start(min(start + chunk_size, self.size))
+            chunks.append((start, end))
+            start = end
+        return chunks
+
+    def _release(self, start: int, end: int):
+        """Drop the pages of a consumed range from this process; they stay in the page cache."""
+        if isinstance(self._map, mmap.mmap) and hasattr(mmap, 'MADV_DONTNEED'):
+            start -= start % mmap.PAGESIZE
+            self._map.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def iter_text_blocks(self, block_size: int = READ_BLOCK_BYTES) -> Iterator[str]:
+        """
+        Yield the decoded text of the file in line-aligned blocks, one decode call per block.
+
+        Each block is a copy, so its pages are released once it has been handed
+        over and a sequential scan keeps a constant resident size.
+        """
+        for start, end in self.chunk_boundaries(block_size):
+            text = self.read_text(start, end)
+            self._release(start, end)
+            yield text
+
+    def iter_byte_blocks(self, block_size: int = READ_BLOCK_BYTES) -> Iterator[bytes]:
+        """Yield the bytes of the file in line-aligned blocks with line endings translated to LF."""
+        for start, end in self.chunk_boundaries(block_size):
+            block = translate_newlines(self._map[start:end])
+            self._release(start, end)
+            yield block
+
+    def iter_text_lines(self, block_size: int = READ_BLOCK_BYTES) -> Iterator[str]:
+        """Yield the decoded lines of the file, without their line endings."""
+        for text in self.iter_text_blocks(block_size):
+            lines = text.split('\n')
+            if not lines[-1]:
+                lines.pop()
+            yield from lines
+
+    def iter_lines(self, first_line: int = 0) -> Iterator[memoryview]:
+        """Yield zero-copy views of the lines from first_line onwards, without their LF."""
+        offset = self.line_offset(first_line)
+        if offset is None:
+            return
+        view = memoryview(self._map)
+        while offset < self.size:
+            newline = self._map.find(b'\n', offset)
+            end = self.size if newline < 0 else newline
+            yield view[offset:end]
+            offset = end + 1
+
+    def iter_lines_reverse(self, end: Optional[int] = None) -> Iterator[memoryview]:
+        """Yield zero-copy views of the lines ending at or before offset end, last line first."""
+        end = self.size if end is None else end
+        view = memoryview(self._map)
+        # A trailing newline terminates the last line rather than starting an empty one
+        if end > 0 and self._map[end - 1:end] == b'\n':
+            end -= 1
+        while end > 0:
+            start = self._map.rfind(b'\n', 0, end) + 1
+            yield view[start:end]
+            end = start - 1
+        if end == 0 and self.size and self._map[0:1] == b'\n':
+            yield view[0:0]
+
+    def read_lines(self, first_line: int, count: int) -> List[str]:
+        """Decode count lines starting at first_line (fewer at the end of the file)."""
+        lines = []
+        for line in self.iter_lines(first_line):
+            if len(lines) >= count:
+                break
+            lines.append(decode_bytes(line).rstrip('\r'))
+        return lines
+
+    def _build_line_index(self):
+        """Record the offset of every index_interval-th line in one pass over the file."""
+        offsets = []
+        line_count = 0
+        interval = self.index_interval
+        for start, end in self.chunk_boundaries(READ_BLOCK_BYTES):
+            pieces = self._map[start:end].split(b'\n')
+            if not pieces[-1]:
+                pieces.pop()
+            first = (-line_count) % interval
+            if first < len(pieces):
+                line_starts = list(accumulate((len(piece) + 1 for piece in pieces), initial=start))
+                offsets.extend(line_starts[first:len(pieces):interval])
+            line_count += len(pieces)
+        self._line_offsets = offsets
+        self._line_count = line_count
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines in the file (builds the line index on first use)."""
+        if self._line_count is None:
+            self._build_line_index()
+        return self._line_count
+
+    def line_offset(self, line_number: int) -> Optional[int]:
+        """
+        Byte offset of a line (0-based), found from the nearest indexed line.
+
+        Returns:
+            Optional[int]: The offset, or None if the file has fewer lines
+        """
+        if line_number < 0:
+            return None
+        if line_number == 0:
+            return 0 if self.size else None
+        if self._line_offsets is None:
+            self._build_line_index()
+        if line_number >= self._line_count:
+            return None
+        offset = self._line_offsets[line_number // self.index_interval]
+        for _ in range(line_number % self.index_interval):
+            offset = self._map.find(b'\n', offset) + 1
+        return offset
+
+
+def split_file_chunks(file_path: str, chunk_size: int = CHUNK_SIZE_BYTES) -> List[Tuple[int, int]]:
+    """
+    Split a file into newline-aligned (start, end) byte ranges of roughly chunk_size bytes.
+    """
+    with MappedLogFile(file_path) as log_file:
+        return log_file.chunk_boundaries(chunk_size)
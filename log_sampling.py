@@ -0,0 +1,304 @@
+import os
+import re
+import math
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import apache_error_parser
+import modsecurity_parser
+from ip_columns import IpColumn
+from log_decoding import translate_newlines
+from log_reader import MappedLogFile
+
+# Evenly spaced windows read from a file, and the bytes read per window
+SAMPLE_WINDOWS = 64
+SAMPLE_WINDOW_BYTES = 256 * 1024
+
+# Smaller files are parsed exactly; the windows would cover too much of them to save time
+SAMPLE_MIN_BYTES = 32 * 1024 * 1024
+
+# Windows stop being read once this much time has passed (at least MIN_SAMPLE_WINDOWS are read)
+SAMPLE_TIME_BUDGET_SECONDS = 2.0
+MIN_SAMPLE_WINDOWS = 2
+
+# Two-sided 95% normal interval
+CONFIDENCE_LEVEL = 0.95
+CONFIDENCE_Z = 1.96
+
+TOP_N = 10
+
+# Boundary line of section A, where every native audit log transaction starts
+NATIVE_TRANSACTION_START = re.compile(rb'^--[0-9a-fA-F]+-A--', re.MULTILINE)
+
+STATUS_CODE_PATTERN = re.compile(r'(\d{3})')
+
+
+def should_sample(file_path: str) -> bool:
+    """Check whether a log is a single file big enough for sampling to pay off."""
+    return os.path.isfile(file_path) and os.path.getsize(file_path) >= SAMPLE_MIN_BYTES
+
+
+def spread_order(count: int) -> List[int]:
+    """
+    Indices 0..count-1 in bit-reversed order (0, 8, 4, 12, 2, ... for 16).
+
+    Every prefix is spread over the whole range, so windows read until the
+    time budget runs out still cover the file evenly.
+    """
+    bits = max(count - 1, 0).bit_length()
+    return sorted(range(count), key=lambda index: int(format(index, f'0{bits}b')[::-1], 2) if bits else 0)
+
+
+class SampleEstimator:
+    """
+    Extrapolates counts seen in sampled byte windows to the whole file.
+
+    Each count is estimated as file size x (count in the windows / bytes in the
+    windows), a ratio estimator over the windows as clusters. Its variance comes
+    from how much the per-window ratios differ, so logs whose mix changes over
+    time get wider intervals than a per-record binomial interval would give.
+    """
+
+    def __init__(self, file_size: int):
+        """Start without windows for a file of file_size bytes."""
+        self.file_size = file_size
+        self.window_bytes: List[int] = []
+        self.window_counts: List[Dict[str, Counter]] = []
+        self.totals: Dict[str, Counter] = defaultdict(Counter)
+
+    @property
+    def bytes_sampled(self) -> int:
+        return sum(self.window_bytes)
+
+    def add_window(self, size: int, counts: Dict[str, Counter]):
+        """Record the counts of one window of size bytes, per dimension (e.g. 'severity')."""
+        self.window_bytes.append(size)
+        self.window_counts.append(counts)
+        for dimension, counter in counts.items():
+            self.totals[dimension].update(counter)
+
+    def scale(self) -> float:
+        """Factor from sampled to estimated counts."""
+        sampled = self.bytes_sampled
+        return self.file_size / sampled if sampled else 0.0
+
+    def estimate(self, dimension: str, key: Hashable) -> Dict[str, int]:
+        """
+        Estimated total of one key with its confidence interval.
+
+        Returns:
+            Dict[str, int]: {'count', 'low', 'high'}; low is never below the count actually seen
+        """
+        observed = self.totals[dimension][key]
+        sampled = self.bytes_sampled
+        windows = len(self.window_bytes)
+        if not sampled:
+            return {'count': 0, 'low': 0, 'high': 0}
+        ratio = observed / sampled
+        estimate = ratio * self.file_size
+
+        if windows >= 2:
+            residuals = sum((counts.get(dimension, {}).get(key, 0) - ratio * size) ** 2
+                            for size, counts in zip(self.window_bytes, self.window_counts))
+            mean_bytes = sampled / windows
+            sampled_fraction = min(sampled / self.file_size, 1.0)
+            ratio_variance = (1 - sampled_fraction) * residuals / (windows - 1) / (windows * mean_bytes ** 2)
+            margin = CONFIDENCE_Z * math.sqrt(ratio_variance) * self.file_size
+        else:
+            # A single window says nothing about the spread; fall back to a Poisson interval
+            margin = CONFIDENCE_Z * math.sqrt(observed) * self.scale()
+
+        return {
+            'count': round(estimate),
+            'low': max(observed, round(estimate - margin)),
+            'high': max(observed, round(estimate + margin))
+        }
+
+    def distribution(self, dimension: str, label: str, limit: Optional[int] = None) -> List[Dict]:
+        """Estimates for every key seen in a dimension, largest first, as [{label: key, 'count', 'low', 'high'}]."""
+        keys = [key for key, _ in self.totals[dimension].most_common(limit)]
+        return [{label: key, **self.estimate(dimension, key)} for key in keys]
+
+    def scaled(self, dimension: str) -> Dict[Hashable, int]:
+        """Point estimates for every key seen in a dimension, without intervals (e.g. for timelines)."""
+        scale = self.scale()
+        return {key: round(count * scale) for key, count in self.totals[dimension].items()}
+
+
+def plan_windows(log_file: MappedLogFile, align: Callable[[int], int],
+                 count: int = SAMPLE_WINDOWS, window_bytes: int = SAMPLE_WINDOW_BYTES) -> List[Tuple[int, int]]:
+    """
+    Evenly spaced, non-overlapping (start, end) byte windows aligned to record boundaries.
+
+    Args:
+        log_file (MappedLogFile): The mapped log
+        align (Callable): Offset of the first record starting at or after an offset
+        count (int): Number of windows
+        window_bytes (int): Bytes per window before the end is moved to the next record start
+    """
+    windows = []
+    previous_end = 0
+    for index in range(count):
+        start = align(max(index * log_file.size // count, previous_end))
+        if start >= log_file.size:
+            break
+        end = align(min(start + window_bytes, log_file.size))
+        windows.append((start, end))
+        previous_end = end
+    return windows
+
+
+def read_windows(log_file: MappedLogFile, windows: List[Tuple[int, int]],
+                 count_window: Callable[[int, Union[str, bytes]], Dict[str, Counter]], time_budget: float = SAMPLE_TIME_BUDGET_SECONDS,
+                 binary: bool = False) -> Tuple[SampleEstimator, Dict]:
+    """
+    Count the records of windows in spread order until the time budget is used up.
+
+    Args:
+        log_file (MappedLogFile): The mapped log
+        windows (List[Tuple[int, int]]): Windows from plan_windows
+        count_window (Callable): Returns the counts per dimension of a window, given its start offset and text
+        time_budget (float): Seconds after which no further window is started
+        binary (bool): Hand count_window the undecoded bytes (with LF line endings) instead of text
+
+    Returns:
+        Tuple[SampleEstimator, Dict]: The estimator and the 'sampling' block of the response
+    """
+    started = time.monotonic()
+    estimator = SampleEstimator(log_file.size)
+    for read, index in enumerate(spread_order(len(windows))):
+        if read >= MIN_SAMPLE_WINDOWS and time.monotonic() - started >= time_budget:
+            break
+        start, end = windows[index]
+        data = translate_newlines(log_file.read(start, end)) if binary else log_file.read_text(start, end)
+        estimator.add_window(end - start, count_window(start, data))
+
+    sampling = {
+        'confidence': CONFIDENCE_LEVEL,
+        'file_size': log_file.size,
+        'bytes_sampled': estimator.bytes_sampled,
+        'sampled_fraction': round(estimator.bytes_sampled / log_file.size, 4) if log_file.size else 0.0,
+        'windows': len(estimator.window_bytes),
+        'windows_planned': len(windows),
+        'elapsed_ms': round((time.monotonic() - started) * 1000),
+        'time_budget_ms': round(time_budget * 1000)
+    }
+    return estimator, sampling
+
+
+def sample_apache_error_dashboard(file_path: str, time_budget: float = SAMPLE_TIME_BUDGET_SECONDS,
+                                  prefixes: Optional[Mapping[int, Sequence[int]]] = None) -> Dict:
+    """
+    Approximate Apache error dashboard from evenly spaced line-aligned windows.
+
+    Returns the keys of apache_error_parser.get_dashboard_stats, with 'low' and
+    'high' bounds on every distribution item, plus a 'sampling' block. The
+    timeline and subnet counts are the sampled ones scaled up and have no
+    intervals; subnet 'addresses' only counts addresses seen in the windows.
+    """
+    parser = apache_error_parser.ApacheErrorLogParser()
+    parser.specialize(parser.read_sample_lines(file_path))
+
+    def count_window(start: int, text: str) -> Dict[str, Counter]:
+        counts = {dimension: Counter() for dimension in ('entries', 'severity', 'module', 'message', 'hour', 'ip')}
+        # Past the file start, lines before the first event belong to an event that began earlier
+        for entry in parser.iter_events(text.split('\n'), file_path, leading=start == 0):
+            counts['entries'][None] += 1
+            counts['severity'][entry.get('severity', 'unknown')] += 1
+            counts['module'][entry.get('module', 'unknown')] += 1
+            message = apache_error_parser.message_group(entry)
+            if message:
+                counts['message'][message] += 1
+            hour = apache_error_parser.hour_bucket(entry)
+            if hour:
+                counts['hour'][hour] += 1
+            if entry.get('client_ip'):
+                counts['ip'][entry['client_ip']] += 1
+        return counts
+
+    with MappedLogFile(file_path) as log_file:
+        windows = plan_windows(log_file, log_file.next_line_start)
+        estimator, sampling = read_windows(log_file, windows, count_window, time_budget)
+
+    total = estimator.estimate('entries', None)
+    sampling['estimated_records'] = total
+    return {
+        'severity_distribution': estimator.distribution('severity', 'severity'),
+        'timeline_data': [{'time': hour, 'count': count} for hour, count in sorted(estimator.scaled('hour').items())],
+        'top_modules': estimator.distribution('module', 'module', TOP_N),
+        'frequent_messages': estimator.distribution('message', 'message', TOP_N),
+        'top_subnets': IpColumn.from_counts(estimator.scaled('ip')).rollups(prefixes),
+        'total_entries': total['count'],
+        'unique_modules': len(estimator.totals['module']),
+        'unique_severities': len(estimator.totals['severity']),
+        'sampling': sampling
+    }
+
+
+def sample_modsec_dashboard(file_path: str, time_budget: float = SAMPLE_TIME_BUDGET_SECONDS,
+                            prefixes: Optional[Mapping[int, Sequence[int]]] = None) -> Dict:
+    """
+    Approximate ModSecurity dashboard from evenly spaced windows of whole transactions.
+
+    Windows of native logs start at a section A boundary and end before the next
+    one, JSON logs are cut at line boundaries. Returns the keys of
+    modsecurity_parser.get_dashboard_data plus 'status_distribution' and
+    'top_ip_distribution' with confidence intervals and a 'sampling' block.
+    Subnet counts are scaled up like the timeline, without intervals.
+    Transactions are counted per window, so native sections repeating an ID far
+    apart in the file are counted as separate transactions.
+    """
+    log_format = modsecurity_parser.detect_audit_log_format(file_path)
+
+    def count_window(start: int, data) -> Dict[str, Counter]:
+        counts = {dimension: Counter() for dimension in ('transactions', 'status', 'ip', 'status_hour', 'timestamps')}
+        if log_format == 'json':
+            transactions = modsecurity_parser.iter_json_transactions(data.split('\n'), file_path)
+        else:
+            # Native windows stay bytes; the parser decodes each section on its own
+            transactions = modsecurity_parser.iter_native_transactions([data], file_path)
+        for transaction in transactions:
+            counts['transactions'][None] += 1
+            status_match = STATUS_CODE_PATTERN.search(transaction.get('response_status') or '')
+            if status_match:
+                counts['status'][status_match.group(1)] += 1
+            if transaction['source_ip'] != 'N/A':
+                counts['ip'][transaction['source_ip']] += 1
+            bucket = modsecurity_parser.status_hour(transaction)
+            if bucket:
+                counts['status_hour'][bucket] += 1
+            display_timestamp = transaction.get('display_timestamp')
+            if display_timestamp and display_timestamp != 'N/A':
+                counts['timestamps'][display_timestamp] += 1
+        return counts
+
+    with MappedLogFile(file_path) as log_file:
+        if log_format == 'json':
+            align = log_file.next_line_start
+        else:
+            def align(offset: int) -> int:
+                start = log_file.search(NATIVE_TRANSACTION_START, log_file.next_line_start(offset))
+                return log_file.size if start is None else start
+        windows = plan_windows(log_file, align)
+        estimator, sampling = read_windows(log_file, windows, count_window, time_budget, binary=log_format != 'json')
+
+    status_timeline = defaultdict(dict)
+    for (hour, status), count in estimator.scaled('status_hour').items():
+        status_timeline[hour][status] = count
+    timeline_data, status_codes = modsecurity_parser.format_status_timeline(status_timeline)
+
+    top_ip_distribution = estimator.distribution('ip', 'ip', TOP_N)
+    total = estimator.estimate('transactions', None)
+    sampling['estimated_records'] = total
+    return {
+        'top_ips': {item['ip']: item['count'] for item in top_ip_distribution},
+        'top_ip_distribution': top_ip_distribution,
+        'top_subnets': IpColumn.from_counts(estimator.scaled('ip')).rollups(prefixes),
+        'status_distribution': estimator.distribution('status', 'status'),
+        'status_timeline': timeline_data,
+        'status_codes': status_codes,
+        'timestamp_range': modsecurity_parser.display_timestamp_range(list(estimator.totals['timestamps'])),
+        'total_transactions': total['count'],
+        'sampling': sampling
+    }
@@ -0,0 +1,382 @@
+import re
+import os
+import sqlite3
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from log_decoding import storable_text
+
+# Suffix of the per-upload SQLite database stored next to the log file
+STORE_SUFFIX = '.sqlite3'
+
+# Rows per executemany() call during ingest
+BATCH_SIZE = 5000
+
+# Maximum number of result groups returned by a query
+MAX_QUERY_ROWS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS apache_entries (
+    timestamp TEXT,
+    hour TEXT,
+    day TEXT,
+    severity TEXT,
+    module TEXT,
+    pid INTEGER,
+    client_ip TEXT,
+    client_port INTEGER,
+    error_code TEXT,
+    message TEXT,
+    line_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_apache_timestamp ON apache_entries (timestamp);
+CREATE INDEX IF NOT EXISTS idx_apache_client_ip ON apache_entries (client_ip, timestamp);
+CREATE INDEX IF NOT EXISTS idx_apache_severity ON apache_entries (severity, hour);
+CREATE INDEX IF NOT EXISTS idx_apache_module ON apache_entries (module, hour);
+CREATE TABLE IF NOT EXISTS modsec_transactions (
+    transaction_id TEXT,
+    timestamp TEXT,
+    hour TEXT,
+    day TEXT,
+    source_ip TEXT,
+    source_port INTEGER,
+    destination_port INTEGER,
+    method TEXT,
+    path TEXT,
+    status INTEGER,
+    message_count INTEGER,
+    waf_time_us INTEGER,
+    duration_us INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_modsec_timestamp ON modsec_transactions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_modsec_source_ip ON modsec_transactions (source_ip, timestamp);
+CREATE INDEX IF NOT EXISTS idx_modsec_status ON modsec_transactions (status, path, hour);
+CREATE TABLE IF NOT EXISTS modsec_rule_hits (
+    transaction_id TEXT,
+    timestamp TEXT,
+    hour TEXT,
+    day TEXT,
+    source_ip TEXT,
+    path TEXT,
+    status INTEGER,
+    rule_id TEXT,
+    msg TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_rule_hits_rule_id ON modsec_rule_hits (rule_id, hour);
+CREATE INDEX IF NOT EXISTS idx_rule_hits_source_ip ON modsec_rule_hits (source_ip, rule_id);
+"""
+
+# Columns the query API may filter and group on, per table
+QUERY_TABLES = {
+    'apache_entries': {
+        'log_type': 'apache-error',
+        'columns': {'hour', 'day', 'severity', 'module', 'pid', 'client_ip', 'client_port', 'error_code'}
+    },
+    'modsec_transactions': {
+        'log_type': 'modsecurity',
+        'columns': {'hour', 'day', 'source_ip', 'source_port', 'destination_port', 'method', 'path', 'status'}
+    },
+    'modsec_rule_hits': {
+        'log_type': 'modsecurity',
+        'columns': {'hour', 'day', 'source_ip', 'path', 'status', 'rule_id', 'msg'}
+    }
+}
+
+INTEGER_COLUMNS = {'pid', 'client_port', 'source_port', 'destination_port', 'status'}
+
+STATUS_PATTERN = re.compile(r'(\d{3})')
+
+
+def get_store_path(log_path: str) -> str:
+    """Return the path of the SQLite store belonging to a log file."""
+    return log_path + STORE_SUFFIX
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def _time_buckets(iso_timestamp: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Return (hour, day) bucket strings for an ISO timestamp."""
+    if not iso_timestamp or len(iso_timestamp) < 13:
+        return None, None
+    return iso_timestamp[:13].replace('T', ' ') + ':00', iso_timestamp[:10]
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _split_request_line(request_line: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Split 'GET /path?query HTTP/1.1' into method and path without the query string."""
+    if not request_line or request_line == 'N/A':
+        return None, None
+    parts = request_line.split(' ')
+    method = parts[0] if parts else None
+    path = parts[1].split('?', 1)[0] if len(parts) > 1 else None
+    return method, path
+
+
+def _status_code(response_status: Optional[str]) -> Optional[int]:
+    if not response_status or response_status == 'N/A':
+        return None
+    match = STATUS_PATTERN.search(response_status)
+    return int(match.group(1)) if match else None
+
+
+def _executemany_batched(conn: sqlite3.Connection, sql: str, rows: Iterable[tuple]) -> int:
+    """Insert rows with executemany() in BATCH_SIZE chunks and return the row count."""
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            conn.executemany(sql, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+
+def _prepare_store(log_path: str, log_type: str) -> sqlite3.Connection:
+    """Create a fresh store for a log file, replacing any previous one."""
+    db_path = get_store_path(log_path)
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    conn = _connect(db_path)
+    conn.executescript(SCHEMA)
+    stat = os.stat(log_path)
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', [
+            ('log_type', log_type),
+            ('source_size', str(stat.st_size)),
+            ('source_mtime', str(stat.st_mtime))
+        ])
+    return conn
+
+
+def ingest_apache_error_entries(log_path: str, entries: List[Dict]) -> Dict:
+    """
+    Write parsed Apache error entries into the log file's SQLite store.
+
+    Args:
+        log_path (str): Path of the source log file
+        entries (List[Dict]): Parsed entries from apache_error_parser
+
+    Returns:
+        Dict: Number of rows written per table
+    """
+    def rows():
+        for entry in entries:
+            hour, day = _time_buckets(entry.get('timestamp'))
+            # Free-text fields may carry escaped invalid bytes, which SQLite cannot store
+            yield (entry.get('timestamp'), hour, day, storable_text(entry.get('severity')),
+                   storable_text(entry.get('module')), entry.get('pid'), storable_text(entry.get('client_ip')),
+                   entry.get('client_port'), entry.get('error_code'), storable_text(entry.get('message')),
+                   entry.get('line_count', 1))
+
+    conn = _prepare_store(log_path, 'apache-error')
+    try:
+        with conn:
+            count = _executemany_batched(
+                conn,
+                'INSERT INTO apache_entries (timestamp, hour, day, severity, module, pid, client_ip, '
+                'client_port, error_code, message, line_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows()
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('complete', '1')")
+        conn.execute('ANALYZE')
+    finally:
+        conn.close()
+    return {'apache_entries': count}
+
+
+def ingest_modsec_transactions(log_path: str, transactions: List[Dict]) -> Dict:
+    """
+    Write parsed ModSecurity transactions and their rule hits into the log file's SQLite store.
+
+    Args:
+        log_path (str): Path of the source log file
+        transactions (List[Dict]): Parsed transactions from modsecurity_parser
+
+    Returns:
+        Dict: Number of rows written per table
+    """
+    rule_hits = []
+
+    def transaction_rows():
+        for transaction in transactions:
+            hour, day = _time_buckets(transaction.get('timestamp'))
+            method, path = _split_request_line(storable_text(transaction.get('request_line')))
+            status = _status_code(transaction.get('response_status'))
+
+            for rule in transaction.get('rule_hits', []):
+                rule_hits.append((transaction.get('id'), transaction.get('timestamp'), hour, day,
+                                  transaction.get('source_ip'), path, status, storable_text(rule['id']),
+                                  storable_text(rule.get('msg'))))
+
+            timings = transaction.get('stopwatch') or {}
+            yield (transaction.get('id'), transaction.get('timestamp'), hour, day,
+                   transaction.get('source_ip'), _to_int(transaction.get('source_port')),
+                   _to_int(transaction.get('destination_port')), method, path, status,
+                   len(transaction.get('messages', [])), timings.get('combined'), timings.get('duration'))
+
+    conn = _prepare_store(log_path, 'modsecurity')
+    try:
+        with conn:
+            transaction_count = _executemany_batched(
+                conn,
+                'INSERT INTO modsec_transactions (transaction_id, timestamp, hour, day, source_ip, source_port, '
+                'destination_port, method, path, status, message_count, waf_time_us, duration_us) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                transaction_rows()
+            )
+            rule_hit_count = _executemany_batched(
+                conn,
+                'INSERT INTO modsec_rule_hits (transaction_id, timestamp, hour, day, source_ip, path, status, '
+                'rule_id, msg) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rule_hits
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('complete', '1')")
+        conn.execute('ANALYZE')
+    finally:
+        conn.close()
+    return {'modsec_transactions': transaction_count, 'modsec_rule_hits': rule_hit_count}
+
+
+def get_store_status(log_path: str) -> Dict:
+    """
+    Report whether a log file has an up-to-date SQLite store.
+
+    Returns:
+        Dict: {'ingested': bool, 'stale': bool, 'log_type': str or None}
+    """
+    db_path = get_store_path(log_path)
+    if not os.path.exists(db_path):
+        return {'ingested': False, 'stale': False, 'log_type': None}
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            meta = dict(conn.execute('SELECT key, value FROM meta').fetchall())
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logging.warning(f"Unable to read store {db_path}: {str(e)}")
+        return {'ingested': False, 'stale': False, 'log_type': None}
+
+    if meta.get('complete') != '1':
+        return {'ingested': False, 'stale': False, 'log_type': meta.get('log_type')}
+
+    stat = os.stat(log_path)
+    stale = (meta.get('source_size') != str(stat.st_size) or
+             meta.get('source_mtime') != str(stat.st_mtime))
+    return {'ingested': True, 'stale': stale, 'log_type': meta.get('log_type')}
+
+
+def get_row_counts(log_path: str, log_type: str) -> Dict:
+    """
+    Count the rows of an existing store, in the shape the ingest functions return.
+
+    Returns:
+        Dict: Number of rows per table of the log type
+    """
+    conn = sqlite3.connect(get_store_path(log_path))
+    try:
+        return {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                for table, spec in QUERY_TABLES.items() if spec['log_type'] == log_type}
+    finally:
+        conn.close()
+
+
+def delete_store(log_path: str):
+    """Remove the SQLite store belonging to a log file, if any."""
+    db_path = get_store_path(log_path)
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def run_group_by_query(log_path: str, table: str, group_by: List[str], filters: Dict[str, str],
+                       start: Optional[str] = None, end: Optional[str] = None,
+                       limit: int = 100) -> Dict:
+    """
+    Run a constrained COUNT(*) ... GROUP BY query against a log file's SQLite store.
+
+    Table and column names are checked against QUERY_TABLES, all values are bound
+    as parameters.
+
+    Args:
+        log_path (str): Path of the source log file
+        table (str): One of QUERY_TABLES
+        group_by (List[str]): Columns to group by
+        filters (Dict[str, str]): Equality filters {column: value}
+        start (Optional[str]): Inclusive lower ISO timestamp bound
+        end (Optional[str]): Inclusive upper ISO timestamp bound
+        limit (int): Maximum number of groups to return
+
+    Returns:
+        Dict: Query rows or an error message
+    """
+    if table not in QUERY_TABLES:
+        return {"error": f"Unknown table '{table}'. Allowed: {', '.join(sorted(QUERY_TABLES))}"}
+    allowed_columns = QUERY_TABLES[table]['columns']
+
+    invalid = [column for column in list(group_by) + list(filters) if column not in allowed_columns]
+    if invalid:
+        return {"error": f"Column(s) not allowed for {table}: {', '.join(invalid)}. "
+                         f"Allowed: {', '.join(sorted(allowed_columns))}"}
+    if len(group_by) > 4:
+        return {"error": "At most 4 group_by columns are allowed."}
+
+    where = []
+    params = []
+    for column, value in filters.items():
+        if column in INTEGER_COLUMNS:
+            value = _to_int(value)
+            if value is None:
+                return {"error": f"Filter value for {column} must be an integer."}
+        where.append(f"{column} = ?")
+        params.append(value)
+    if start:
+        where.append("timestamp >= ?")
+        params.append(start)
+    if end:
+        where.append("timestamp <= ?")
+        params.append(end)
+
+    select_columns = ', '.join(group_by + ['COUNT(*) AS count'])
+    sql = f"SELECT {select_columns} FROM {table}"
+    if where:
+        sql += " WHERE " + ' AND '.join(where)
+    if group_by:
+        sql += " GROUP BY " + ', '.join(group_by) + " ORDER BY count DESC"
+    sql += " LIMIT ?"
+    params.append(max(1, min(limit, MAX_QUERY_ROWS)))
+
+    conn = sqlite3.connect(f"file:{get_store_path(log_path)}?mode=ro", uri=True)
+    try:
+        conn.row_factory = sqlite3.Row
+        rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+    finally:
+        conn.close()
+
+    return {
+        'table': table,
+        'group_by': group_by,
+        'filters': filters,
+        'rows': rows,
+        'row_count': len(rows)
+    }
@@ -0,0 +1,438 @@
+import re
+import os
+import json
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+import apache_error_parser
+import apache_access_parser
+import modsecurity_parser
+from log_decoding import decode_bytes
+from log_reader import MappedLogFile
+
+# Suffix of the summary manifest stored next to the log file
+MANIFEST_SUFFIX = '.summary.json'
+
+# Bump when the manifest layout or the meaning of a field changes so old manifests are ignored
+# (2: Apache error entry_count counts multi-line events, not lines)
+MANIFEST_VERSION = 2
+
+# Number of leading lines handed to format detection
+FORMAT_SAMPLE_LINES = 50
+
+# The native ModSecurity summary scans raw bytes and decodes only the fields it reports
+# (the leading newline gives the regex engine a literal prefix to search for)
+MODSEC_BOUNDARY_PATTERN = re.compile(rb'\n--([0-9a-fA-F]+)-([A-Z])--')
+MODSEC_FIRST_BOUNDARY_PATTERN = re.compile(rb'--([0-9a-fA-F]+)-([A-Z])--')
+MODSEC_STATUS_PATTERN = re.compile(rb'(\d{3})')
+STATUS_PATTERN = re.compile(r'(\d{3})')
+
+
+def get_manifest_path(log_path: str) -> str:
+    """Return the path of the summary manifest belonging to a log file."""
+    return log_path + MANIFEST_SUFFIX
+
+
+def _update_range(time_range: Dict, iso_timestamp: Optional[str]):
+    if not iso_timestamp:
+        return
+    if time_range['min'] is None or iso_timestamp < time_range['min']:
+        time_range['min'] = iso_timestamp
+    if time_range['max'] is None or iso_timestamp > time_range['max']:
+        time_range['max'] = iso_timestamp
+
+
+def summarize_apache_error_file(file_path: str) -> Dict:
+    """
+    Summarize an Apache error log in a single pass without keeping the entries.
+
+    Args:
+        file_path (str): Path to the log file
+
+    Returns:
+        Dict: Line counts, time range, severity/module histograms, detected format and success rate
+    """
+    parser = apache_error_parser.ApacheErrorLogParser()
+    time_range = {'min': None, 'max': None}
+    line_count = 0
+
+    detected_format = parser.specialize(parser.read_sample_lines(file_path, FORMAT_SAMPLE_LINES))
+
+    def counted(lines):
+        nonlocal line_count
+        for line in lines:
+            line_count += 1
+            yield line
+
+    with MappedLogFile(file_path) as log_file:
+        for entry in parser.iter_events(counted(log_file.iter_text_lines()), file_path):
+            _update_range(time_range, entry['timestamp'])
+
+    stats = parser.get_stats()
+    return {
+        'log_type': 'apache-error',
+        'line_count': line_count,
+        'entry_count': stats['total_events'],
+        'time_range': time_range,
+        'severity_counts': stats['severity_counts'],
+        'module_counts': stats['module_counts'],
+        'detected_format': detected_format,
+        'parse_success_rate': stats['success_rate']
+    }
+
+
+def summarize_modsec_json_file(file_path: str) -> Dict:
+    """
+    Summarize a ModSecurity JSON audit log in a single pass, one record per line.
+
+    Args:
+        file_path (str): Path to the log file
+
+    Returns:
+        Dict: Line/transaction counts, time range, status histogram, detected format and success rate
+    """
+    time_range = {'min': None, 'max': None}
+    status_counts = Counter()
+    line_count = 0
+    transaction_count = 0
+    timestamped = 0
+    decode = json.JSONDecoder().decode
+
+    with MappedLogFile(file_path) as log_file:
+        for line in log_file.iter_text_lines():
+            line_count += 1
+            if not line.strip():
+                continue
+            try:
+                transaction = modsecurity_parser.json_record_to_transaction(decode(line))
+            except (ValueError, AttributeError, TypeError):
+                continue
+            transaction_count += 1
+            if transaction['timestamp']:
+                timestamped += 1
+                _update_range(time_range, transaction['timestamp'])
+            status_match = STATUS_PATTERN.search(transaction['response_status'])
+            if status_match:
+                status_counts[status_match.group(1)] += 1
+
+    success_rate = (timestamped / transaction_count * 100) if transaction_count else 0.0
+    return {
+        'log_type': 'modsecurity',
+        'line_count': line_count,
+        'transaction_count': transaction_count,
+        'time_range': time_range,
+        'status_counts': dict(status_counts),
+        'detected_format': {'format': 'json_audit_log' if transaction_count else 'unknown',
+                            'confidence': round(transaction_count / line_count, 2) if line_count else 0.0},
+        'parse_success_rate': round(success_rate, 2)
+    }
+
+
+class ModsecSummary:
+    """
+    Running summary of ModSecurity transactions, fed one at a time.
+
+    Used where transactions are already being parsed (streaming uploads), so the
+    manifest comes out of the same pass instead of a second scan of the file.
+    """
+
+    def __init__(self, log_format: str):
+        """Start an empty summary for a 'native' or 'json' audit log."""
+        self.log_format = log_format
+        self.time_range = {'min': None, 'max': None}
+        self.status_counts = Counter()
+        self.transaction_count = 0
+        self.timestamped = 0
+        # Native logs are counted by distinct transaction ID, like summarize_modsec_file
+        self.transaction_ids = set()
+        self.timestamped_ids = set()
+
+    def add(self, transaction: Dict):
+        """Count one parsed transaction."""
+        if self.log_format == 'json':
+            self.transaction_count += 1
+        else:
+            self.transaction_ids.add(transaction['id'])
+            self.transaction_count = len(self.transaction_ids)
+        if transaction.get('timestamp'):
+            if self.log_format == 'json':
+                self.timestamped += 1
+            else:
+                self.timestamped_ids.add(transaction['id'])
+                self.timestamped = len(self.timestamped_ids)
+            _update_range(self.time_range, transaction['timestamp'])
+        status_match = STATUS_PATTERN.search(transaction.get('response_status') or '')
+        if status_match:
+            self.status_counts[status_match.group(1)] += 1
+
+    def result(self, line_count: int) -> Dict:
+        """Return the summary in the layout of summarize_modsec_file."""
+        count = self.transaction_count
+        if self.log_format == 'json':
+            detected_format = {'format': 'json_audit_log' if count else 'unknown',
+                               'confidence': round(count / line_count, 2) if line_count else 0.0}
+        else:
+            detected_format = {'format': 'native_audit_log' if count else 'unknown',
+                               'confidence': 1.0 if count else 0.0}
+        success_rate = (self.timestamped / count * 100) if count else 0.0
+        return {
+            'log_type': 'modsecurity',
+            'line_count': line_count,
+            'transaction_count': count,
+            'time_range': self.time_range,
+            'status_counts': dict(self.status_counts),
+            'detected_format': detected_format,
+            'parse_success_rate': round(success_rate, 2)
+        }
+
+
+class ApacheErrorSummary:
+    """
+    Running summary of Apache error entries, fed one at a time.
+
+    The counterpart of ModsecSummary for streaming uploads; the counts come
+    from the parser's statistics once all entries were added.
+    """
+
+    def __init__(self, detected_format: Dict):
+        """Start an empty summary; detected_format is the result of the parser's format detection."""
+        self.detected_format = detected_format
+        self.time_range = {'min': None, 'max': None}
+
+    def add(self, entry: Dict):
+        """Account for one parsed entry."""
+        _update_range(self.time_range, entry['timestamp'])
+
+    def result(self, stats: Dict, line_count: int) -> Dict:
+        """Return the summary in the layout of summarize_apache_error_file, given the parser statistics."""
+        return {
+            'log_type': 'apache-error',
+            'line_count': line_count,
+            'entry_count': stats['total_events'],
+            'time_range': self.time_range,
+            'severity_counts': stats['severity_counts'],
+            'module_counts': stats['module_counts'],
+            'detected_format': self.detected_format,
+            'parse_success_rate': stats['success_rate']
+        }
+
+
+def summarize_modsec_dataset(dataset_path: str) -> Dict:
+    """
+    Summarize a ModSecurity concurrent-mode audit log directory from its parsed transactions.
+
+    Args:
+        dataset_path (str): Path to the dataset directory
+
+    Returns:
+        Dict: File/transaction counts, time range, status histogram, detected format and success rate
+    """
+    transactions = modsecurity_parser.parse_modsec_log(dataset_path)
+    if isinstance(transactions, dict):
+        raise ValueError(transactions['error'])
+
+    time_range = {'min': None, 'max': None}
+    status_counts = Counter()
+    timestamped = 0
+    for transaction in transactions:
+        if transaction['timestamp']:
+            timestamped += 1
+            _update_range(time_range, transaction['timestamp'])
+        status_match = STATUS_PATTERN.search(transaction['response_status'])
+        if status_match:
+            status_counts[status_match.group(1)] += 1
+
+    transaction_count = len(transactions)
+    success_rate = (timestamped / transaction_count * 100) if transaction_count else 0.0
+    return {
+        'log_type': 'modsecurity',
+        'file_count': len(modsecurity_parser.list_concurrent_audit_files(dataset_path)),
+        'transaction_count': transaction_count,
+        'time_range': time_range,
+        'status_counts': dict(status_counts),
+        'detected_format': {'format': 'concurrent_audit_log' if transaction_count else 'unknown',
+                            'confidence': 1.0 if transaction_count else 0.0},
+        'parse_success_rate': round(success_rate, 2)
+    }
+
+
+def summarize_modsec_file(file_path: str) -> Dict:
+    """
+    Summarize a ModSecurity audit log in a single pass without keeping the transactions.
+
+    Only section A (timestamp) and the first HTTP line of section F (status) are examined.
+    Section boundaries are found with one regex scan per binary block and only the lines
+    of A and F sections are visited; just the timestamp and status fields are decoded, so
+    request and response bodies are never decoded at all.
+
+    Args:
+        file_path (str): Path to the log file
+
+    Returns:
+        Dict: Line/transaction counts, time range, status histogram, detected format and success rate
+    """
+    if modsecurity_parser.detect_audit_log_format(file_path) == 'json':
+        return summarize_modsec_json_file(file_path)
+
+    time_range = {'min': None, 'max': None}
+    status_counts = Counter()
+    transaction_ids = set()
+    timestamped = set()
+    line_count = 0
+    current_id = None
+    current_section = None
+    status_seen = False
+
+    with MappedLogFile(file_path) as log_file:
+        for block in log_file.iter_byte_blocks():
+            line_count += block.count(b'\n') + (not block.endswith(b'\n'))
+
+            # (line start, transaction id, section) of every boundary line; blocks start at a line
+            boundaries = [(match.start() + 1, match.group(1), match.group(2))
+                          for match in MODSEC_BOUNDARY_PATTERN.finditer(block)]
+            first_match = MODSEC_FIRST_BOUNDARY_PATTERN.match(block)
+            if first_match:
+                boundaries.insert(0, (0, first_match.group(1), first_match.group(2)))
+
+            # Text before the first boundary continues the section carried over from the last block
+            segment_start = 0
+            for index in range(len(boundaries) + 1):
+                segment_end = boundaries[index][0] if index < len(boundaries) else len(block)
+
+                if current_section == b'A' and current_id not in timestamped:
+                    for line in block[segment_start:segment_end].split(b'\n'):
+                        start = line.find(b'[')
+                        end = line.find(b']', start)
+                        if start >= 0 and end > start:
+                            iso_timestamp = modsecurity_parser.parse_timestamp_to_iso(decode_bytes(line[start + 1:end]))
+                            if iso_timestamp:
+                                timestamped.add(current_id)
+                                _update_range(time_range, iso_timestamp)
+                                break
+
+                elif current_section == b'F' and not status_seen:
+                    for line in block[segment_start:segment_end].split(b'\n'):
+                        if line[:5].lower() == b'http/':
+                            status_seen = True
+                            status_match = MODSEC_STATUS_PATTERN.search(line)
+                            if status_match:
+                                status_counts[status_match.group(1).decode('ascii')] += 1
+                            break
+
+                if index < len(boundaries):
+                    segment_start, current_id, current_section = boundaries[index]
+                    transaction_ids.add(current_id)
+                    if current_section == b'F':
+                        status_seen = False
+
+    transaction_count = len(transaction_ids)
+    success_rate = (len(timestamped) / transaction_count * 100) if transaction_count else 0.0
+    return {
+        'log_type': 'modsecurity',
+        'line_count': line_count,
+        'transaction_count': transaction_count,
+        'time_range': time_range,
+        'status_counts': dict(status_counts),
+        'detected_format': {'format': 'native_audit_log' if transaction_count else 'unknown',
+                            'confidence': 1.0 if transaction_count else 0.0},
+        'parse_success_rate': round(success_rate, 2)
+    }
+
+
+def summarize_apache_access_file(file_path: str) -> Dict:
+    """
+    Summarize an Apache access log from its aggregates without keeping the entries.
+
+    Args:
+        file_path (str): Path to the log file
+
+    Returns:
+        Dict: Request counts, time range, status histogram, detected format and success rate
+    """
+    _, stats = apache_access_parser.parse_access_log(file_path, keep_entries=False)
+    if 'error' in stats:
+        raise ValueError(stats['error'])
+    return {
+        'log_type': 'apache-access',
+        'line_count': stats['total_lines'],
+        'entry_count': stats['parsed_lines'],
+        'time_range': stats['timestamp_range'],
+        'status_counts': {str(item['status']): item['count'] for item in stats['status_distribution']},
+        'detected_format': stats['detected_format'],
+        'parse_success_rate': stats['success_rate']
+    }
+
+
+def write_manifest(file_path: str, log_type: str) -> Optional[Dict]:
+    """
+    Compute and store the summary manifest for a log file.
+
+    Returns:
+        Optional[Dict]: The manifest, or None if the file could not be summarized
+    """
+    try:
+        if log_type == 'apache-error':
+            summary = summarize_apache_error_file(file_path)
+        elif log_type == 'apache-access':
+            summary = summarize_apache_access_file(file_path)
+        elif os.path.isdir(file_path):
+            summary = summarize_modsec_dataset(file_path)
+        else:
+            summary = summarize_modsec_file(file_path)
+        return store_manifest(file_path, summary)
+    except Exception as e:
+        logging.warning(f"Unable to summarize {file_path}: {str(e)}")
+        return None
+
+
+def store_manifest(file_path: str, summary: Dict) -> Dict:
+    """
+    Store a computed summary as the manifest of a log file.
+
+    Returns:
+        Dict: The summary with the manifest version and source file identity added
+    """
+    stat = os.stat(file_path)
+    summary.update({
+        'version': MANIFEST_VERSION,
+        'source_size': stat.st_size,
+        'source_mtime': stat.st_mtime,
+        'generated_at': datetime.now().isoformat()
+    })
+
+    manifest_path = get_manifest_path(file_path)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f)
+    os.replace(tmp_path, manifest_path)
+    return summary
+
+
+def load_manifest(file_path: str) -> Optional[Dict]:
+    """
+    Load the summary manifest for a log file if it exists and matches the file on disk.
+
+    Returns:
+        Optional[Dict]: The manifest, or None if missing or stale
+    """
+    try:
+        with open(get_manifest_path(file_path), 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+        stat = os.stat(file_path)
+    except (OSError, ValueError):
+        return None
+
+    if (summary.get('version') != MANIFEST_VERSION or
+            summary.get('source_size') != stat.st_size or
+            summary.get('source_mtime') != stat.st_mtime):
+        return None
+    return summary
+
+
+def delete_manifest(file_path: str):
+    """Remove the summary manifest belonging to a log file, if any."""
+    manifest_path = get_manifest_path(file_path)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
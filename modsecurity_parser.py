@@ -1,9 +1,125 @@
+import gc
 import re
 import os
+import json
 import logging
-import psutil
+import threading
+from bisect import insort
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from collections import Counter, defaultdict
+import admission
+from ip_columns import IpColumn
+from log_decoding import MONTHS, decode_bytes, read_bytes
+from log_reader import MappedLogFile
+from latency_sketch import QuantileSketch
+
+# JSON audit logs larger than this are parsed in newline-aligned chunks on a process pool
+JSON_PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+
+# Audit log parts carried by each top-level key of a JSON audit record
+JSON_SECTION_KEYS = {
+    'transaction': 'A',
+    'request': 'B',
+    'response': 'F',
+    'audit_data': 'H',
+    'messages': 'H'
+}
+
+# Bracketed rule attributes of a section H 'Message:' line, e.g. [id "942100"] [tag "attack-sqli"]
+RULE_ATTRIBUTE_PATTERN = re.compile(r'\[(\w+) "((?:[^"\\]|\\.)*)"\]')
+
+# CRS anomaly evaluation rules report the score in their msg/data attributes
+ANOMALY_SCORE_PATTERN = re.compile(r'Total (?:Inbound |Outbound )?Score: (\d+)', re.IGNORECASE)
+
+# libmodsecurity 3.x JSON logs report severity as a number
+SEVERITY_NAMES = {
+    '0': 'EMERGENCY',
+    '1': 'ALERT',
+    '2': 'CRITICAL',
+    '3': 'ERROR',
+    '4': 'WARNING',
+    '5': 'NOTICE',
+    '6': 'INFO',
+    '7': 'DEBUG'
+}
+
+# name=value pairs after the ';' of a Stopwatch line
+STOPWATCH_FIELD_PATTERN = re.compile(r'(\w+)=(\d+)')
+
+# The full layout ModSecurity 2.x writes, matched in one go before the generic parse
+STOPWATCH_FIELDS = ('start', 'duration', 'combined', 'p1', 'p2', 'p3', 'p4', 'p5', 'sr', 'sw', 'l', 'gc')
+STOPWATCH_LINE_PATTERN = re.compile(
+    r'[^:]*:\s*(\d+) (\d+); combined=(\d+), p1=(\d+), p2=(\d+), p3=(\d+), p4=(\d+), p5=(\d+), '
+    r'sr=(\d+), sw=(\d+), l=(\d+), gc=(\d+)\s*$'
+)
+
+# Stopwatch phases that add up to the time spent inside ModSecurity
+STOPWATCH_PHASES = ('p1', 'p2', 'p3', 'p4', 'p5')
+
+# Latency analytics keep one sketch per path for at most this many paths; the rest share one
+LATENCY_MAX_PATHS = 200
+
+# Native audit log parsing works on bytes: a block is cut at every line starting with '--',
+# and a piece is a section if its first line is the rest of a boundary line
+BOUNDARY_PREFIX = b'\n--'
+BOUNDARY_HEADER_PATTERN = re.compile(rb'([0-9a-fA-F]+)-([A-Z])--')
+NATIVE_SECTION_NAMES = {bytes([letter]): chr(letter) for letter in range(ord('A'), ord('Z') + 1)}
+NETWORK_PATTERN = re.compile(r'(\d+\.\d+\.\d+\.\d+)\s+(\d+)\s+(\d+\.\d+\.\d+\.\d+)\s+(\d+)')
+H_RAW_MESSAGE_PREFIXES = ('message:', 'apache-error:', 'apache-handler:', 'stopwatch:', 'producer:',
+                          'server:', 'engine-mode:')
+H_PREFIX_LENGTH = max(len(prefix) for prefix in H_RAW_MESSAGE_PREFIXES)
+
+# A full native parse hides what it has built from the garbage collector every this many sections
+FREEZE_INTERVAL_SECTIONS = 1000
+
+# Parses inside _frozen_results; the last one to finish unfreezes the collector's permanent generation
+_freeze_lock = threading.Lock()
+_freezing_parses = 0
+_unfreeze_when_done = True
+
+# Concurrent-mode datasets (one file per transaction) are stored as directories with this suffix
+CONCURRENT_DATASET_SUFFIX = '.concurrent'
+
+# Concurrent-mode files are read on a thread pool and parsed in batches on a process pool
+CONCURRENT_IO_THREADS = 16
+CONCURRENT_BATCH_FILES = 250
+CONCURRENT_PARALLEL_MIN_FILES = 1000
+
+
+@lru_cache(maxsize=256)
+def _clf_date_iso(date):
+    """'29/Jun/2023' as '2023-06-29', or None if it is not a valid date."""
+    try:
+        day, month, year = date.split('/')
+        return datetime(int(year), MONTHS[month], int(day)).date().isoformat()
+    except (ValueError, KeyError):
+        return None
+
+
+def _fast_clf_datetime(date, time):
+    """
+    datetime.strptime(f"{date} {time}", '%d/%b/%Y %H:%M:%S').isoformat() for the
+    fixed-width case ModSecurity writes; returns None to fall back to strptime.
+    """
+    try:
+        day, month, year = date.split('/')
+        hour, minute, second = time.split(':')
+        fields = day + year + hour + minute + second
+        if len(fields) != 12 or not (fields.isascii() and fields.isdigit()):
+            return None
+        if len(day) == 2 and len(hour) == len(minute) == len(second) == 2:
+            # Dates repeat from one entry to the next, so only they go through datetime
+            date_iso = _clf_date_iso(date)
+            if date_iso is None or hour > '23' or minute > '59' or second > '59':
+                return None
+            return f"{date_iso}T{time}"
+        return datetime(int(year), MONTHS[month], int(day),
+                        int(hour), int(minute), int(second)).isoformat()
+    except (ValueError, KeyError):
+        return None
 
 
 def parse_timestamp_to_iso(timestamp_str):
@@ -15,6 +131,12 @@ def parse_timestamp_to_iso(timestamp_str):
         return None
     
     try:
+        # The fixed-width form ModSecurity writes: 29/Jun/2023:21:44:15[.ffffff] [zone]
+        if timestamp_str[2:3] == '/' and timestamp_str[11:12] == ':' and timestamp_str[20:21] in ('', ' ', '.'):
+            iso_timestamp = _fast_clf_datetime(timestamp_str[:11], timestamp_str[12:20])
+            if iso_timestamp:
+                return iso_timestamp
+        
         # Handle common ModSecurity timestamp formats
         # Example: "29/Jun/2023:21:44:15 +0000" or "28/Jul/2025:07:01:09.941362 --0700"
         if '/' in timestamp_str and ':' in timestamp_str:
@@ -31,6 +153,9 @@ def parse_timestamp_to_iso(timestamp_str):
                 
                 # Parse the date and time
                 if '/' in date and len(date_time) >= 3:
+                    iso_timestamp = _fast_clf_datetime(date, time)
+                    if iso_timestamp:
+                        return iso_timestamp
                     try:
                         # Parse format: 29/Jun/2023 21:44:15
                         dt = datetime.strptime(f"{date} {time}", '%d/%b/%Y %H:%M:%S')
@@ -75,225 +200,731 @@ def format_timestamp_for_display(iso_timestamp):
         return str(iso_timestamp)
 
 
+def detect_audit_log_format(log_path):
+    """
+    Detect whether a ModSecurity audit log uses the native or JSON format.
+    
+    SecAuditLogFormat JSON writes one JSON object per line, so the first
+    non-empty line is enough to tell them apart.
+    """
+    with open(log_path, 'rb') as f:
+        for line in f:
+            stripped = line.lstrip()
+            if stripped:
+                return 'json' if stripped.startswith(b'{') else 'native'
+    return 'native'
+
+
+def parse_rule_attributes(message_line):
+    """
+    Extract every bracketed attribute of a 'Message:' line in a single scan.
+    
+    Repeated tags are collected into a list; severity is normalized to its
+    name and the CRS anomaly score is pulled out of msg/data when present.
+    
+    Returns:
+        dict: Rule attributes (id, msg, severity, tags, data, file, line, ...)
+    """
+    rule = {'tags': []}
+    for name, value in RULE_ATTRIBUTE_PATTERN.findall(message_line):
+        if name == 'tag':
+            rule['tags'].append(value)
+        elif name not in rule:
+            rule[name] = value
+    
+    if 'severity' in rule:
+        rule['severity'] = SEVERITY_NAMES.get(rule['severity'], rule['severity'])
+    score_match = ANOMALY_SCORE_PATTERN.search(rule.get('msg', '')) or ANOMALY_SCORE_PATTERN.search(rule.get('data', ''))
+    rule['anomaly_score'] = int(score_match.group(1)) if score_match else None
+    return rule
+
+
+def parse_stopwatch(line):
+    """
+    Parse the timings of a section H 'Stopwatch:'/'Stopwatch2:' line.
+    
+    Format: "Stopwatch2: <start> <duration>; combined=3000, p1=100, p2=2500, ..."
+    All values are microseconds. When combined is missing it is the sum of the phases.
+    
+    Returns:
+        dict: Integer timings keyed by name (start, duration, combined, p1..p5, sr, sw, l, gc)
+    """
+    line_match = STOPWATCH_LINE_PATTERN.match(line)
+    if line_match:
+        return dict(zip(STOPWATCH_FIELDS, map(int, line_match.groups())))
+    
+    timings = {}
+    rest = line.split(':', 1)[1] if ':' in line else line
+    head, separator, tail = rest.partition(';')
+    if not separator and '=' in head:
+        head, tail = '', head
+    
+    values = head.split()
+    for name, value in zip(('start', 'duration'), values):
+        if value.isdigit():
+            timings[name] = int(value)
+    for name, value in STOPWATCH_FIELD_PATTERN.findall(tail):
+        timings[name] = int(value)
+    
+    if 'combined' not in timings and any(phase in timings for phase in STOPWATCH_PHASES):
+        timings['combined'] = sum(timings.get(phase, 0) for phase in STOPWATCH_PHASES)
+    return timings
+
+
+def _format_json_rule_message(message, details):
+    """Rebuild a native-style 'Message:' line from a libmodsecurity v3 JSON message."""
+    parts = [f"Message: {message}"]
+    for key, name in (('file', 'file'), ('lineNumber', 'line'), ('ruleId', 'id'), ('rev', 'rev')):
+        if details.get(key):
+            parts.append(f'[{name} "{details[key]}"]')
+    parts.append(f'[msg "{message}"]')
+    for key in ('data', 'severity', 'ver', 'maturity', 'accuracy'):
+        if details.get(key):
+            parts.append(f'[{key} "{details[key]}"]')
+    for tag in details.get('tags') or []:
+        parts.append(f'[tag "{tag}"]')
+    return ' '.join(parts)
+
+
+def json_record_to_transaction(record):
+    """
+    Map one JSON audit log record (ModSecurity 2.x or libmodsecurity 3.x layout)
+    onto the transaction shape produced by the native parser.
+    
+    Only the fields the dashboards use are copied; headers and bodies are dropped.
+    """
+    transaction = record.get('transaction') or {}
+    messages = []
+    raw_messages = []
+    rule_hits = []
+    timings = None
+    
+    if 'request' in transaction or 'unique_id' in transaction:
+        # libmodsecurity 3.x: everything is nested under "transaction"
+        request_data = transaction.get('request') or {}
+        response_data = transaction.get('response') or {}
+        http_version = request_data.get('http_version')
+        protocol = f"HTTP/{http_version}" if http_version else 'HTTP/1.1'
+        
+        transaction_id = transaction.get('unique_id') or 'N/A'
+        raw_timestamp = transaction.get('time_stamp')
+        source_ip = transaction.get('client_ip')
+        source_port = transaction.get('client_port')
+        destination_port = transaction.get('host_port')
+        request_line = None
+        if request_data.get('method') or request_data.get('uri'):
+            request_line = f"{request_data.get('method', '')} {request_data.get('uri', '')} {protocol}".strip()
+        response_status = None
+        if response_data.get('http_code'):
+            response_status = f"{protocol} {response_data['http_code']}"
+        
+        for item in transaction.get('messages') or []:
+            message = item.get('message', '')
+            raw_message = _format_json_rule_message(message, item.get('details') or {})
+            raw_messages.append(raw_message)
+            rule = parse_rule_attributes(raw_message)
+            if rule.get('id'):
+                rule_hits.append(rule)
+            if message:
+                messages.append(message)
+        
+        section_list = sorted({JSON_SECTION_KEYS[key] for key in ('request', 'response', 'messages')
+                               if transaction.get(key)} | {'A'})
+    else:
+        # ModSecurity 2.x: one top-level key per audit log part
+        request_data = record.get('request') or {}
+        response_data = record.get('response') or {}
+        audit_data = record.get('audit_data') or {}
+        
+        transaction_id = transaction.get('transaction_id') or 'N/A'
+        raw_timestamp = transaction.get('time')
+        source_ip = transaction.get('remote_address')
+        source_port = transaction.get('remote_port')
+        destination_port = transaction.get('local_port')
+        request_line = request_data.get('request_line')
+        response_status = None
+        if response_data.get('status'):
+            response_status = f"{response_data.get('protocol', 'HTTP/1.1')} {response_data['status']}"
+        
+        for message in audit_data.get('messages') or []:
+            raw_messages.append(f"Message: {message}")
+            rule = parse_rule_attributes(message)
+            if rule.get('msg') is not None:
+                messages.append(rule['msg'])
+            if rule.get('id'):
+                rule_hits.append(rule)
+        for message in audit_data.get('error_messages') or []:
+            raw_messages.append(f"Apache-Error: {message}")
+        if audit_data.get('handler'):
+            raw_messages.append(f"Apache-Handler: {audit_data['handler']}")
+        stopwatch = audit_data.get('stopwatch')
+        if isinstance(stopwatch, dict):
+            raw_messages.append("Stopwatch2: " + ', '.join(f"{key}={value}" for key, value in stopwatch.items()))
+            timings = parse_stopwatch(raw_messages[-1])
+        if audit_data.get('producer'):
+            producer = audit_data['producer']
+            raw_messages.append("Producer: " + ('; '.join(producer) if isinstance(producer, list) else str(producer)))
+        if audit_data.get('server'):
+            raw_messages.append(f"Server: {audit_data['server']}")
+        if audit_data.get('engine_mode'):
+            raw_messages.append(f"Engine-Mode: \"{audit_data['engine_mode']}\"")
+        
+        section_list = sorted({JSON_SECTION_KEYS[key] for key in record if key in JSON_SECTION_KEYS})
+    
+    iso_timestamp = parse_timestamp_to_iso(raw_timestamp) if raw_timestamp else None
+    if raw_timestamp and not iso_timestamp:
+        try:
+            # libmodsecurity 3.x writes ctime-style timestamps: "Mon Jul 28 07:01:09 2025"
+            iso_timestamp = datetime.strptime(raw_timestamp, '%a %b %d %H:%M:%S %Y').isoformat()
+        except ValueError:
+            pass
+    
+    return {
+        "id": transaction_id,
+        "timestamp": iso_timestamp,
+        "display_timestamp": format_timestamp_for_display(iso_timestamp),
+        "source_ip": source_ip or "N/A",
+        "source_port": str(source_port) if source_port is not None else "N/A",
+        "destination_port": str(destination_port) if destination_port is not None else "N/A",
+        "request_line": request_line or "N/A",
+        "response_status": response_status or "N/A",
+        "messages": messages,
+        "raw_messages": raw_messages,
+        "rule_hits": rule_hits,
+        "stopwatch": timings,
+        "sections": {},
+        "section_count": len(section_list),
+        "section_list": section_list
+    }
+
+
+def iter_json_transactions(lines, source='JSON audit log'):
+    """
+    Decode JSON audit log lines one at a time, yielding each transaction.
+    
+    Args:
+        lines: Iterable of text lines, one JSON object per line
+        source: Name used in warning messages
+    """
+    failed_lines = 0
+    decode = json.JSONDecoder().decode
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            transaction = json_record_to_transaction(decode(line))
+        except (ValueError, AttributeError, TypeError):
+            failed_lines += 1
+            continue
+        yield transaction
+    
+    if failed_lines:
+        logging.warning(f"Skipped {failed_lines} undecodable lines in {source}")
+
+
+def parse_json_lines(lines, source='JSON audit log'):
+    """
+    Decode JSON audit log lines one at a time into transactions.
+    
+    Args:
+        lines: Iterable of text lines, one JSON object per line
+        source: Name used in warning messages
+    """
+    return list(iter_json_transactions(lines, source))
+
+
+def _parse_json_chunk(args):
+    """Process pool worker: decode the byte range [start, end) of a JSON audit log."""
+    log_path, start, end = args
+    with MappedLogFile(log_path) as log_file:
+        return parse_json_lines(log_file.read_text(start, end).splitlines(), log_path)
+
+
+def parse_modsec_json_log(log_path, workers=None):
+    """
+    Parse a ModSecurity JSON audit log (SecAuditLogFormat JSON).
+    
+    Large files are split into newline-aligned chunks and decoded in a process pool.
+    
+    Args:
+        log_path: Path to the log file
+        workers: Process pool size (default: CPU count)
+    """
+    with MappedLogFile(log_path) as log_file:
+        if log_file.size < JSON_PARALLEL_MIN_BYTES:
+            return parse_json_lines(log_file.iter_text_lines(), log_path)
+        tasks = [(log_path, start, end) for start, end in log_file.chunk_boundaries()]
+    
+    transactions = []
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(tasks))) as executor:
+        for chunk_transactions in executor.map(_parse_json_chunk, tasks):
+            transactions.extend(chunk_transactions)
+    return transactions
+
+
+@lru_cache(maxsize=256)
+def _display_day(iso_date):
+    """The day part ('29 Jun') of format_timestamp_for_display for a YYYY-MM-DD date."""
+    return datetime.fromisoformat(iso_date).strftime('%d %b')
+
+
+def _set_native_timestamp(transaction, section_data, line):
+    """Take the timestamp from the first [...] of a line; returns the offset after its ']' (0 without one)."""
+    start = line.find('[')
+    end = line.find(']', start + 1)
+    if start >= 0 and end >= 0:
+        iso_timestamp = parse_timestamp_to_iso(line[start + 1:end])
+        if iso_timestamp and len(iso_timestamp) == 19:
+            # Plain YYYY-MM-DDTHH:MM:SS: only the day needs datetime formatting
+            display_timestamp = f"{_display_day(iso_timestamp[:10])} {iso_timestamp[11:16]}"
+        else:
+            display_timestamp = format_timestamp_for_display(iso_timestamp)
+        transaction['timestamp'] = iso_timestamp
+        transaction['display_timestamp'] = display_timestamp
+        section_data['timestamp'] = iso_timestamp
+        section_data['display_timestamp'] = display_timestamp
+        return end + 1
+    return 0
+
+
+def _handle_native_section_a(transaction, section_data, content, log_path):
+    """Section A: [timestamp] unique_id source_ip source_port dest_ip dest_port"""
+    for line in content:
+        try:
+            network_from = 0
+            if '[' in line:
+                network_from = _set_native_timestamp(transaction, section_data, line)
+            
+            # Look for network information pattern: IP PORT IP PORT
+            # This handles lines like: "165.154.182.179 40660 10.0.1.57 80"
+            if '.' in line:
+                # A match cannot span the ']' of the timestamp, so unless enough dots
+                # precede it the search can start after the timestamp
+                if line.count('.', 0, network_from) >= 6:
+                    network_from = 0
+                network_match = NETWORK_PATTERN.search(line, network_from)
+                if network_match:
+                    source_ip, source_port, _, dest_port = network_match.groups()
+                    transaction['source_ip'] = source_ip
+                    transaction['source_port'] = source_port
+                    transaction['destination_port'] = dest_port
+                    section_data['source_ip'] = source_ip
+                    section_data['source_port'] = source_port
+                    section_data['destination_port'] = dest_port
+        except Exception as e:
+            logging.warning(f"Error parsing line in {log_path}: {str(e)}")
+
+
+def _handle_native_section_b(transaction, section_data, content, log_path):
+    """Section B: the request line comes first, a Source: header is a fallback for the client address."""
+    if not content:
+        return
+    section_data['request_line'] = content[0]
+    # Use first request line as main request line
+    if transaction['request_line'] == 'N/A':
+        transaction['request_line'] = content[0]
+    
+    for line in content:
+        # First-character test before building the lowercased prefix
+        if line[0] not in 'sS' or line[:7].lower() != 'source:':
+            continue
+        parts = line.split(' ')
+        ip_port = parts[1] if len(parts) > 1 else 'N/A'
+        if ':' in ip_port:
+            ip, port = ip_port.split(':', 1)
+            if transaction['source_ip'] == 'N/A':
+                transaction['source_ip'] = ip
+                section_data['source_ip'] = ip
+            if transaction['source_port'] == 'N/A':
+                transaction['source_port'] = port
+                section_data['source_port'] = port
+        elif transaction['source_ip'] == 'N/A':
+            transaction['source_ip'] = ip_port
+            section_data['source_ip'] = ip_port
+
+
+def _handle_native_section_f(transaction, section_data, content, log_path):
+    """Section F: the response status line."""
+    for line in content:
+        if line[0] in 'hH' and line[:5].lower() == 'http/':
+            section_data['response_status'] = line
+            # Use first response status as main status
+            if transaction['response_status'] == 'N/A':
+                transaction['response_status'] = line
+
+
+def _handle_native_section_h(transaction, section_data, content, log_path):
+    """Section H: rule messages, Stopwatch timings and server metadata."""
+    stopwatch_values = None
+    for line in content:
+        prefix = line[:H_PREFIX_LENGTH].lower()
+        try:
+            # Stopwatch2 carries the per-phase breakdown, Stopwatch only start and duration
+            # (ModSecurity 2.x often writes both with the same values, which only need parsing once)
+            if prefix.startswith('stopwatch') and line.partition(':')[2] != stopwatch_values:
+                stopwatch_values = line.partition(':')[2] or None
+                timings = parse_stopwatch(line)
+                if transaction['stopwatch']:
+                    transaction['stopwatch'].update(timings)
+                else:
+                    transaction['stopwatch'] = timings
+            
+            if prefix.startswith(H_RAW_MESSAGE_PREFIXES):
+                # Store the full raw line for modal display
+                transaction['raw_messages'].append(line)
+                
+                # Also extract the parsed message for table display
+                if prefix.startswith('message:'):
+                    rule = parse_rule_attributes(line)
+                    if rule.get('msg') is not None:
+                        section_data['messages'].append(rule['msg'])
+                        transaction['messages'].append(rule['msg'])
+                    if rule.get('id'):
+                        transaction['rule_hits'].append(rule)
+        except Exception as e:
+            logging.warning(f"Error parsing line in {log_path}: {str(e)}")
+
+
+# Per-section handlers, called once with the stripped lines of the section;
+# other sections only keep their raw content
+NATIVE_SECTION_HANDLERS = {
+    'A': _handle_native_section_a,
+    'B': _handle_native_section_b,
+    'F': _handle_native_section_f,
+    'H': _handle_native_section_h
+}
+
+
+def parse_native_blocks(blocks, log_path='audit log'):
+    """
+    Parse a native-format ModSecurity audit log into transactions.
+    
+    Blocks are scanned as bytes: boundaries are found with one split per block
+    at every line starting with '--', and each section is decoded on its own, so
+    text outside of sections is never decoded. Each section body is split and
+    stripped in one pass, and only sections with extracted fields (A, B, F, H)
+    are handed to their handler; the other sections are just kept as content.
+    
+    Args:
+        blocks: Iterable of byte blocks with LF line endings, each ending at a line boundary
+        log_path: Name used in warning messages
+    
+    Returns:
+        list: Transactions in order of first appearance
+    """
+    transactions = {}  # Dictionary to group by transaction ID
+    pending = b''
+    with _frozen_results() as freeze:
+        for block in blocks:
+            pending = _scan_native_sections(transactions, pending + block, log_path, final=False, freeze=freeze)
+        _scan_native_sections(transactions, pending, log_path, final=True)
+
+    return list(transactions.values())
+
+
+def iter_native_transactions(blocks, log_path='audit log'):
+    """
+    Parse a native-format audit log, yielding each transaction once it is complete.
+    
+    A transaction is handed over (and forgotten) as soon as its section Z has
+    been scanned, so memory stays bounded by the block size and the number of
+    open transactions rather than by the size of the log. Transactions come out
+    roughly in file order; any left without a section Z are yielded at the end.
+    Unlike parse_native_blocks, sections repeating an ID after its section Z
+    start a new transaction.
+    
+    Args:
+        blocks: Iterable of byte blocks with LF line endings, each ending at a line boundary
+        log_path: Name used in warning messages
+    """
+    transactions = {}
+    pending = b''
+    for block in blocks:
+        pending = _scan_native_sections(transactions, pending + block, log_path, final=False)
+        for transaction_id in [transaction_id for transaction_id, transaction in transactions.items()
+                               if 'Z' in transaction['sections']]:
+            yield transactions.pop(transaction_id)
+    _scan_native_sections(transactions, pending, log_path, final=True)
+    yield from transactions.values()
+
+
+@contextmanager
+def _frozen_results():
+    """
+    Let a parse hide the transactions it has finished from the cyclic garbage collector.
+    
+    Every full collection would otherwise walk the whole growing result again,
+    which costs more than the parse itself on large logs. The yielded function
+    moves everything allocated so far into the permanent generation with
+    gc.freeze(); collection keeps running for new objects in every thread, and
+    the last of several overlapping parses to finish unfreezes, unless objects
+    were already frozen by someone else (e.g. before forking workers).
+    """
+    global _freezing_parses, _unfreeze_when_done
+    with _freeze_lock:
+        if not _freezing_parses:
+            _unfreeze_when_done = not gc.get_freeze_count()
+        _freezing_parses += 1
+    try:
+        yield gc.freeze
+    finally:
+        with _freeze_lock:
+            _freezing_parses -= 1
+            if not _freezing_parses and _unfreeze_when_done:
+                gc.unfreeze()
+
+
+def _scan_native_sections(transactions, data, log_path, final, freeze=None):
+    """
+    Parse every complete section of a byte block into transactions.
+    
+    Transactions are keyed by their ID bytes. The last section may continue in
+    the next block, so unless final is set it is left unparsed and returned
+    (starting at its boundary line) to be prepended to the next block. Data
+    before the first boundary is skipped. freeze, if given, is called every
+    FREEZE_INTERVAL_SECTIONS sections (see _frozen_results).
+    """
+    # Cut at every line starting with '--'; a piece that does not start with the
+    # rest of a boundary line is a body line that merely starts with '--'
+    pieces = data.split(BOUNDARY_PREFIX)
+    if data.startswith(b'--'):
+        # Carried-over data starts with the boundary line of the still open section
+        pieces[0] = pieces[0][2:]
+        first = 0
+    else:
+        first = 1
+    
+    match_header = BOUNDARY_HEADER_PATTERN.match
+    open_index = open_match = None
+    added = 0
+    for index in range(first, len(pieces)):
+        match = match_header(pieces[index])
+        if match is not None:
+            if open_match is not None:
+                _add_native_section(transactions, open_match, pieces, open_index, index, log_path)
+                added += 1
+                if freeze is not None and not added % FREEZE_INTERVAL_SECTIONS:
+                    freeze()
+            open_index, open_match = index, match
+    
+    if open_match is None:
+        return b''
+    if not final:
+        return b'--' + BOUNDARY_PREFIX.join(pieces[open_index:])
+    _add_native_section(transactions, open_match, pieces, open_index, len(pieces), log_path)
+    return b''
+
+
+def _add_native_section(transactions, match, pieces, start, end, log_path):
+    """Add the section made of pieces[start:end] (header match of the first piece) to its transaction."""
+    piece = pieces[start] if end == start + 1 else BOUNDARY_PREFIX.join(pieces[start:end])
+    section = NATIVE_SECTION_NAMES[match.group(2)]
+    
+    transaction = transactions.get(match.group(1))
+    if transaction is None:
+        transaction = transactions[match.group(1)] = {
+            "id": match.group(1).decode('ascii'),
+            "timestamp": None,  # Store ISO format for sorting
+            "display_timestamp": "N/A",  # Store display format
+            "source_ip": "N/A",
+            "source_port": "N/A",
+            "destination_port": "N/A",
+            "request_line": "N/A",
+            "response_status": "N/A",
+            "messages": [],
+            "raw_messages": [],  # Store full raw message content
+            "rule_hits": [],  # Bracketed attributes of each rule message
+            "stopwatch": None,  # Parsed Stopwatch/Stopwatch2 timings
+            "sections": {},
+            "section_count": 0,
+            "section_list": []
+        }
+    
+    # Boundary line first, then the body lines; the stripped, non-empty body lines are
+    # stored as the raw content of the section
+    lines = decode_bytes(piece).split('\n')
+    boundary_line = lines[0]
+    lines[0] = ''
+    content = list(filter(None, map(str.strip, lines)))
+    section_data = {
+        "section": section,
+        "content": content,
+        "timestamp": None,
+        "display_timestamp": "N/A",
+        "source_ip": "N/A",
+        "source_port": "N/A",
+        "destination_port": "N/A",
+        "request_line": "N/A",
+        "response_status": "N/A",
+        "messages": []
+    }
+    sections = transaction["sections"]
+    if section not in sections:
+        insort(transaction["section_list"], section)
+        transaction["section_count"] += 1
+    sections[section] = section_data
+    
+    try:
+        # The section A boundary line may carry the timestamp
+        if section == 'A' and '[' in boundary_line:
+            _set_native_timestamp(transaction, section_data, boundary_line)
+    except Exception as e:
+        logging.warning(f"Error parsing line in {log_path}: {str(e)}")
+    
+    handler = NATIVE_SECTION_HANDLERS.get(section)
+    if handler is not None:
+        handler(transaction, section_data, content, log_path)
+
+
+def list_concurrent_audit_files(dataset_path):
+    """
+    List the regular files of a concurrent-mode audit log directory tree.
+    
+    The index file and any other non-audit file are harmless to include: they
+    contain no section boundaries and therefore yield no transactions.
+    
+    Returns:
+        list: (path, size) tuples sorted by path
+    """
+    files = []
+    pending = [dataset_path]
+    while pending:
+        directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    files.append((entry.path, entry.stat(follow_symlinks=False).st_size))
+    files.sort()
+    return files
+
+
+def _parse_native_batch(contents):
+    """Process pool worker: parse the contents of a batch of per-transaction files."""
+    transactions = []
+    for data in contents:
+        transactions.extend(parse_native_blocks([data], 'concurrent audit file'))
+    return transactions
+
+
+def parse_concurrent_audit_files(paths, workers=None):
+    """
+    Parse the per-transaction files of a concurrent-mode audit log.
+    
+    Files are read on a thread pool (the work is dominated by opening many small
+    files) and parsed in batches on a process pool; parsing of one batch overlaps
+    with reading the next. Small datasets are parsed inline.
+    
+    Args:
+        paths: Paths of the per-transaction files
+        workers: Process pool size (default: CPU count)
+    """
+    batches = [paths[i:i + CONCURRENT_BATCH_FILES] for i in range(0, len(paths), CONCURRENT_BATCH_FILES)]
+    transactions = []
+    
+    with ThreadPoolExecutor(max_workers=CONCURRENT_IO_THREADS) as io_pool:
+        if len(paths) < CONCURRENT_PARALLEL_MIN_FILES:
+            for batch in batches:
+                transactions.extend(_parse_native_batch(io_pool.map(read_bytes, batch)))
+            return transactions
+        
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(batches))) as cpu_pool:
+            futures = [cpu_pool.submit(_parse_native_batch, list(io_pool.map(read_bytes, batch)))
+                       for batch in batches]
+            for future in futures:
+                transactions.extend(future.result())
+    return transactions
+
+
+def iter_modsec_transactions(log_path):
+    """
+    Yield the transactions of an audit log (native, JSON or concurrent-mode directory)
+    one at a time, without building the full list or sorting it.
+    
+    Memory use does not grow with the size of the log, which makes this the
+    source for exports. Transactions come out in file order (per-file order for
+    concurrent-mode directories).
+    
+    Args:
+        log_path: Path to the log file or concurrent-mode directory
+    """
+    if os.path.isdir(log_path):
+        for path, _ in list_concurrent_audit_files(log_path):
+            yield from parse_native_blocks([read_bytes(path)], 'concurrent audit file')
+    elif detect_audit_log_format(log_path) == 'json':
+        with MappedLogFile(log_path) as log_file:
+            yield from iter_json_transactions(log_file.iter_text_lines(), log_path)
+    else:
+        with MappedLogFile(log_path) as log_file:
+            yield from iter_native_transactions(log_file.iter_byte_blocks(), log_path)
+
+
 def parse_modsec_log(log_path, max_file_size_mb=1024):
     """
     Parses a ModSecurity audit log file and groups sections by transaction ID.
+    JSON audit logs (SecAuditLogFormat JSON) are detected and decoded line by line,
+    and a directory is treated as a concurrent-mode audit log (one file per transaction).
     
     Args:
-        log_path: Path to the log file
+        log_path: Path to the log file or concurrent-mode directory
         max_file_size_mb: Maximum file size in MB (default: 1024MB = 1GB)
+    
+    Raises:
+        admission.AdmissionError: No memory could be reserved for the parse
     """
     if not os.path.exists(log_path):
         return {"error": "Log file not found."}
     
+    is_dataset = os.path.isdir(log_path)
+    
     # Check file size to prevent memory exhaustion
     try:
-        file_size = os.path.getsize(log_path)
+        if is_dataset:
+            dataset_files = list_concurrent_audit_files(log_path)
+            file_size = sum(size for _, size in dataset_files)
+        else:
+            file_size = os.path.getsize(log_path)
         max_size_bytes = max_file_size_mb * 1024 * 1024
         if file_size > max_size_bytes:
             return {"error": f"File size ({file_size / (1024*1024):.1f}MB) exceeds maximum allowed size ({max_file_size_mb}MB)."}
+        log_format = 'concurrent' if is_dataset else detect_audit_log_format(log_path)
     except OSError as e:
         return {"error": f"Unable to check file size: {str(e)}"}
     
-    # Check available memory to prevent exhaustion
-    try:
-        memory = psutil.virtual_memory()
-        available_mb = memory.available / (1024 * 1024)
-        file_size_mb = file_size / (1024 * 1024)
+    # Reserve memory with the admission controller, which accounts for parses already running
+    with admission.admit(log_path, 'modsecurity', log_format, file_size):
+        result = _parse_admitted(log_path, log_format, dataset_files if is_dataset else None)
+        if isinstance(result, dict):
+            return result
         
-        # Require at least 3x the file size in available memory for safe processing
-        # This accounts for Python object overhead and parsing structures
-        required_memory_mb = file_size_mb * 3
-        
-        if available_mb < required_memory_mb:
-            return {"error": f"Insufficient memory. Available: {available_mb:.0f}MB, Required: {required_memory_mb:.0f}MB (3x file size for safe processing)."}
-            
-        logging.info(f"Memory check passed. Available: {available_mb:.0f}MB, File: {file_size_mb:.1f}MB")
-    except ImportError:
-        logging.warning("psutil not available, skipping memory check")
-    except Exception as e:
-        logging.warning(f"Memory check failed: {str(e)}")
+        # Sort by timestamp (newest first) - use ISO timestamp for proper sorting
+        result.sort(key=lambda x: x['timestamp'] or '1900-01-01T00:00:00', reverse=True)
+    
+    return result
 
-    transactions = {}  # Dictionary to group by transaction ID
-    current_transaction_id = None
-    current_part = None
-    current_section_data = None
 
+def _parse_admitted(log_path, log_format, dataset_files):
+    """Parse a log (or dataset) of a known format once memory was reserved; returns transactions or an error dict."""
     try:
-        with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                try:
-                    boundary_match = re.match(r'--([0-9a-fA-F]+)-([A-Z])--', line)
-                    if boundary_match:
-                        transaction_id = boundary_match.group(1)
-                        section = boundary_match.group(2)
-                        
-                        # Initialize transaction if not exists
-                        if transaction_id not in transactions:
-                            transactions[transaction_id] = {
-                                "id": transaction_id,  # Remove dashes
-                                "timestamp": None,  # Store ISO format for sorting
-                                "display_timestamp": "N/A",  # Store display format
-                                "source_ip": "N/A",
-                                "source_port": "N/A",
-                                "destination_port": "N/A",
-                                "request_line": "N/A",
-                                "response_status": "N/A",
-                                "messages": [],
-                                "raw_messages": [],  # Store full raw message content
-                                "sections": {}
-                            }
-                        
-                        # Save previous section data
-                        if current_section_data and current_transaction_id and current_part:
-                            transactions[current_transaction_id]["sections"][current_part] = current_section_data
-                        
-                        current_transaction_id = transaction_id
-                        current_part = section
-                        current_section_data = {
-                            "section": section,
-                            "content": [],
-                            "timestamp": None,
-                            "display_timestamp": "N/A",
-                            "source_ip": "N/A",
-                            "source_port": "N/A",
-                            "destination_port": "N/A",
-                            "request_line": "N/A",
-                            "response_status": "N/A",
-                            "messages": []
-                        }
-                        
-                        # Handle section A boundary line with basic timestamp extraction
-                        if section == 'A':
-                            # Extract timestamp from boundary line if present
-                            timestamp_match = re.search(r'\[(.*?)\]', line)
-                            if timestamp_match:
-                                raw_timestamp = timestamp_match.group(1)
-                                iso_timestamp = parse_timestamp_to_iso(raw_timestamp)
-                                display_timestamp = format_timestamp_for_display(iso_timestamp)
-                                transactions[transaction_id]['timestamp'] = iso_timestamp
-                                transactions[transaction_id]['display_timestamp'] = display_timestamp
-                                current_section_data['timestamp'] = iso_timestamp
-                                current_section_data['display_timestamp'] = display_timestamp
-                        
-                        continue
-
-                    if not current_transaction_id or not current_section_data:
-                        continue
-                    
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    # Store raw content for each section
-                    current_section_data["content"].append(line)
-                    
-                    # Extract main transaction data from appropriate sections
-                    if current_part == 'A':
-                        # In section A, look for network information in content lines
-                        # Format: timestamp unique_id source_ip source_port dest_ip dest_port
-                        # Or: [timestamp] unique_id source_ip source_port dest_ip dest_port
-                        
-                        # First try to extract timestamp if not already set
-                        timestamp_match = re.search(r'\[(.*?)\]', line)
-                        if timestamp_match:
-                            raw_timestamp = timestamp_match.group(1)
-                            iso_timestamp = parse_timestamp_to_iso(raw_timestamp)
-                            display_timestamp = format_timestamp_for_display(iso_timestamp)
-                            transactions[current_transaction_id]['timestamp'] = iso_timestamp
-                            transactions[current_transaction_id]['display_timestamp'] = display_timestamp
-                            current_section_data['timestamp'] = iso_timestamp
-                            current_section_data['display_timestamp'] = display_timestamp
-                        
-                        # Look for network information pattern: IP PORT IP PORT
-                        # This handles lines like: "165.154.182.179 40660 10.0.1.57 80"
-                        network_match = re.search(r'(\d+\.\d+\.\d+\.\d+)\s+(\d+)\s+(\d+\.\d+\.\d+\.\d+)\s+(\d+)', line)
-                        if network_match:
-                            source_ip = network_match.group(1)
-                            source_port = network_match.group(2)
-                            dest_ip = network_match.group(3)  # We'll use this for dest_port extraction
-                            dest_port = network_match.group(4)
-                            
-                            transactions[current_transaction_id]['source_ip'] = source_ip
-                            transactions[current_transaction_id]['source_port'] = source_port
-                            transactions[current_transaction_id]['destination_port'] = dest_port
-                            
-                            current_section_data['source_ip'] = source_ip
-                            current_section_data['source_port'] = source_port
-                            current_section_data['destination_port'] = dest_port
-
-                    elif current_part == 'B':
-                        # Request line is the first line in section B
-                        if current_section_data['request_line'] == 'N/A':
-                            current_section_data['request_line'] = line
-                            # Use first request line as main request line
-                            if transactions[current_transaction_id]['request_line'] == 'N/A':
-                                transactions[current_transaction_id]['request_line'] = line
-                        
-                        # Alternative source IP extraction from section B (fallback)
-                        if line.lower().startswith('source:'):
-                            ip_port = line.split(' ')[1] if len(line.split(' ')) > 1 else 'N/A'
-                            if ':' in ip_port:
-                                ip, port = ip_port.split(':', 1)
-                                if transactions[current_transaction_id]['source_ip'] == 'N/A':
-                                    transactions[current_transaction_id]['source_ip'] = ip
-                                    current_section_data['source_ip'] = ip
-                                if transactions[current_transaction_id]['source_port'] == 'N/A':
-                                    transactions[current_transaction_id]['source_port'] = port
-                                    current_section_data['source_port'] = port
-                            else:
-                                if transactions[current_transaction_id]['source_ip'] == 'N/A':
-                                    transactions[current_transaction_id]['source_ip'] = ip_port
-                                    current_section_data['source_ip'] = ip_port
-
-                    elif current_part == 'F':
-                        # Response status is the first line in section F
-                        if line.lower().startswith('http/'):
-                            current_section_data['response_status'] = line
-                            # Use first response status as main status
-                            if transactions[current_transaction_id]['response_status'] == 'N/A':
-                                transactions[current_transaction_id]['response_status'] = line
-
-                    elif current_part == 'H':
-                        # Messages are in section H - store both raw and parsed content
-                        if line.lower().startswith('message:') or line.lower().startswith('apache-error:') or line.lower().startswith('apache-handler:') or line.lower().startswith('stopwatch:') or line.lower().startswith('producer:') or line.lower().startswith('server:') or line.lower().startswith('engine-mode:'):
-                            # Store the full raw line for modal display
-                            transactions[current_transaction_id]['raw_messages'].append(line)
-                            
-                            # Also extract the parsed message for table display
-                            if line.lower().startswith('message:'):                    
-                                msg_match = re.search(r'\[msg "(.*?)"\]', line)
-                                if msg_match:
-                                    message = msg_match.group(1)
-                                    current_section_data['messages'].append(message)
-                                    transactions[current_transaction_id]['messages'].append(message)
-                
-                except Exception as e:
-                    # Log parsing error for this line but continue processing
-                    logging.warning(f"Error parsing line in {log_path}: {str(e)}")
-                    continue
-
+        if dataset_files is not None:
+            return parse_concurrent_audit_files([path for path, _ in dataset_files])
+        elif log_format == 'json':
+            return parse_modsec_json_log(log_path)
+        else:
+            with MappedLogFile(log_path) as log_file:
+                return parse_native_blocks(log_file.iter_byte_blocks(), log_path)
     except IOError as e:
         return {"error": f"Error reading file: {str(e)}"}
+    except UnicodeDecodeError as e:
+        return {"error": f"Log file is not valid UTF-8: {str(e)}"}
     except Exception as e:
         return {"error": f"Unexpected error while parsing: {str(e)}"}
 
-    # Save the last section
-    if current_section_data and current_transaction_id and current_part:
-        transactions[current_transaction_id]["sections"][current_part] = current_section_data
-
-    # Convert to list and add section count
-    result = []
-    for trans_id, trans_data in transactions.items():
-        trans_data['section_count'] = len(trans_data['sections'])
-        trans_data['section_list'] = sorted(trans_data['sections'].keys())
-        result.append(trans_data)
-    
-    # Sort by timestamp (newest first) - use ISO timestamp for proper sorting
-    result.sort(key=lambda x: x['timestamp'] or '1900-01-01T00:00:00', reverse=True)
-    
-    return result
-
 
 def calculate_timestamp_range_modsec(logs):
     """
@@ -330,52 +961,34 @@ def calculate_timestamp_range_modsec(logs):
     }
 
 
-def get_dashboard_data(logs):
+def status_hour(log_entry):
     """
-    Generate dashboard data from parsed logs.
+    Status code (other than 200) and hour bucket ('29 Jun 21:00') of a transaction
+    for the status timeline, or None if it has no status or timestamp.
     """
-    # Count requests by IP
-    ip_counts = Counter()
-    status_timeline = defaultdict(lambda: defaultdict(int))  # {hour: {status: count}}
-    
-    # Track timestamp range for slider
-    timestamps = []
-    
-    for log_entry in logs:
-        # Count IPs
-        if log_entry['source_ip'] != 'N/A':
-            ip_counts[log_entry['source_ip']] += 1
-        
-        # Collect timestamps for range calculation - use display timestamps for UI
-        if log_entry.get('display_timestamp') and log_entry['display_timestamp'] != 'N/A':
-            timestamps.append(log_entry['display_timestamp'])
-        
-        # Status codes over time (exclude 200)
-        if log_entry['response_status'] != 'N/A' and log_entry.get('timestamp'):
-            try:
-                # Extract status code number
-                status_match = re.search(r'(\d{3})', log_entry['response_status'])
-                if status_match:
-                    status_code = status_match.group(1)
-                    # Exclude 200 status codes
-                    if status_code != '200':
-                        # Use ISO timestamp for proper time bucketing
-                        iso_timestamp = log_entry['timestamp']
-                        if iso_timestamp:
-                            try:
-                                dt = datetime.fromisoformat(iso_timestamp)
-                                # Create hour bucket in display format for consistency
-                                hour_bucket = dt.strftime('%d %b %H:00')
-                                status_timeline[hour_bucket][status_code] += 1
-                            except ValueError:
-                                pass
-            except Exception as e:
-                print(f"Error processing status timeline: {e}")
-    
-    # Get top 10 IPs
-    top_ips = dict(ip_counts.most_common(10))
+    response_status = log_entry.get('response_status')
+    if not isinstance(response_status, str) or response_status == 'N/A' or not log_entry.get('timestamp'):
+        return None
+    # Extract status code number
+    status_match = re.search(r'(\d{3})', response_status)
+    # Exclude 200 status codes
+    if not status_match or status_match.group(1) == '200':
+        return None
+    try:
+        # Use ISO timestamp for proper time bucketing, in display format for consistency
+        dt = datetime.fromisoformat(log_entry['timestamp'])
+    except ValueError:
+        return None
+    return dt.strftime('%d %b %H:00'), status_match.group(1)
+
+
+def format_status_timeline(status_timeline):
+    """
+    Convert {hour bucket: {status: count}} into chart rows with smart date/time labels.
     
-    # Convert timeline to chart format with smart date/time labels
+    Returns:
+        tuple: (timeline rows [{'time': label, <status>: count, ...}], sorted status codes)
+    """
     timeline_data = []
     status_codes = set()
     
@@ -385,7 +998,6 @@ def get_dashboard_data(logs):
         try:
             # Parse format: "29 Jun 21:00"
             # Add current year for parsing
-            from datetime import datetime
             current_year = datetime.now().year
             dt = datetime.strptime(f"{hour_str} {current_year}", '%d %b %H:%M %Y')
             return dt
@@ -421,32 +1033,298 @@ def get_dashboard_data(logs):
             status_codes.add(status)
         timeline_data.append(hour_data)
     
-    # Status codes are already collected in the loop above
+    return timeline_data, sorted(status_codes)
+
+
+def display_timestamp_range(timestamps):
+    """Earliest and latest of display timestamps ('29 Jun 21:44'), or None if there are none."""
+    if not timestamps:
+        return None
     
-    # Determine timestamp range using proper date sorting
-    timestamp_range = None
-    if timestamps:
-        # Sort display timestamps properly
-        def parse_display_timestamp(ts_str):
-            """Parse display timestamp for proper sorting."""
-            try:
-                from datetime import datetime
-                current_year = datetime.now().year
-                # Parse format: "29 Jun 21:44"
-                dt = datetime.strptime(f"{ts_str} {current_year}", '%d %b %H:%M %Y')
-                return dt
-            except ValueError:
-                return datetime(1900, 1, 1)
+    # Sort display timestamps properly
+    def parse_display_timestamp(ts_str):
+        """Parse display timestamp for proper sorting."""
+        try:
+            current_year = datetime.now().year
+            # Parse format: "29 Jun 21:44"
+            dt = datetime.strptime(f"{ts_str} {current_year}", '%d %b %H:%M %Y')
+            return dt
+        except ValueError:
+            return datetime(1900, 1, 1)
+    
+    sorted_timestamps = sorted(timestamps, key=parse_display_timestamp)
+    return {
+        "min": sorted_timestamps[0],
+        "max": sorted_timestamps[-1]
+    }
+
+
+def get_dashboard_data(logs, prefixes=None):
+    """
+    Generate dashboard data from parsed logs.
+    
+    Args:
+        logs: Parsed transactions
+        prefixes: Subnet prefix lengths per address family for top_subnets
+            (default: ip_columns.DEFAULT_PREFIXES)
+    """
+    # Count requests by IP
+    ip_counts = Counter()
+    status_timeline = defaultdict(lambda: defaultdict(int))  # {hour: {status: count}}
+    
+    # Track timestamp range for slider
+    timestamps = []
+    
+    for log_entry in logs:
+        # Count IPs
+        if log_entry['source_ip'] != 'N/A':
+            ip_counts[log_entry['source_ip']] += 1
         
-        sorted_timestamps = sorted(timestamps, key=parse_display_timestamp)
-        timestamp_range = {
-            "min": sorted_timestamps[0],
-            "max": sorted_timestamps[-1]
-        }
+        # Collect timestamps for range calculation - use display timestamps for UI
+        if log_entry.get('display_timestamp') and log_entry['display_timestamp'] != 'N/A':
+            timestamps.append(log_entry['display_timestamp'])
+        
+        # Status codes over time (exclude 200)
+        bucket = status_hour(log_entry)
+        if bucket:
+            status_timeline[bucket[0]][bucket[1]] += 1
+    
+    # Get top 10 IPs
+    top_ips = dict(ip_counts.most_common(10))
+    
+    # Convert timeline to chart format with smart date/time labels
+    timeline_data, status_codes = format_status_timeline(status_timeline)
     
     return {
         "top_ips": top_ips,
+        "top_subnets": IpColumn.from_records(logs, 'source_ip').rollups(prefixes),
         "status_timeline": timeline_data,
-        "status_codes": sorted(list(status_codes)),
-        "timestamp_range": timestamp_range
-    } 
\ No newline at end of file
+        "status_codes": status_codes,
+        "timestamp_range": display_timestamp_range(timestamps)
+    } 
+
+def _request_path(request_line):
+    """Return the path of a request line without its query string."""
+    parts = request_line.split(' ')
+    if len(parts) < 2:
+        return None
+    return parts[1].split('?', 1)[0]
+
+
+def get_rule_analytics(logs, rule_id=None, limit=50):
+    """
+    Aggregate the rule hits of parsed logs per rule id.
+    
+    Args:
+        logs: Parsed transactions
+        rule_id: Drill down into a single rule instead of returning the overview
+        limit: Maximum number of rules (overview) or sample transactions (drill-down)
+    
+    Returns:
+        dict: Overview with per-rule hits, unique IPs, severity and first/last seen,
+              or the drill-down for rule_id ({"error": ...} if it never fired)
+    """
+    rules = {}
+    severity_counts = Counter()
+    tag_counts = Counter()
+    anomaly_scores = Counter()
+    total_hits = 0
+    
+    # Drill-down state, only filled for the requested rule
+    detail_ips = Counter()
+    detail_paths = Counter()
+    detail_statuses = Counter()
+    detail_data = Counter()
+    detail_timeline = Counter()
+    detail_transactions = []
+    
+    for log_entry in logs:
+        transaction_score = None
+        for rule in log_entry.get('rule_hits', []):
+            total_hits += 1
+            current_id = rule['id']
+            timestamp = log_entry.get('timestamp')
+            
+            aggregate = rules.get(current_id)
+            if aggregate is None:
+                aggregate = rules[current_id] = {
+                    'id': current_id,
+                    'msg': rule.get('msg'),
+                    'severity': rule.get('severity'),
+                    'file': rule.get('file'),
+                    'tags': rule['tags'],
+                    'hits': 0,
+                    'transactions': set(),
+                    'ips': set(),
+                    'first_seen': None,
+                    'last_seen': None
+                }
+            aggregate['hits'] += 1
+            aggregate['transactions'].add(log_entry['id'])
+            if log_entry['source_ip'] != 'N/A':
+                aggregate['ips'].add(log_entry['source_ip'])
+            if timestamp:
+                if aggregate['first_seen'] is None or timestamp < aggregate['first_seen']:
+                    aggregate['first_seen'] = timestamp
+                if aggregate['last_seen'] is None or timestamp > aggregate['last_seen']:
+                    aggregate['last_seen'] = timestamp
+            
+            if rule.get('severity'):
+                severity_counts[rule['severity']] += 1
+            tag_counts.update(rule['tags'])
+            if rule['anomaly_score'] is not None:
+                transaction_score = max(transaction_score or 0, rule['anomaly_score'])
+            
+            if rule_id is not None and current_id == rule_id:
+                if log_entry['source_ip'] != 'N/A':
+                    detail_ips[log_entry['source_ip']] += 1
+                path = _request_path(log_entry['request_line'])
+                if path:
+                    detail_paths[path] += 1
+                status_match = re.search(r'(\d{3})', log_entry['response_status'])
+                if status_match:
+                    detail_statuses[status_match.group(1)] += 1
+                if rule.get('data'):
+                    detail_data[rule['data']] += 1
+                if timestamp:
+                    detail_timeline[timestamp[:13]] += 1
+                if len(detail_transactions) < limit:
+                    detail_transactions.append({
+                        'id': log_entry['id'],
+                        'timestamp': timestamp,
+                        'display_timestamp': log_entry.get('display_timestamp', 'N/A'),
+                        'source_ip': log_entry['source_ip'],
+                        'request_line': log_entry['request_line'],
+                        'response_status': log_entry['response_status'],
+                        'data': rule.get('data')
+                    })
+        
+        if transaction_score is not None:
+            anomaly_scores[transaction_score] += 1
+    
+    def rule_summary(aggregate):
+        return {
+            'id': aggregate['id'],
+            'msg': aggregate['msg'],
+            'severity': aggregate['severity'],
+            'file': aggregate['file'],
+            'tags': aggregate['tags'],
+            'hits': aggregate['hits'],
+            'transactions': len(aggregate['transactions']),
+            'unique_ips': len(aggregate['ips']),
+            'first_seen': aggregate['first_seen'],
+            'last_seen': aggregate['last_seen']
+        }
+    
+    if rule_id is not None:
+        if rule_id not in rules:
+            return {"error": f"Rule {rule_id} not found."}
+        timeline = []
+        for hour in sorted(detail_timeline):
+            try:
+                hour_label = datetime.fromisoformat(hour + ':00').strftime('%d %b %H:00')
+            except ValueError:
+                hour_label = hour
+            timeline.append({'time': hour_label, 'hits': detail_timeline[hour]})
+        return {
+            'rule': rule_summary(rules[rule_id]),
+            'top_ips': dict(detail_ips.most_common(10)),
+            'top_paths': dict(detail_paths.most_common(10)),
+            'status_counts': dict(detail_statuses),
+            'top_data': dict(detail_data.most_common(10)),
+            'timeline': timeline,
+            'transactions': detail_transactions
+        }
+    
+    ranked = sorted(rules.values(), key=lambda aggregate: (-aggregate['hits'], aggregate['id']))
+    return {
+        'total_hits': total_hits,
+        'unique_rules': len(rules),
+        'rules': [rule_summary(aggregate) for aggregate in ranked[:limit]],
+        'severity_counts': dict(severity_counts),
+        'top_tags': dict(tag_counts.most_common(20)),
+        'anomaly_scores': {str(score): count for score, count in sorted(anomaly_scores.items())}
+    }
+
+
+def get_latency_analytics(logs, path_limit=20):
+    """
+    Aggregate Stopwatch timings into quantile sketches.
+    
+    Two metrics are tracked: the time spent inside ModSecurity (combined, the
+    sum of phases 1-5) and the whole request duration where the log has it.
+    Sketches are kept per hour, per rule-hit/no-hit and per path, so memory is
+    bounded by the number of buckets rather than the number of transactions.
+    
+    Args:
+        logs: Parsed transactions
+        path_limit: Number of paths to report, slowest p95 first
+    
+    Returns:
+        dict: p50/p95/p99 in milliseconds overall, per hour, per rule hit and per path
+    """
+    def new_pair():
+        return {'waf': QuantileSketch(), 'duration': QuantileSketch()}
+    
+    hourly = defaultdict(new_pair)
+    by_rule_hit = {'hit': new_pair(), 'no_hit': new_pair()}
+    by_path = {}
+    other_paths = new_pair()
+    timed = 0
+    
+    for log_entry in logs:
+        timings = log_entry.get('stopwatch')
+        if not timings:
+            continue
+        waf_time = timings.get('combined')
+        duration = timings.get('duration')
+        if waf_time is None and duration is None:
+            continue
+        timed += 1
+        
+        targets = [by_rule_hit['hit' if log_entry.get('rule_hits') else 'no_hit']]
+        if log_entry.get('timestamp'):
+            targets.append(hourly[log_entry['timestamp'][:13]])
+        path = _request_path(log_entry['request_line'])
+        if path:
+            if path in by_path or len(by_path) < LATENCY_MAX_PATHS:
+                targets.append(by_path.setdefault(path, new_pair()))
+            else:
+                targets.append(other_paths)
+        
+        for pair in targets:
+            if waf_time is not None:
+                pair['waf'].add(waf_time)
+            if duration is not None:
+                pair['duration'].add(duration)
+    
+    def summarize(pair):
+        return {name: sketch.to_dict(scale=1000) for name, sketch in pair.items()}
+    
+    # Every timed transaction is either a hit or a no-hit, so their merge is the overall distribution
+    overall = new_pair()
+    for pair in by_rule_hit.values():
+        for name, sketch in pair.items():
+            overall[name].merge(sketch)
+    
+    timeline = []
+    for hour in sorted(hourly):
+        try:
+            hour_label = datetime.fromisoformat(hour + ':00').strftime('%d %b %H:00')
+        except ValueError:
+            hour_label = hour
+        timeline.append(dict(time=hour_label, **summarize(hourly[hour])))
+    
+    paths = [dict(path=path, **summarize(pair)) for path, pair in by_path.items()]
+    if other_paths['waf'].count or other_paths['duration'].count:
+        paths.append(dict(path='(other)', **summarize(other_paths)))
+    paths.sort(key=lambda item: -(item['waf']['p95'] or item['duration']['p95'] or 0))
+    
+    return {
+        'unit': 'ms',
+        'timed_transactions': timed,
+        'overall': summarize(overall),
+        'timeline': timeline,
+        'rule_hit': {name: summarize(pair) for name, pair in by_rule_hit.items()},
+        'paths': paths[:path_limit]
+    }
@@ -0,0 +1,236 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Parsed datasets kept in memory; the least recently used one is dropped first
+MAX_DATASETS = 2
+
+# Budget for encoded page blobs across all datasets
+MAX_PAGE_BYTES = 64 * 1024 * 1024
+
+# Pages encoded ahead of time after each page request
+PREFETCH_PAGES = 2
+
+# Filtered/sorted views kept per dataset; the least recently used one is dropped first
+MAX_VIEWS = 8
+
+# Same output as jsonify outside debug mode: sorted keys, compact separators, ASCII only
+_encoder = json.JSONEncoder(ensure_ascii=True, sort_keys=True, separators=(',', ':'))
+
+
+def encode_json(value) -> bytes:
+    """Encode a value the way jsonify does."""
+    return _encoder.encode(value).encode('ascii')
+
+
+def stitch_object(fields: Iterable[Tuple[str, bytes]]) -> bytes:
+    """
+    Join pre-encoded values into a JSON object without decoding them again.
+
+    Args:
+        fields: (key, encoded value) pairs; keys are sorted to match jsonify
+
+    Returns:
+        bytes: The encoded object, newline-terminated like jsonify
+    """
+    parts = [encode_json(key) + b':' + value for key, value in sorted(fields)]
+    return b'{' + b','.join(parts) + b'}\n'
+
+
+class CachedDataset:
+    """
+    Parsed entries of one log file plus the encoded blocks derived from them.
+
+    Views are filtered and sorted lists of the entries, built once per
+    (filter, sort) key and kept in an LRU of max_views; encoded blocks such as
+    the stats and derived columns (e.g. packed client addresses) are built
+    once per name.
+    """
+
+    def __init__(self, file_path: str, identity: Hashable, entries: List[Dict], stats: Dict,
+                 max_views: int = MAX_VIEWS, on_view_evicted: Optional[Callable[[Hashable], None]] = None):
+        """
+        Args:
+            max_views (int): Views kept before the least recently used one is dropped
+            on_view_evicted (Callable): Called with the key of each dropped view (e.g. to drop its pages)
+        """
+        self.file_path = file_path
+        self.identity = identity
+        self.entries = entries
+        self.stats = stats
+        self.max_views = max_views
+        self.on_view_evicted = on_view_evicted
+        self._views: 'OrderedDict[Hashable, List[Dict]]' = OrderedDict()
+        self._encoded: Dict[Hashable, bytes] = {}
+        self._columns: Dict[Hashable, object] = {}
+        self._lock = threading.Lock()
+
+    def view(self, view_key: Hashable, build: Callable[[List[Dict]], List[Dict]]) -> List[Dict]:
+        """Return the entries for a (filter, sort) key, building them with build(entries) on first use."""
+        with self._lock:
+            entries = self._views.get(view_key)
+            if entries is not None:
+                self._views.move_to_end(view_key)
+        if entries is None:
+            entries = build(self.entries)
+            evicted = []
+            with self._lock:
+                entries = self._views.setdefault(view_key, entries)
+                self._views.move_to_end(view_key)
+                while len(self._views) > self.max_views:
+                    evicted.append(self._views.popitem(last=False)[0])
+            if self.on_view_evicted is not None:
+                for key in evicted:
+                    self.on_view_evicted(key)
+        return entries
+
+    def has_view(self, view_key: Hashable) -> bool:
+        """Check whether a view is still cached."""
+        with self._lock:
+            return view_key in self._views
+
+    def column(self, name: Hashable, build: Callable[[List[Dict]], object]) -> object:
+        """Return a column derived from the entries, building it with build(entries) on first use."""
+        with self._lock:
+            column = self._columns.get(name)
+        if column is None:
+            column = build(self.entries)
+            with self._lock:
+                column = self._columns.setdefault(name, column)
+        return column
+
+    def encoded(self, name: Hashable, build: Callable[[], object]) -> bytes:
+        """Return an encoded block, encoding build() on first use."""
+        with self._lock:
+            blob = self._encoded.get(name)
+        if blob is None:
+            blob = encode_json(build())
+            with self._lock:
+                blob = self._encoded.setdefault(name, blob)
+        return blob
+
+
+class PageCache:
+    """
+    In-memory cache of parsed log files and their pre-encoded JSON pages.
+
+    Datasets are keyed by file path and replaced when the file identity (size,
+    mtime, inode) changes. Encoded pages are kept in one LRU list bounded by
+    MAX_PAGE_BYTES, so a request for a cached page costs a dictionary lookup
+    and a bytes join instead of a jsonify over up to 1000 entries.
+    """
+
+    def __init__(self, max_datasets: int = MAX_DATASETS, max_page_bytes: int = MAX_PAGE_BYTES):
+        """Initialize an empty cache."""
+        self.max_datasets = max_datasets
+        self.max_page_bytes = max_page_bytes
+        self._lock = threading.Lock()
+        self._datasets: 'OrderedDict[str, CachedDataset]' = OrderedDict()
+        self._pages: 'OrderedDict[Tuple, bytes]' = OrderedDict()
+        self._page_bytes = 0
+
+    def get_dataset(self, file_path: str, identity: Hashable,
+                    load: Callable[[], Tuple[List[Dict], Dict]]) -> CachedDataset:
+        """
+        Return the cached dataset for a file, parsing it with load() if missing or stale.
+
+        Args:
+            file_path (str): Path of the log file
+            identity (Hashable): Current identity of the file; a different value invalidates the cache
+            load (Callable): Returns (entries, stats) for the file
+
+        Returns:
+            CachedDataset: The dataset
+        """
+        with self._lock:
+            dataset = self._datasets.get(file_path)
+            if dataset is not None and dataset.identity == identity:
+                self._datasets.move_to_end(file_path)
+                return dataset
+
+        # Parse outside the lock so other files stay served meanwhile
+        entries, stats = load()
+        dataset = CachedDataset(file_path, identity, entries, stats)
+        dataset.on_view_evicted = lambda view_key: self._drop_view_pages(dataset, view_key)
+        with self._lock:
+            current = self._datasets.get(file_path)
+            if current is not None and current.identity == identity:
+                return current
+            if current is not None:
+                self._drop_pages(current)
+            self._datasets[file_path] = dataset
+            self._datasets.move_to_end(file_path)
+            while len(self._datasets) > self.max_datasets:
+                _, evicted = self._datasets.popitem(last=False)
+                self._drop_pages(evicted)
+                logging.debug(f"Page cache evicted {evicted.file_path}")
+        return dataset
+
+    def _drop_pages(self, dataset: CachedDataset):
+        """Remove the encoded pages of a dataset. Caller holds the lock."""
+        for key in [key for key in self._pages if key[0] is dataset]:
+            self._page_bytes -= len(self._pages.pop(key))
+
+    def _drop_view_pages(self, dataset: CachedDataset, view_key: Hashable):
+        """Remove the encoded pages of one view of a dataset."""
+        with self._lock:
+            for key in [key for key in self._pages if key[0] is dataset and key[1] == view_key]:
+                self._page_bytes -= len(self._pages.pop(key))
+
+    def get_page(self, dataset: CachedDataset, view_key: Hashable, entries: List[Dict],
+                 page: int, limit: int, render_key: Hashable = None,
+                 render: Optional[Callable[[List[Dict]], object]] = None) -> bytes:
+        """
+        Return the encoded entries of one page of a view.
+
+        Args:
+            dataset (CachedDataset): Dataset the view belongs to
+            view_key (Hashable): (filter, sort) key of the view
+            entries (List[Dict]): The view's entries
+            page (int): 1-based page number
+            limit (int): Entries per page
+            render_key (Hashable): Cache key of the render function
+            render (Callable): Reshapes the page's entries before encoding (e.g. a field projection)
+
+        Returns:
+            bytes: JSON encoding of the page's entries
+        """
+        key = (dataset, view_key, page, limit, render_key)
+        with self._lock:
+            blob = self._pages.get(key)
+            if blob is not None:
+                self._pages.move_to_end(key)
+                return blob
+
+        start_idx = (page - 1) * limit
+        page_entries = entries[start_idx:start_idx + limit]
+        blob = encode_json(render(page_entries) if render else page_entries)
+        with self._lock:
+            # Pages of views evicted meanwhile are returned but not kept
+            if (key not in self._pages and self._datasets.get(dataset.file_path) is dataset
+                    and dataset.has_view(view_key)):
+                self._pages[key] = blob
+                self._page_bytes += len(blob)
+                while self._page_bytes > self.max_page_bytes and self._pages:
+                    _, evicted = self._pages.popitem(last=False)
+                    self._page_bytes -= len(evicted)
+        return blob
+
+    def prefetch(self, dataset: CachedDataset, view_key: Hashable, entries: List[Dict],
+                 page: int, limit: int, render_key: Hashable = None,
+                 render: Optional[Callable[[List[Dict]], object]] = None, count: int = PREFETCH_PAGES):
+        """Encode the count pages following page so the next requests are served from the cache."""
+        last_page = (len(entries) + limit - 1) // limit
+        for next_page in range(max(page + 1, 1), min(page + count, last_page) + 1):
+            self.get_page(dataset, view_key, entries, next_page, limit, render_key, render)
+
+    def clear(self, file_path: Optional[str] = None):
+        """Drop one file's dataset and pages, or everything."""
+        with self._lock:
+            paths = [file_path] if file_path else list(self._datasets)
+            for path in paths:
+                dataset = self._datasets.pop(path, None)
+                if dataset is not None:
+                    self._drop_pages(dataset)
@@ -2,12 +2,10 @@ document.addEventListener("DOMContentLoaded", function () {
   // Apache Error Log viewer initialization
 
   // Global variables
-  let currentLogs = [];
   let currentDashboardData = {};
   let charts = {};
   let selectedSeverity = null; // Track which severity level is filtered
-  let logData = []; // Original data
-  let filteredData = []; // Filtered data
+  let columnFilters = {}; // Column input filters sent to the server
   let timestampRange = { min: null, max: null };
   let timestampFilter = { start: null, end: null };
   let currentSort = { column: null, direction: "asc" };
@@ -44,7 +42,9 @@ document.addEventListener("DOMContentLoaded", function () {
           data.files.forEach((file) => {
             const option = document.createElement("option");
             option.value = file.filename;
-            option.textContent = file.display_name || file.filename;
+            option.textContent =
+              (file.display_name || file.filename) +
+              formatFileSummary(file.summary);
             fileSelect.appendChild(option);
           });
 
@@ -63,6 +63,22 @@ document.addEventListener("DOMContentLoaded", function () {
       });
   }
 
+  // Short file picker description built from the upload-time summary manifest
+  function formatFileSummary(summary) {
+    if (!summary) return "";
+
+    const parts = [`${summary.entry_count.toLocaleString()} entries`];
+    const errors = ["emergency", "alert", "critical", "error"].reduce(
+      (total, severity) => total + ((summary.severity_counts || {})[severity] || 0),
+      0
+    );
+    if (errors > 0) {
+      parts.push(`${errors.toLocaleString()} errors`);
+    }
+    parts.push(`${summary.parse_success_rate}% parsed`);
+    return ` (${parts.join(", ")})`;
+  }
+
   function showEmptyState() {
     if (tableBody) {
       tableBody.innerHTML =
@@ -89,10 +105,10 @@ document.addEventListener("DOMContentLoaded", function () {
     selectedSeverity = null;
     timestampRange = { min: null, max: null };
     timestampFilter = { start: null, end: null };
-    const severityInput = document.querySelector('[data-column="severity"]');
-    if (severityInput) {
-      severityInput.value = "";
-    }
+    columnFilters = {};
+    document.querySelectorAll(".column-input").forEach((input) => {
+      input.value = "";
+    });
 
     // Hide filter section initially
     const filterSection = document.getElementById("filterSection");
@@ -101,62 +117,181 @@ document.addEventListener("DOMContentLoaded", function () {
     }
 
     // Load both logs and dashboard data in parallel
+    const logsLoaded = loadApacheErrorLogs(filename);
     Promise.all([
-      loadApacheErrorLogs(filename),
-      loadApacheErrorDashboard(filename),
+      logsLoaded,
+      loadApacheErrorDashboard(filename, logsLoaded),
     ]).catch((error) => {
       console.error("Error loading Apache error data:", error);
     });
   }
 
-  function loadApacheErrorLogs(filename) {
-    if (!filename) return Promise.resolve();
+  // Fields the table, filters and message modal use, sent as columns
+  const LOG_FIELDS = [
+    "timestamp",
+    "severity",
+    "module",
+    "pid",
+    "client_ip",
+    "client_port",
+    "error_code",
+    "message",
+    "line_count",
+  ].join(",");
+
+  // The table shows a server-side view of the file (filters and sort applied
+  // by /api/apache-error/logs); its rows are fetched page by page as it scrolls
+  const PAGE_SIZE = 200;
+  let currentFile = null;
+  let viewRows = []; // Loaded rows of the view, by index
+  let viewTotal = 0; // Rows matching the filters
+  let datasetTotal = 0; // Entries in the file
+  let requestedPages = new Set();
+  let viewGeneration = 0; // Responses for an older view are dropped
+
+  function buildLogsUrl(page) {
+    const params = new URLSearchParams({
+      file: currentFile,
+      page: String(page),
+      limit: String(PAGE_SIZE),
+      format: "columnar",
+      fields: LOG_FIELDS,
+    });
+    if (selectedSeverity) params.set("severity", selectedSeverity);
+    if (
+      timestampFilter.start !== timestampRange.min ||
+      timestampFilter.end !== timestampRange.max
+    ) {
+      if (timestampFilter.start) params.set("start", timestampFilter.start);
+      if (timestampFilter.end) params.set("end", timestampFilter.end);
+    }
+    Object.entries(columnFilters).forEach(([column, value]) => {
+      if (!value) return;
+      // A client IP filter in CIDR notation (10.0.0.0/8) selects a network instead of a substring
+      if (column === "client_ip" && value.includes("/")) {
+        params.set("cidr", value);
+      } else {
+        params.set(column, value);
+      }
+    });
+    if (currentSort.column) {
+      params.set("sort", currentSort.column);
+      params.set("order", currentSort.direction);
+    }
+    return `/api/apache-error/logs?${params}`;
+  }
 
-    const url = `/api/apache-error/logs?file=${encodeURIComponent(
-      filename
-    )}&limit=200`;
+  function fetchLogPage(page) {
+    const generation = viewGeneration;
+    requestedPages.add(page);
 
-    return fetch(url)
+    return fetch(buildLogsUrl(page))
       .then((response) => response.json())
       .then((data) => {
+        if (generation !== viewGeneration) return null;
         if (data.error) {
-          showErrorState(data.error);
-          return;
+          requestedPages.delete(page);
+          throw new Error(data.error);
         }
 
-        // Store logs data globally
-        currentLogs = data.logs || [];
-        logData = [...currentLogs]; // Copy for filtering
-        filteredData = [...logData]; // Copy for filtering
+        const rows = decodeColumnar(data.logs);
+        const offset = (page - 1) * PAGE_SIZE;
+        rows.forEach((row, index) => {
+          viewRows[offset + index] = row;
+        });
+        return data;
+      });
+  }
+
+  // Fetch the pages of rendered rows that are not loaded yet
+  function loadMissingRows(start, end) {
+    for (let index = start; index < end; index++) {
+      if (viewRows[index] !== undefined) continue;
+      const page = Math.floor(index / PAGE_SIZE) + 1;
+      if (!requestedPages.has(page)) {
+        fetchLogPage(page)
+          .then((data) => {
+            if (data) logTable.refresh();
+          })
+          .catch((error) => {
+            console.error("Error fetching Apache error log page:", error);
+          });
+      }
+      index = page * PAGE_SIZE - 1; // Skip to the next page
+    }
+  }
+
+  // Start a new view after the file, filters or sort changed
+  function reloadLogView() {
+    viewGeneration++;
+    viewRows = [];
+    requestedPages = new Set();
+
+    return fetchLogPage(1).then((data) => {
+      if (!data) return null;
+      viewTotal = data.total_count;
+      datasetTotal = data.stats.total_events;
+
+      if (viewTotal === 0) {
+        logTable.showMessage("No error log entries found.");
+      } else {
+        logTable.reset(viewTotal);
+      }
+      updateRecordCounts();
+      return data;
+    });
+  }
+
+  function loadApacheErrorLogs(filename) {
+    if (!filename) return Promise.resolve();
+
+    currentFile = filename;
+
+    return reloadLogView()
+      .then((data) => {
+        if (!data) return;
+
         timestampRange = data.timestamp_range || { min: null, max: null };
 
         // Initialize timestamp slider if we have time range data
         if (timestampRange.min && timestampRange.max) {
           initializeTimestampSlider();
         }
-
-        // Render table
-        renderApacheErrorTable(filteredData, data);
-
-        // Update record counts
-        updateRecordCounts();
       })
       .catch((error) => {
+        if (error.message) {
+          showErrorState(error.message);
+          return;
+        }
         console.error("Error fetching Apache error log data:", error);
         showErrorState("Error loading logs. Please try refreshing the page.");
       });
   }
 
-  function loadApacheErrorDashboard(filename) {
+  // Large files first get a dashboard estimated from samples. The exact one is
+  // requested once the logs are loaded (the file has been parsed by then) and
+  // replaces the estimate when the user asks for it.
+  const sampleNotice = document.getElementById("sampleNotice");
+  const sampleNoticeText = document.getElementById("sampleNoticeText");
+  const exactDashboardButton = document.getElementById("exactDashboardButton");
+  let exactDashboardData = null;
+
+  function fetchDashboard(filename, mode) {
+    const params = new URLSearchParams({ file: filename, mode });
+    return fetch(`/api/apache-error/dashboard?${params}`).then((response) =>
+      response.json()
+    );
+  }
+
+  function loadApacheErrorDashboard(filename, logsLoaded) {
     if (!filename) return Promise.resolve();
 
-    const url = `/api/apache-error/dashboard?file=${encodeURIComponent(
-      filename
-    )}`;
+    exactDashboardData = null;
+    hideSampleNotice();
 
-    return fetch(url)
-      .then((response) => response.json())
+    return fetchDashboard(filename, "sample")
       .then((data) => {
+        if (filename !== currentFile) return;
         if (data.error) {
           console.error("Apache error dashboard error:", data.error);
           return;
@@ -167,119 +302,159 @@ document.addEventListener("DOMContentLoaded", function () {
 
         // Update charts
         updateCharts(data);
+
+        if (!data.sampling) return;
+        showSampleNotice(data.sampling);
+        return logsLoaded
+          .then(() => fetchDashboard(filename, "exact"))
+          .then((exact) => {
+            if (filename !== currentFile || exact.error) return;
+            exactDashboardData = exact;
+            exactDashboardButton.disabled = false;
+            exactDashboardButton.textContent = "Show exact counts";
+          });
       })
       .catch((error) => {
         console.error("Error loading Apache error dashboard:", error);
       });
   }
 
-  function renderApacheErrorTable(logs, metadata) {
-    if (!tableBody) return;
-
-    if (!logs || logs.length === 0) {
-      const emptyRow = document.createElement("tr");
-      const emptyCell = document.createElement("td");
-      emptyCell.setAttribute("colspan", "8");
-      emptyCell.className = "loading";
-      emptyCell.textContent = "No error log entries found.";
-      emptyRow.appendChild(emptyCell);
-      tableBody.innerHTML = ""; // Clear existing data
-      tableBody.appendChild(emptyRow);
-      return;
-    }
+  function showSampleNotice(sampling) {
+    const percent = (sampling.sampled_fraction * 100).toFixed(1);
+    sampleNoticeText.textContent =
+      `Approximate counts, estimated from ${sampling.windows} samples ` +
+      `(${percent}% of the file). Hover a bar for its 95% confidence interval.`;
+    exactDashboardButton.disabled = true;
+    exactDashboardButton.textContent = "Computing exact counts...";
+    sampleNotice.style.display = "flex";
+  }
+
+  function hideSampleNotice() {
+    sampleNotice.style.display = "none";
+  }
 
-    tableBody.innerHTML = ""; // Clear existing data
-
-    logs.forEach((log, logIndex) => {
-      const timestamp = formatTimestamp(log.timestamp);
-      const severity = log.severity || "unknown";
-      const module = log.module || "unknown";
-      const pid = log.pid || "-";
-      const clientIp = log.client_ip || "-";
-      const clientPort = log.client_port || "-";
-      const errorCode = log.error_code || "-";
-      const message = log.message || "";
-      const truncatedMessage =
-        message.substring(0, 100) + (message.length > 100 ? "..." : "");
-
-      const row = document.createElement("tr");
-
-      // Create timestamp cell
-      const timestampCell = document.createElement("td");
-      timestampCell.className = "timestamp";
-      timestampCell.textContent = timestamp;
-
-      // Create severity cell
-      const severityCell = document.createElement("td");
-      severityCell.className = "severity";
-      const severityBadge = document.createElement("span");
-      severityBadge.className = `severity-badge severity-${severity.toLowerCase()}`;
-      severityBadge.textContent = severity;
-      severityCell.appendChild(severityBadge);
-
-      // Create module cell
-      const moduleCell = document.createElement("td");
-      moduleCell.className = "module";
-      moduleCell.textContent = module;
-
-      // Create PID cell
-      const pidCell = document.createElement("td");
-      pidCell.className = "pid";
-      pidCell.textContent = pid;
-
-      // Create client IP cell
-      const clientIpCell = document.createElement("td");
-      clientIpCell.className = "client-ip";
-      clientIpCell.textContent = clientIp;
-
-      // Create client port cell
-      const clientPortCell = document.createElement("td");
-      clientPortCell.className = "client-port";
-      clientPortCell.textContent = clientPort;
-
-      // Create error code cell
-      const errorCodeCell = document.createElement("td");
-      errorCodeCell.className = "error-code";
-      errorCodeCell.textContent = errorCode;
-
-      // Create message cell
-      const messageCell = document.createElement("td");
-      messageCell.className = "message";
-      const messagesContent = document.createElement("div");
-      messagesContent.className = "messages-content";
-
-      const messageText = document.createElement("span");
-      messageText.textContent = truncatedMessage;
-      messagesContent.appendChild(messageText);
-
-      const magnifyIcon = document.createElement("div");
-      magnifyIcon.className = "magnify-icon";
-      magnifyIcon.textContent = "🔍";
-      magnifyIcon.title = "View full details";
-      magnifyIcon.addEventListener("click", () => showLogDetails(logIndex));
-      messagesContent.appendChild(magnifyIcon);
-
-      messageCell.appendChild(messagesContent);
-
-      // Append all cells to row
-      row.appendChild(timestampCell);
-      row.appendChild(severityCell);
-      row.appendChild(moduleCell);
-      row.appendChild(pidCell);
-      row.appendChild(clientIpCell);
-      row.appendChild(clientPortCell);
-      row.appendChild(errorCodeCell);
-      row.appendChild(messageCell);
-
-      tableBody.appendChild(row);
+  exactDashboardButton.addEventListener("click", () => {
+    if (!exactDashboardData) return;
+    currentDashboardData = exactDashboardData;
+    exactDashboardData = null;
+    hideSampleNotice();
+    updateCharts(currentDashboardData);
+  });
+
+  // Only the rows in view are rendered; row elements are reused while scrolling
+  const logTable = new VirtualTable({
+    container: tableBody.closest(".table-container"),
+    tbody: tableBody,
+    columnCount: 8,
+    createRow: createLogRow,
+    updateRow: updateLogRow,
+    getRow: (index) => viewRows[index],
+    onRangeChange: loadMissingRows,
+  });
+
+  function createLogRow() {
+    const row = document.createElement("tr");
+    const cellClasses = [
+      "timestamp",
+      "severity",
+      "module",
+      "pid",
+      "client-ip",
+      "client-port",
+      "error-code",
+      "message",
+    ];
+    cellClasses.forEach((className) => {
+      const cell = document.createElement("td");
+      cell.className = className;
+      row.appendChild(cell);
     });
 
-    // Update pagination info if available
-    if (metadata) {
-      updatePaginationInfo(metadata);
+    row.cells[1].appendChild(document.createElement("span"));
+
+    const messagesContent = document.createElement("div");
+    messagesContent.className = "messages-content";
+    const messageText = document.createElement("span");
+    const lineCount = document.createElement("span");
+    lineCount.className = "line-count";
+    lineCount.title = "Continuation lines merged into this event";
+    const magnifyIcon = document.createElement("div");
+    magnifyIcon.className = "magnify-icon";
+    magnifyIcon.textContent = "🔍";
+    magnifyIcon.title = "View full details";
+    messagesContent.appendChild(messageText);
+    messagesContent.appendChild(lineCount);
+    messagesContent.appendChild(magnifyIcon);
+    row.cells[7].appendChild(messagesContent);
+
+    return row;
+  }
+
+  function updateLogRow(row, log) {
+    const [
+      timestampCell,
+      severityCell,
+      moduleCell,
+      pidCell,
+      clientIpCell,
+      clientPortCell,
+      errorCodeCell,
+      messageCell,
+    ] = row.cells;
+    const severityBadge = severityCell.firstChild;
+    const [messageText, lineCount, magnifyIcon] =
+      messageCell.firstChild.children;
+
+    if (!log) {
+      [
+        timestampCell,
+        moduleCell,
+        pidCell,
+        clientIpCell,
+        clientPortCell,
+        errorCodeCell,
+        messageText,
+        lineCount,
+      ].forEach((element) => (element.textContent = ""));
+      timestampCell.textContent = "Loading...";
+      severityBadge.className = "";
+      severityBadge.textContent = "";
+      lineCount.style.display = "none";
+      magnifyIcon.style.display = "none";
+      return;
+    }
+
+    const severity = log.severity || "unknown";
+    const message = log.message || "";
+    // Multi-line events (stack traces) show their first line; the modal has the rest
+    const firstLine = message.split("\n", 1)[0];
+
+    timestampCell.textContent = formatTimestamp(log.timestamp);
+    severityBadge.className = `severity-badge severity-${severity.toLowerCase()}`;
+    severityBadge.textContent = severity;
+    moduleCell.textContent = log.module || "unknown";
+    pidCell.textContent = log.pid || "-";
+    clientIpCell.textContent = log.client_ip || "-";
+    clientPortCell.textContent = log.client_port || "-";
+    errorCodeCell.textContent = log.error_code || "-";
+    messageText.textContent =
+      firstLine.substring(0, 100) + (firstLine.length > 100 ? "..." : "");
+
+    if (log.line_count > 1) {
+      lineCount.textContent = `+${log.line_count - 1} lines`;
+      lineCount.style.display = "";
+    } else {
+      lineCount.style.display = "none";
     }
+    magnifyIcon.style.display = "";
   }
 
+  // One listener for every row: look up the entry the clicked row shows now
+  tableBody.addEventListener("click", (e) => {
+    if (!e.target.closest(".magnify-icon")) return;
+    showLogDetails(logTable.indexOf(e.target.closest("tr")));
+  });
+
   function formatTimestamp(timestamp) {
     if (!timestamp || timestamp === "N/A") return "N/A";
 
@@ -302,16 +477,13 @@ document.addEventListener("DOMContentLoaded", function () {
     }
   }
 
-  function updatePaginationInfo(metadata) {
-    const paginationInfo = document.querySelector(".pagination-info");
-    if (paginationInfo && metadata.total_count) {
-      const start = (metadata.page - 1) * metadata.limit + 1;
-      const end = Math.min(
-        metadata.page * metadata.limit,
-        metadata.total_count
-      );
-      paginationInfo.textContent = `Showing ${start}-${end} of ${metadata.total_count} entries`;
-    }
+  // Tooltip line with the confidence interval of an estimated count
+  function estimateInterval(getItems) {
+    return (context) => {
+      const item = (getItems() || [])[context.dataIndex];
+      if (!item || item.low === undefined) return "";
+      return `95% CI: ${item.low.toLocaleString()} - ${item.high.toLocaleString()}`;
+    };
   }
 
   // Chart functionality
@@ -355,9 +527,14 @@ document.addEventListener("DOMContentLoaded", function () {
             tooltip: {
               callbacks: {
                 afterLabel: function (context) {
-                  return selectedSeverity === context.label
-                    ? "(Click to remove filter)"
-                    : "(Click to filter)";
+                  const interval = estimateInterval(
+                    () => currentDashboardData.severity_distribution
+                  )(context);
+                  const hint =
+                    selectedSeverity === context.label
+                      ? "(Click to remove filter)"
+                      : "(Click to filter)";
+                  return interval ? [interval, hint] : hint;
                 },
               },
             },
@@ -413,6 +590,13 @@ document.addEventListener("DOMContentLoaded", function () {
           responsive: true,
           plugins: {
             title: { display: true, text: "Top Modules by Error Count" },
+            tooltip: {
+              callbacks: {
+                afterLabel: estimateInterval(
+                  () => currentDashboardData.top_modules
+                ),
+              },
+            },
           },
           scales: {
             y: { beginAtZero: true },
@@ -439,6 +623,13 @@ document.addEventListener("DOMContentLoaded", function () {
           indexAxis: "y",
           plugins: {
             title: { display: true, text: "Most Frequent Error Messages" },
+            tooltip: {
+              callbacks: {
+                afterLabel: estimateInterval(
+                  () => currentDashboardData.frequent_messages
+                ),
+              },
+            },
           },
           scales: {
             x: { beginAtZero: true },
@@ -564,71 +755,23 @@ document.addEventListener("DOMContentLoaded", function () {
     applyFilters();
   }
 
-  function applyFilters() {
-    if (!logData || logData.length === 0) return;
-
-    filteredData = logData.filter((entry) => {
-      // Check timestamp range filter first
-      if (!isTimestampInRange(entry.timestamp)) {
-        return false;
-      }
-
-      // Apply severity filter if one is selected
-      if (selectedSeverity) {
-        const logSeverity = (entry.severity || "").toLowerCase();
-        if (logSeverity !== selectedSeverity.toLowerCase()) {
-          return false;
-        }
-      }
-
-      return true;
-    });
-
-    // Apply current sorting if any
-    if (currentSort.column) {
-      applySorting(currentSort.column, currentSort.direction, false);
-    }
-
-    // Re-render the table with filtered data
-    renderApacheErrorTable(filteredData, {
-      total_count: filteredData.length,
-      page: 1,
-      limit: filteredData.length,
-    });
-
-    // Update record counts
-    updateRecordCounts();
+  // Typing and slider drags fire many input events; each reload filters the
+  // whole file on the server, so wait for a pause before fetching the view
+  const FILTER_DEBOUNCE_MS = 250;
+  let filterTimer = null;
+  function scheduleFilters() {
+    clearTimeout(filterTimer);
+    filterTimer = setTimeout(applyFilters, FILTER_DEBOUNCE_MS);
   }
 
-  function isTimestampInRange(timestamp) {
-    if (!timestampFilter.start || !timestampFilter.end) {
-      return true;
-    }
-
-    // Convert timestamps to Date objects for proper comparison
-    try {
-      const logDate = new Date(timestamp);
-      const startDate = new Date(timestampFilter.start);
-      const endDate = new Date(timestampFilter.end);
-
-      // If any date is invalid, fall back to string comparison
-      if (
-        isNaN(logDate.getTime()) ||
-        isNaN(startDate.getTime()) ||
-        isNaN(endDate.getTime())
-      ) {
-        return (
-          timestamp >= timestampFilter.start && timestamp <= timestampFilter.end
-        );
-      }
+  function applyFilters() {
+    clearTimeout(filterTimer);
+    if (!currentFile) return;
 
-      return logDate >= startDate && logDate <= endDate;
-    } catch (error) {
-      // Fall back to string comparison if date parsing fails
-      return (
-        timestamp >= timestampFilter.start && timestamp <= timestampFilter.end
-      );
-    }
+    reloadLogView().catch((error) => {
+      console.error("Error applying Apache error log filters:", error);
+      showErrorState("Error loading logs. Please try refreshing the page.");
+    });
   }
 
   function clearCharts() {
@@ -653,18 +796,17 @@ document.addEventListener("DOMContentLoaded", function () {
       return;
     }
 
-    const formData = new FormData();
-    formData.append("file", file);
-
     // Show upload progress
     const uploadButton = document.querySelector(".upload-button");
     const originalHTML = uploadButton.innerHTML;
     uploadButton.innerHTML = "<span>Uploading...</span>";
     uploadButton.style.pointerEvents = "none";
 
-    fetch("/api/apache-error/upload", {
+    // Sent as the raw body so the server parses it while it arrives
+    fetch(`/api/apache-error/upload-stream?filename=${encodeURIComponent(file.name)}`, {
       method: "POST",
-      body: formData,
+      headers: { "Content-Type": "application/octet-stream" },
+      body: file,
     })
       .then((response) => response.json())
       .then((data) => {
@@ -703,9 +845,9 @@ document.addEventListener("DOMContentLoaded", function () {
 
   // Global function to show message modal (simplified)
   window.showLogDetails = function (index) {
-    if (!currentLogs[index]) return;
+    if (!viewRows[index]) return;
 
-    const log = currentLogs[index];
+    const log = viewRows[index];
     const messageModal = document.getElementById("messageModal");
     const messageModalBody = document.getElementById("messageModalBody");
 
@@ -755,14 +897,35 @@ document.addEventListener("DOMContentLoaded", function () {
         selectedSeverity = matchingSeverity ? matchingSeverity.severity : value;
       }
 
-      // Filter and re-render table
-      filterAndRenderTable();
+      // Filter and re-render table once typing pauses
+      scheduleFilters();
 
       // Update chart visual feedback
       updateCharts(currentDashboardData);
     });
   }
 
+  // The other column inputs filter on the server by case-insensitive substring
+  const SERVER_FILTER_COLUMNS = [
+    "module",
+    "pid",
+    "client_ip",
+    "client_port",
+    "error_code",
+    "message",
+  ];
+  document.querySelectorAll(".column-input").forEach((input) => {
+    const column = input.getAttribute("data-column");
+    if (!SERVER_FILTER_COLUMNS.includes(column)) return;
+
+    input.addEventListener("input", (e) => {
+      columnFilters[column] = e.target.value.trim();
+
+      // Wait for a pause in typing before fetching the filtered view
+      scheduleFilters();
+    });
+  });
+
   // Add sorting event listeners
   if (sortableHeaders) {
     sortableHeaders.forEach((header) => {
@@ -782,51 +945,10 @@ document.addEventListener("DOMContentLoaded", function () {
     });
   }
 
-  function applySorting(column, direction, updateData = true) {
+  // Sorting happens on the server so it covers every row, not just the loaded pages
+  function applySorting(column, direction) {
     currentSort = { column, direction };
-
-    filteredData.sort((a, b) => {
-      let aVal, bVal;
-
-      if (column === "timestamp") {
-        // Convert timestamps to Date objects for proper sorting
-        aVal = new Date(a[column]);
-        bVal = new Date(b[column]);
-        // If date parsing fails, fall back to string comparison
-        if (isNaN(aVal.getTime()) || isNaN(bVal.getTime())) {
-          aVal = a[column] || "";
-          bVal = b[column] || "";
-        }
-      } else if (column === "pid" || column === "error_code") {
-        aVal = parseInt(a[column]) || 0;
-        bVal = parseInt(b[column]) || 0;
-      } else if (column === "client_ip") {
-        // Sort by combined client IP + port
-        const aClient =
-          (a.client_ip || "") + (a.client_port ? `:${a.client_port}` : "");
-        const bClient =
-          (b.client_ip || "") + (b.client_port ? `:${b.client_port}` : "");
-        aVal = aClient.toLowerCase();
-        bVal = bClient.toLowerCase();
-      } else {
-        aVal = (a[column] || "").toString().toLowerCase();
-        bVal = (b[column] || "").toString().toLowerCase();
-      }
-
-      if (direction === "asc") {
-        return aVal < bVal ? -1 : aVal > bVal ? 1 : 0;
-      } else {
-        return aVal > bVal ? -1 : aVal < bVal ? 1 : 0;
-      }
-    });
-
-    if (updateData) {
-      renderApacheErrorTable(filteredData, {
-        total_count: filteredData.length,
-        page: 1,
-        limit: filteredData.length,
-      });
-    }
+    applyFilters();
 
     // Update sort indicators
     document.querySelectorAll(".sortable-header .sort-icon").forEach((icon) => {
@@ -882,6 +1004,16 @@ document.addEventListener("DOMContentLoaded", function () {
     }
   }
 
+  // Local time as "YYYY-MM-DDTHH:MM:SS", the format of the parsed timestamps
+  function formatIsoTimestamp(time) {
+    const date = new Date(time);
+    const pad = (value) => String(value).padStart(2, "0");
+    return (
+      `${date.getFullYear()}-${pad(date.getMonth() + 1)}-${pad(date.getDate())}` +
+      `T${pad(date.getHours())}:${pad(date.getMinutes())}:${pad(date.getSeconds())}`
+    );
+  }
+
   // Timestamp slider functions
   function initializeTimestampSlider() {
     if (!timestampRange.min || !timestampRange.max) {
@@ -943,19 +1075,21 @@ document.addEventListener("DOMContentLoaded", function () {
       }
     }
 
-    // Convert slider values to timestamps
-    const timestamps = logData
-      .map((log) => log.timestamp)
-      .filter((ts) => ts !== "N/A")
-      .sort();
-
-    if (timestamps.length === 0) return;
+    // Convert slider values to timestamps between the first and last entry
+    // (only a few pages are loaded, so the range is interpolated in time)
+    const minTime = new Date(timestampRange.min).getTime();
+    const maxTime = new Date(timestampRange.max).getTime();
 
-    const startIndex = Math.floor((startValue / 100) * (timestamps.length - 1));
-    const endIndex = Math.floor((endValue / 100) * (timestamps.length - 1));
+    if (isNaN(minTime) || isNaN(maxTime)) return;
 
-    timestampFilter.start = timestamps[startIndex];
-    timestampFilter.end = timestamps[endIndex];
+    timestampFilter.start =
+      startValue === 0
+        ? timestampRange.min
+        : formatIsoTimestamp(minTime + ((maxTime - minTime) * startValue) / 100);
+    timestampFilter.end =
+      endValue === 100
+        ? timestampRange.max
+        : formatIsoTimestamp(minTime + ((maxTime - minTime) * endValue) / 100);
 
     // Update display values with formatted timestamps
     document.getElementById("startValue").textContent =
@@ -967,8 +1101,8 @@ document.addEventListener("DOMContentLoaded", function () {
     // Update visual range
     updateSliderRange();
 
-    // Apply filters
-    applyFilters();
+    // Apply filters once the slider stops moving
+    scheduleFilters();
 
     // Show/hide reset button
     updateResetButton();
@@ -1032,8 +1166,8 @@ document.addEventListener("DOMContentLoaded", function () {
     const filteredRecordsElement = document.getElementById("filteredRecords");
 
     if (totalRecordsElement && filteredRecordsElement) {
-      totalRecordsElement.textContent = logData.length.toLocaleString();
-      filteredRecordsElement.textContent = filteredData.length.toLocaleString();
+      totalRecordsElement.textContent = datasetTotal.toLocaleString();
+      filteredRecordsElement.textContent = viewTotal.toLocaleString();
     }
   }
 
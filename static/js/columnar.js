@@ -0,0 +1,29 @@
+// Decoding of format=columnar /logs responses (see columnar.py)
+
+// Rebuild row objects from one array per field. Dictionary-encoded columns
+// ({dictionary, codes}) are looked up per row, including per-row lists of
+// codes for list columns; plain arrays are used as is.
+function decodeColumnar(table) {
+  if (!table || !table.columns) return table || [];
+
+  const fields = table.fields;
+  const columns = fields.map((field) => table.columns[field]);
+  const rows = new Array(table.count);
+
+  for (let i = 0; i < table.count; i++) {
+    const row = {};
+    for (let j = 0; j < fields.length; j++) {
+      const column = columns[j];
+      if (Array.isArray(column)) {
+        row[fields[j]] = column[i];
+      } else {
+        const code = column.codes[i];
+        row[fields[j]] = Array.isArray(code)
+          ? code.map((item) => column.dictionary[item])
+          : column.dictionary[code];
+      }
+    }
+    rows[i] = row;
+  }
+  return rows;
+}
@@ -0,0 +1,412 @@
+// Data model of the ModSecurity log page, run in a dedicated Web Worker.
+//
+// The worker fetches and decodes /api/modsecurity/logs and keeps the rows as
+// columns, with numeric columns (status codes, ports, hour buckets) in typed
+// arrays. It answers filter/sort queries with counts and chart data, and hands
+// out windows of render-ready rows, so the page never loops over the whole
+// list on the main thread. Chart counts are sent as transferable typed arrays.
+//
+// Messages in:   {type: "load", url, generation}
+//                {type: "query", id, query}
+//                {type: "rows", id, start, end}
+// Messages out:  {type: "loaded", generation, count, timestampRange, topIps}
+//                {type: "result", id, filteredCount, timestampFilter, timeline, rows}
+//                  (timeline is null when the non-status filters did not change)
+//                {type: "rows", id, start, rows}
+//                {type: "error", message}
+
+importScripts("columnar.js");
+
+const MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"];
+const ROW_FIELDS = [
+  "id",
+  "timestamp",
+  "display_timestamp",
+  "source_ip",
+  "source_port",
+  "destination_port",
+  "request_line",
+  "response_status",
+  "messages",
+  "raw_messages",
+];
+const FIRST_WINDOW_ROWS = 100; // Rows sent along with each query result
+
+let model = null;
+let current = null; // Last query and its matches
+let loadGeneration = 0; // Only the latest load request is kept
+
+// Columns -------------------------------------------------------------------
+
+function decodeColumns(table) {
+  // Columnar responses are decoded column by column; a plain list is transposed
+  const columns = {};
+  if (Array.isArray(table)) {
+    ROW_FIELDS.forEach((field) => {
+      columns[field] = table.map((row) => row[field]);
+    });
+    return { count: table.length, columns };
+  }
+  table.fields.forEach((field) => {
+    const column = table.columns[field];
+    if (Array.isArray(column)) {
+      columns[field] = column;
+    } else {
+      columns[field] = column.codes.map((code) =>
+        Array.isArray(code)
+          ? code.map((item) => column.dictionary[item])
+          : column.dictionary[code]
+      );
+    }
+  });
+  return { count: table.count, columns };
+}
+
+function buildModel(data) {
+  const { count, columns } = decodeColumns(data.logs || data);
+  ROW_FIELDS.forEach((field) => {
+    if (!columns[field]) columns[field] = new Array(count).fill(null);
+  });
+
+  const statusCodes = new Uint16Array(count);
+  const sourcePorts = new Int32Array(count);
+  const destinationPorts = new Int32Array(count);
+  const hourBuckets = new Int32Array(count).fill(-1);
+  const bucketKeys = new Map(); // "28 Jul 10:00" -> sort key
+
+  for (let i = 0; i < count; i++) {
+    const statusMatch = String(columns.response_status[i] || "").match(/\d{3}/);
+    statusCodes[i] = statusMatch ? Number(statusMatch[0]) : 0;
+    sourcePorts[i] = parseInt(columns.source_port[i]) || 0;
+    destinationPorts[i] = parseInt(columns.destination_port[i]) || 0;
+
+    // Hour buckets as on the server dashboard: "%d %b %H:00" of the ISO timestamp
+    const time = /^(\d{4})-(\d{2})-(\d{2})[T ](\d{2})/.exec(columns.timestamp[i] || "");
+    if (time) {
+      const bucket = `${time[3]} ${MONTHS[Number(time[2]) - 1]} ${time[4]}:00`;
+      if (!bucketKeys.has(bucket)) {
+        bucketKeys.set(bucket, Number(time[2]) * 10000 + Number(time[3]) * 100 + Number(time[4]));
+      }
+      hourBuckets[i] = bucketKeys.get(bucket);
+    }
+  }
+
+  // Replace sort keys by the index of the bucket in time order
+  const hourLabels = [...bucketKeys.keys()].sort((a, b) => bucketKeys.get(a) - bucketKeys.get(b));
+  const bucketIndex = new Map(hourLabels.map((label, index) => [bucketKeys.get(label), index]));
+  for (let i = 0; i < count; i++) {
+    if (hourBuckets[i] >= 0) hourBuckets[i] = bucketIndex.get(hourBuckets[i]);
+  }
+
+  // Top 10 source IPs, ties in first-seen order like Counter.most_common,
+  // listed in key order like the server's JSON
+  const ipCounts = new Map();
+  columns.source_ip.forEach((ip) => {
+    if (ip !== "N/A") ipCounts.set(ip, (ipCounts.get(ip) || 0) + 1);
+  });
+  const topIps = {};
+  [...ipCounts.entries()]
+    .sort((a, b) => b[1] - a[1])
+    .slice(0, 10)
+    .sort((a, b) => (a[0] < b[0] ? -1 : a[0] > b[0] ? 1 : 0))
+    .forEach(([ip, ipCount]) => {
+      topIps[ip] = ipCount;
+    });
+
+  const sortedTimestamps = columns.display_timestamp
+    .map((value, i) => value || columns.timestamp[i])
+    .filter((value) => value && value !== "N/A")
+    .sort();
+
+  return {
+    count,
+    columns,
+    statusCodes,
+    sourcePorts,
+    destinationPorts,
+    hourBuckets,
+    hourLabels,
+    sortedTimestamps,
+    timestampRange: data.timestamp_range || { min: null, max: null },
+    topIps,
+    searchText: {}, // Lower-cased filter text per column, built on first use
+    sortOrders: {}, // Row permutation per column and direction, built on first use
+  };
+}
+
+// Filtering -------------------------------------------------------------------
+
+function getSearchText(column) {
+  if (!model.searchText[column]) {
+    const values = model.columns[column];
+    model.searchText[column] = values.map((value) => {
+      if (column === "messages") return (value || []).join(" ").toLowerCase();
+      if (column === "source_port" || column === "destination_port") {
+        return value === null || value === undefined ? "" : value.toString();
+      }
+      return (value || "").toString().toLowerCase();
+    });
+  }
+  return model.searchText[column];
+}
+
+function resolveTimestampFilter(query) {
+  if (!query.slider) return query.timestampFilter || { start: null, end: null };
+
+  const timestamps = model.sortedTimestamps;
+  if (timestamps.length === 0) return { start: null, end: null };
+  const startIndex = Math.floor((query.slider.start / 100) * (timestamps.length - 1));
+  const endIndex = Math.floor((query.slider.end / 100) * (timestamps.length - 1));
+  return { start: timestamps[startIndex], end: timestamps[endIndex] };
+}
+
+// Filters that do not concern the status code; the status chart is built from their matches
+function baseFilters(query, timestampFilter) {
+  const filters = {};
+  Object.entries(query.columnFilters || {}).forEach(([column, value]) => {
+    if (value && column !== "response_status" && model.columns[column]) {
+      filters[column] = value.toLowerCase();
+    }
+  });
+  return { columns: filters, start: timestampFilter.start, end: timestampFilter.end };
+}
+
+// True if every row matching `next` also matches `previous`, so only the
+// previous matches have to be scanned again (typing more characters, moving
+// the slider inwards)
+function narrows(previous, next) {
+  if (!previous) return false;
+  if (previous.start || previous.end) {
+    if (!(previous.start && previous.end && next.start && next.end)) return false;
+    if (next.start < previous.start || next.end > previous.end) return false;
+  }
+  return Object.entries(previous.columns).every(
+    ([column, value]) => next.columns[column] !== undefined && next.columns[column].includes(value)
+  );
+}
+
+function filterBase(filters, candidates) {
+  const { columns, start, end } = filters;
+  const checks = Object.entries(columns).map(([column, value]) => [getSearchText(column), value]);
+  const timestamps = model.columns.display_timestamp;
+  const isoTimestamps = model.columns.timestamp;
+  const useRange = Boolean(start && end);
+
+  const matched = [];
+  const length = candidates ? candidates.length : model.count;
+  for (let k = 0; k < length; k++) {
+    const i = candidates ? candidates[k] : k;
+    if (useRange) {
+      const timestamp = timestamps[i] || isoTimestamps[i];
+      if (!(timestamp >= start && timestamp <= end)) continue;
+    }
+    let keep = true;
+    for (let c = 0; c < checks.length; c++) {
+      if (!checks[c][0][i].includes(checks[c][1])) {
+        keep = false;
+        break;
+      }
+    }
+    if (keep) matched.push(i);
+  }
+  return Uint32Array.from(matched);
+}
+
+function filterStatus(baseMatched, query) {
+  const hidden = new Set((query.hiddenStatuses || []).map(Number));
+  const statusFilter = ((query.columnFilters || {}).response_status || "").toLowerCase();
+  if (hidden.size === 0 && !statusFilter) return baseMatched;
+
+  const statusText = statusFilter ? getSearchText("response_status") : null;
+  return baseMatched.filter((i) => {
+    const code = model.statusCodes[i];
+    if (code && hidden.has(code)) return false;
+    return !statusText || statusText[i].includes(statusFilter);
+  });
+}
+
+// Sorting ---------------------------------------------------------------------
+
+function sortKeys(column) {
+  switch (column) {
+    case "response_status":
+      return model.statusCodes;
+    case "source_port":
+      return model.sourcePorts;
+    case "destination_port":
+      return model.destinationPorts;
+    case "messages":
+      return model.columns.messages.map((messages) => (messages || []).join(" "));
+    default:
+      return (model.columns[column] || []).map((value) => (value || "").toString().toLowerCase());
+  }
+}
+
+function getSortOrder(column, direction) {
+  const cacheKey = `${column}:${direction}`;
+  if (!model.sortOrders[cacheKey]) {
+    const keys = sortKeys(column);
+    const order = Array.from({ length: model.count }, (_, i) => i);
+    order.sort((a, b) => {
+      const aVal = keys[a];
+      const bVal = keys[b];
+      if (direction === "asc") return aVal < bVal ? -1 : aVal > bVal ? 1 : 0;
+      return aVal > bVal ? -1 : aVal < bVal ? 1 : 0;
+    });
+    model.sortOrders[cacheKey] = Uint32Array.from(order);
+  }
+  return model.sortOrders[cacheKey];
+}
+
+function displayOrder(matched, sort) {
+  if (!sort || !sort.column) return matched;
+
+  // Walk the cached permutation and keep the matched rows: O(n) per query
+  const isMatched = new Uint8Array(model.count);
+  matched.forEach((i) => {
+    isMatched[i] = 1;
+  });
+  const order = new Uint32Array(matched.length);
+  let position = 0;
+  for (const i of getSortOrder(sort.column, sort.direction)) {
+    if (isMatched[i]) order[position++] = i;
+  }
+  return order;
+}
+
+// Charts ------------------------------------------------------------------------
+
+// Non-200 status codes per hour bucket over the given rows, as on the server dashboard
+function buildTimeline(rows) {
+  const hourCount = model.hourLabels.length;
+  const codes = new Map(); // status code -> column
+  const counts = new Map(); // hour * 1000 + status code -> count
+
+  rows.forEach((i) => {
+    const code = model.statusCodes[i];
+    const hour = model.hourBuckets[i];
+    if (!code || code === 200 || hour < 0) return;
+    codes.set(code, true);
+    const key = hour * 1000 + code;
+    counts.set(key, (counts.get(key) || 0) + 1);
+  });
+
+  const statusCodes = [...codes.keys()].map(String).sort();
+  const hours = [];
+  for (let hour = 0; hour < hourCount; hour++) {
+    if (statusCodes.some((code) => counts.has(hour * 1000 + Number(code)))) hours.push(hour);
+  }
+
+  const matrix = new Uint32Array(hours.length * statusCodes.length);
+  hours.forEach((hour, h) => {
+    statusCodes.forEach((code, c) => {
+      matrix[h * statusCodes.length + c] = counts.get(hour * 1000 + Number(code)) || 0;
+    });
+  });
+
+  // Show the date only when it changes: "28 Jul 07:00", "08:00", ...
+  let previousDate = null;
+  const labels = hours.map((hour) => {
+    const label = model.hourLabels[hour];
+    const datePart = label.slice(0, label.lastIndexOf(" "));
+    if (datePart !== previousDate) {
+      previousDate = datePart;
+      return label;
+    }
+    return label.slice(label.lastIndexOf(" ") + 1);
+  });
+
+  return { labels, statusCodes, counts: matrix };
+}
+
+// Rows --------------------------------------------------------------------------
+
+function rowsFor(order, start, end) {
+  const rows = [];
+  for (let position = start; position < Math.min(end, order.length); position++) {
+    const i = order[position];
+    const row = {};
+    ROW_FIELDS.forEach((field) => {
+      row[field] = model.columns[field][i];
+    });
+    rows.push(row);
+  }
+  return rows;
+}
+
+// Messages ------------------------------------------------------------------------
+
+function runQuery(id, query) {
+  const timestampFilter = resolveTimestampFilter(query);
+  const filters = baseFilters(query, timestampFilter);
+
+  let baseMatched;
+  let timeline = null;
+  if (current && JSON.stringify(current.filters) === JSON.stringify(filters)) {
+    baseMatched = current.baseMatched;
+  } else {
+    const candidates = current && narrows(current.filters, filters) ? current.baseMatched : null;
+    baseMatched = filterBase(filters, candidates);
+    timeline = buildTimeline(baseMatched);
+  }
+  const matched = filterStatus(baseMatched, query);
+  const order = displayOrder(matched, query.sort);
+  current = { filters, baseMatched, order };
+
+  self.postMessage(
+    {
+      type: "result",
+      id,
+      filteredCount: order.length,
+      timestampFilter,
+      timeline,
+      rows: rowsFor(order, 0, FIRST_WINDOW_ROWS),
+    },
+    timeline ? [timeline.counts.buffer] : []
+  );
+}
+
+self.onmessage = (event) => {
+  const message = event.data;
+  try {
+    if (message.type === "load") {
+      model = null;
+      current = null;
+      loadGeneration = message.generation;
+      fetch(message.url)
+        .then((response) => response.json())
+        .then((data) => {
+          if (message.generation !== loadGeneration) return;
+          if (data.error) {
+            self.postMessage({ type: "error", message: data.error });
+            return;
+          }
+          model = buildModel(data);
+          self.postMessage({
+            type: "loaded",
+            generation: message.generation,
+            count: model.count,
+            timestampRange: model.timestampRange,
+            topIps: model.topIps,
+          });
+        })
+        .catch((error) => {
+          if (message.generation !== loadGeneration) return;
+          self.postMessage({ type: "error", message: `Error fetching log data: ${error.message}` });
+        });
+    } else if (!model) {
+      return;
+    } else if (message.type === "query") {
+      runQuery(message.id, message.query);
+    } else if (message.type === "rows" && current) {
+      self.postMessage({
+        type: "rows",
+        id: message.id,
+        start: message.start,
+        rows: rowsFor(current.order, message.start, message.end),
+      });
+    }
+  } catch (error) {
+    self.postMessage({ type: "error", message: error.message });
+  }
+};
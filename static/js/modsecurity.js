@@ -1,3 +1,6 @@
+// Captured while the script runs; document.currentScript is unset in callbacks
+const modsecurityWorkerUrl = document.currentScript.dataset.worker;
+
 document.addEventListener("DOMContentLoaded", function () {
   // ModSecurity Log viewer initialization
 
@@ -8,18 +11,24 @@ document.addEventListener("DOMContentLoaded", function () {
   const fileSelect = document.getElementById("fileSelect");
   const fileUpload = document.getElementById("fileUpload");
 
-  let logData = []; // Original data
-  let filteredData = []; // Filtered data
+  let totalCount = 0; // Rows in the loaded file
+  let filteredCount = 0; // Rows matching the filters
+  let loadedRows = new Map(); // Rows received from the worker, by position in the filtered list
+  let requestedChunks = new Set(); // Row chunks asked from the worker for the current query
+  let topIps = {};
+  let fileSizes = {}; // Bytes per file name, from the file list
   let currentSort = { column: null, direction: "asc" };
   let columnFilters = {};
-  let messageDataStore = new Map(); // Store message data by unique key
   let timestampRange = { min: null, max: null };
   let timestampFilter = { start: null, end: null };
+  let sliderPercents = null; // Slider position while the time range is narrowed
   let currentFile = null;
 
   // Chart variables
   let ipChart;
   let statusChart;
+  let latencyChart;
+  let latencyBreakdownChart;
   let selectedIP = null;
   let statusChartFiltered = null;
   let statusChartHidden = new Set();
@@ -47,8 +56,9 @@ document.addEventListener("DOMContentLoaded", function () {
           data.files.forEach((file) => {
             const option = document.createElement("option");
             option.value = file.filename;
-            option.textContent = file.display_name;
+            option.textContent = file.display_name + formatFileSummary(file.summary);
             fileSelect.appendChild(option);
+            fileSizes[file.filename] = file.file_size;
           });
 
           // Select the first file (newest) by default
@@ -68,6 +78,22 @@ document.addEventListener("DOMContentLoaded", function () {
       });
   }
 
+  // Short file picker description built from the upload-time summary manifest
+  function formatFileSummary(summary) {
+    if (!summary) return "";
+
+    const parts = [
+      `${summary.transaction_count.toLocaleString()} transactions`,
+    ];
+    const blocked = Object.entries(summary.status_counts || {})
+      .filter(([status]) => status.startsWith("4") || status.startsWith("5"))
+      .reduce((total, [, count]) => total + count, 0);
+    if (blocked > 0) {
+      parts.push(`${blocked.toLocaleString()} 4xx/5xx`);
+    }
+    return ` (${parts.join(", ")})`;
+  }
+
   function showEmptyState() {
     if (tableBody) {
       tableBody.innerHTML =
@@ -85,39 +111,183 @@ document.addEventListener("DOMContentLoaded", function () {
     }
   }
 
+  // Fields the table, filters and message modal use, sent as columns
+  const LOG_FIELDS = [
+    "id",
+    "timestamp",
+    "display_timestamp",
+    "source_ip",
+    "source_port",
+    "destination_port",
+    "request_line",
+    "response_status",
+    "messages",
+    "raw_messages",
+  ].join(",");
+
+  // The log list lives in a worker, which filters, sorts and counts it and
+  // sends back counts, chart data and the rows in view
+  const ROW_CHUNK = 100; // Rows per request to the worker
+  const FILTER_DELAY = 150; // Milliseconds of typing before the filters are applied
+
+  const dataWorker = new Worker(modsecurityWorkerUrl);
+  let loadGeneration = 0;
+  let queryId = 0;
+  let filterTimer = null;
+
+  dataWorker.addEventListener("message", (event) => {
+    const message = event.data;
+
+    if (message.type === "loaded") {
+      if (message.generation !== loadGeneration) return;
+      totalCount = message.count;
+      topIps = message.topIps;
+
+      // Set up timestamp range if available
+      if (message.timestampRange) {
+        timestampRange = message.timestampRange;
+        initializeTimestampSlider();
+      }
+
+      // Estimated charts stay until the user switches to the exact ones
+      if (chartsMode === "pending") chartsMode = "exact";
+      if (chartsMode === "exact") renderIpChart(topIps);
+      applyFilters();
+    } else if (message.type === "result") {
+      if (message.id !== queryId) return;
+      filteredCount = message.filteredCount;
+      loadedRows = new Map();
+      requestedChunks = new Set([0]);
+      storeRows(0, message.rows);
+
+      if (sliderPercents) {
+        timestampFilter = message.timestampFilter;
+        document.getElementById("startValue").textContent = timestampFilter.start;
+        document.getElementById("endValue").textContent = timestampFilter.end;
+        updateResetButton();
+      }
+      if (message.timeline) {
+        if (chartsMode === "approximate") {
+          exactTimeline = message.timeline;
+          exactDashboardButton.disabled = false;
+          exactDashboardButton.textContent = "Show exact counts";
+        } else {
+          renderStatusTimeline(message.timeline);
+        }
+      }
+
+      renderTable();
+      updateRecordCounts();
+    } else if (message.type === "rows") {
+      if (message.id !== queryId) return;
+      storeRows(message.start, message.rows);
+      logTable.refresh();
+    } else if (message.type === "error") {
+      console.error("Error fetching log data:", message.message);
+      showErrorState(message.message);
+    }
+  });
+
+  dataWorker.addEventListener("error", (error) => {
+    console.error("Log worker error:", error);
+    showErrorState("Error loading logs. Please try refreshing the page.");
+  });
+
   function loadLogs(filename) {
+    const query = `format=columnar&fields=${LOG_FIELDS}`;
     const url = filename
-      ? `/api/modsecurity/logs?file=${encodeURIComponent(filename)}`
-      : "/api/modsecurity/logs";
+      ? `/api/modsecurity/logs?file=${encodeURIComponent(filename)}&${query}`
+      : `/api/modsecurity/logs?${query}`;
+
+    loadGeneration++;
+    queryId++; // Drop rows still arriving for the previous file
+    dataWorker.postMessage({
+      type: "load",
+      url: new URL(url, window.location.href).href,
+      generation: loadGeneration,
+    });
 
-    fetch(url)
+    loadSampleDashboard(filename);
+    loadLatencyDashboard(filename);
+  }
+
+  // While the worker loads a large file, the charts show a dashboard the
+  // server estimated from samples of it. Once the worker has the exact
+  // counts, a button swaps them in.
+  const SAMPLE_MIN_BYTES = 32 * 1024 * 1024; // log_sampling.SAMPLE_MIN_BYTES
+  const sampleNotice = document.getElementById("sampleNotice");
+  const sampleNoticeText = document.getElementById("sampleNoticeText");
+  const exactDashboardButton = document.getElementById("exactDashboardButton");
+  let chartsMode = "pending"; // "pending", "approximate" (sampled) or "exact"
+  let sampleDashboard = null;
+  let exactTimeline = null;
+
+  function loadSampleDashboard(filename) {
+    const generation = loadGeneration;
+    chartsMode = "pending";
+    sampleDashboard = null;
+    exactTimeline = null;
+    sampleNotice.style.display = "none";
+    if (!filename || !(fileSizes[filename] >= SAMPLE_MIN_BYTES)) return;
+
+    const params = new URLSearchParams({ file: filename, mode: "sample" });
+    fetch(`/api/modsecurity/dashboard?${params}`)
       .then((response) => response.json())
       .then((data) => {
-        if (data.error) {
-          showErrorState(data.error);
-          return;
-        }
-
-        // Handle new response format
-        logData = data.logs || data;
-        filteredData = [...logData];
-
-        // Set up timestamp range if available
-        if (data.timestamp_range) {
-          timestampRange = data.timestamp_range;
-          initializeTimestampSlider();
-        }
+        if (generation !== loadGeneration || chartsMode !== "pending") return;
+        if (data.error || !data.sampling) return;
+        chartsMode = "approximate";
+        sampleDashboard = data;
 
-        renderTable(filteredData);
-        updateRecordCounts();
+        renderIpChart(data.top_ips);
+        renderStatusChart(data.status_timeline, data.status_codes);
 
-        // Load dashboard after logs are loaded
-        loadDashboard(filename);
+        const percent = (data.sampling.sampled_fraction * 100).toFixed(1);
+        sampleNoticeText.textContent =
+          `Approximate counts, estimated from ${data.sampling.windows} samples ` +
+          `(${percent}% of the file). Hover a bar for its 95% confidence interval.`;
+        exactDashboardButton.disabled = true;
+        exactDashboardButton.textContent = "Computing exact counts...";
+        sampleNotice.style.display = "flex";
       })
       .catch((error) => {
-        console.error("Error fetching log data:", error);
-        showErrorState("Error loading logs. Please try refreshing the page.");
+        console.error("Error loading sampled dashboard:", error);
+      });
+  }
+
+  exactDashboardButton.addEventListener("click", () => {
+    if (chartsMode !== "approximate" || !exactTimeline) return;
+    chartsMode = "exact";
+    sampleDashboard = null;
+    sampleNotice.style.display = "none";
+    renderIpChart(topIps);
+    renderStatusTimeline(exactTimeline);
+    exactTimeline = null;
+  });
+
+  // Top IPs the IP chart currently shows
+  function displayedIps() {
+    return chartsMode === "approximate" ? sampleDashboard.top_ips : topIps;
+  }
+
+  function storeRows(start, rows) {
+    rows.forEach((row, offset) => loadedRows.set(start + offset, row));
+  }
+
+  // Ask the worker for the chunks of rows a rendered range still lacks
+  function requestRows(start, end) {
+    if (end <= start) return;
+    const lastChunk = Math.floor((end - 1) / ROW_CHUNK);
+    for (let chunk = Math.floor(start / ROW_CHUNK); chunk <= lastChunk; chunk++) {
+      if (requestedChunks.has(chunk)) continue;
+      requestedChunks.add(chunk);
+      dataWorker.postMessage({
+        type: "rows",
+        id: queryId,
+        start: chunk * ROW_CHUNK,
+        end: (chunk + 1) * ROW_CHUNK,
       });
+    }
   }
 
   function handleFileUpload() {
@@ -132,18 +302,17 @@ document.addEventListener("DOMContentLoaded", function () {
       return;
     }
 
-    const formData = new FormData();
-    formData.append("file", file);
-
     // Show upload progress
     const uploadButton = document.querySelector(".upload-button");
     const originalHTML = uploadButton.innerHTML;
     uploadButton.innerHTML = "<span>Uploading...</span>";
     uploadButton.style.pointerEvents = "none";
 
-    fetch("/api/modsecurity/upload", {
+    // Sent as the raw body so the server parses it while it arrives
+    fetch(`/api/modsecurity/upload-stream?filename=${encodeURIComponent(file.name)}`, {
       method: "POST",
-      body: formData,
+      headers: { "Content-Type": "application/octet-stream" },
+      body: file,
     })
       .then((response) => response.json())
       .then((data) => {
@@ -213,13 +382,10 @@ document.addEventListener("DOMContentLoaded", function () {
     return status.replace(httpVersionPattern, "");
   }
 
-  function showMessageModal(messageKey) {
+  function showMessageModal(messages = []) {
     const modal = document.getElementById("messageModal");
     const modalBody = document.getElementById("messageModalBody");
 
-    // Get messages from store
-    const messages = messageDataStore.get(messageKey) || [];
-
     // Show full messages without any parsing or truncation
     const fullMessageContent = messages.join("\n\n");
     modalBody.textContent = fullMessageContent || "No messages available";
@@ -251,139 +417,290 @@ document.addEventListener("DOMContentLoaded", function () {
     }
   });
 
-  function renderTable(data) {
-    if (data.length === 0) {
-      const emptyRow = document.createElement("tr");
-      const emptyCell = document.createElement("td");
-      emptyCell.setAttribute("colspan", "8");
-      emptyCell.className = "loading";
-      emptyCell.textContent = "No logs found matching your filters.";
-      emptyRow.appendChild(emptyCell);
-      tableBody.innerHTML = ""; // Clear existing data
-      tableBody.appendChild(emptyRow);
-      return;
-    }
+  // Only the rows in view are rendered; row elements are reused while scrolling
+  const logTable = new VirtualTable({
+    container: tableBody.closest(".table-container"),
+    tbody: tableBody,
+    columnCount: 8,
+    createRow: createLogRow,
+    updateRow: updateLogRow,
+    getRow: (index) => loadedRows.get(index),
+    onRangeChange: requestRows,
+  });
+
+  function createLogRow() {
+    const row = document.createElement("tr");
+    const cellClasses = [
+      "id-cell",
+      "timestamp-cell",
+      "ip-cell",
+      "port-cell",
+      "dest-port-cell",
+      "request-cell",
+      "status-cell",
+      "messages-cell",
+    ];
+    cellClasses.forEach((className) => {
+      const cell = document.createElement("td");
+      cell.className = className;
+      row.appendChild(cell);
+    });
 
-    tableBody.innerHTML = ""; // Clear existing data
-    messageDataStore.clear(); // Clear message data store
+    const statusBadge = document.createElement("span");
+    row.cells[6].appendChild(statusBadge);
 
-    data.forEach((logEntry, index) => {
-      const statusClass = getStatusBadgeClass(logEntry.response_status);
+    const messagesContent = document.createElement("div");
+    messagesContent.className = "messages-content";
+    row.cells[7].appendChild(messagesContent);
 
-      // Store raw messages in data store with unique key for modal display
-      const messageKey = `msg_${logEntry.id}_${index}`;
-      messageDataStore.set(
-        messageKey,
-        logEntry.raw_messages || logEntry.messages
-      );
+    return row;
+  }
 
-      // Create messages preview safely
-      const messagesPreview = logEntry.messages.slice(0, 3);
-      const hasMoreMessages = logEntry.messages.length > 3;
-
-      const row = document.createElement("tr");
-
-      // Create and populate cells safely
-      const idCell = document.createElement("td");
-      idCell.className = "id-cell";
-      idCell.textContent = logEntry.id;
-
-      const timestampCell = document.createElement("td");
-      timestampCell.className = "timestamp-cell";
-      timestampCell.textContent =
-        logEntry.display_timestamp || logEntry.timestamp;
-
-      const ipCell = document.createElement("td");
-      ipCell.className = "ip-cell";
-      ipCell.textContent = logEntry.source_ip;
-
-      const portCell = document.createElement("td");
-      portCell.className = "port-cell";
-      portCell.textContent = logEntry.source_port;
-
-      const destPortCell = document.createElement("td");
-      destPortCell.className = "dest-port-cell";
-      destPortCell.textContent = logEntry.destination_port;
-
-      const requestCell = document.createElement("td");
-      requestCell.className = "request-cell";
-      requestCell.title = logEntry.request_line;
-      requestCell.textContent = logEntry.request_line;
-
-      const statusCell = document.createElement("td");
-      statusCell.className = "status-cell";
-      const statusBadge = document.createElement("span");
-      statusBadge.className = `status-badge ${statusClass}`;
-      const cleanedStatus = cleanHttpStatus(logEntry.response_status);
-      statusBadge.textContent = cleanedStatus;
-      statusCell.appendChild(statusBadge);
-
-      const messagesCell = document.createElement("td");
-      messagesCell.className = "messages-cell";
-      const messagesContent = document.createElement("div");
-      messagesContent.className = "messages-content";
-
-      // Create message preview elements safely
-      messagesPreview.forEach((message, msgIndex) => {
-        if (msgIndex > 0) {
-          messagesContent.appendChild(document.createElement("br"));
-        }
-        const messageSpan = document.createElement("span");
-        messageSpan.textContent = message;
-        messagesContent.appendChild(messageSpan);
-      });
+  function updateLogRow(row, logEntry) {
+    const [
+      idCell,
+      timestampCell,
+      ipCell,
+      portCell,
+      destPortCell,
+      requestCell,
+      statusCell,
+      messagesCell,
+    ] = row.cells;
+    const messagesContent = messagesCell.firstChild;
+    messagesContent.textContent = "";
+
+    if (!logEntry) {
+      [idCell, timestampCell, ipCell, portCell, destPortCell, requestCell].forEach(
+        (cell) => (cell.textContent = "")
+      );
+      statusCell.firstChild.textContent = "";
+      return;
+    }
 
-      if (hasMoreMessages) {
+    idCell.textContent = logEntry.id;
+    timestampCell.textContent =
+      logEntry.display_timestamp || logEntry.timestamp;
+    ipCell.textContent = logEntry.source_ip;
+    portCell.textContent = logEntry.source_port;
+    destPortCell.textContent = logEntry.destination_port;
+    requestCell.title = logEntry.request_line;
+    requestCell.textContent = logEntry.request_line;
+
+    const statusBadge = statusCell.firstChild;
+    statusBadge.className = `status-badge ${getStatusBadgeClass(
+      logEntry.response_status
+    )}`;
+    statusBadge.textContent = cleanHttpStatus(logEntry.response_status);
+
+    // Create messages preview safely
+    const messagesPreview = logEntry.messages.slice(0, 3);
+    const hasMoreMessages = logEntry.messages.length > 3;
+
+    messagesPreview.forEach((message, msgIndex) => {
+      if (msgIndex > 0) {
         messagesContent.appendChild(document.createElement("br"));
-        const ellipsis = document.createElement("span");
-        ellipsis.textContent = "...";
-        messagesContent.appendChild(ellipsis);
       }
-
-      const magnifyIcon = document.createElement("div");
-      magnifyIcon.className = "magnify-icon";
-      magnifyIcon.textContent = "🔍";
-      magnifyIcon.title = "View full message";
-      magnifyIcon.addEventListener("click", () => showMessageModal(messageKey));
-      messagesContent.appendChild(magnifyIcon);
-
-      messagesCell.appendChild(messagesContent);
-
-      // Append all cells to row
-      row.appendChild(idCell);
-      row.appendChild(timestampCell);
-      row.appendChild(ipCell);
-      row.appendChild(portCell);
-      row.appendChild(destPortCell);
-      row.appendChild(requestCell);
-      row.appendChild(statusCell);
-      row.appendChild(messagesCell);
-
-      tableBody.appendChild(row);
+      const messageSpan = document.createElement("span");
+      messageSpan.textContent = message;
+      messagesContent.appendChild(messageSpan);
     });
+
+    if (hasMoreMessages) {
+      messagesContent.appendChild(document.createElement("br"));
+      const ellipsis = document.createElement("span");
+      ellipsis.textContent = "...";
+      messagesContent.appendChild(ellipsis);
+    }
+
+    const magnifyIcon = document.createElement("div");
+    magnifyIcon.className = "magnify-icon";
+    magnifyIcon.textContent = "🔍";
+    magnifyIcon.title = "View full message";
+    messagesContent.appendChild(magnifyIcon);
+  }
+
+  // One listener for every row: look up the entry the clicked row shows now
+  tableBody.addEventListener("click", (e) => {
+    if (!e.target.closest(".magnify-icon")) return;
+    const logEntry = loadedRows.get(logTable.indexOf(e.target.closest("tr")));
+    if (logEntry) {
+      showMessageModal(logEntry.raw_messages || logEntry.messages);
+    }
+  });
+
+  function renderTable() {
+    if (filteredCount === 0) {
+      logTable.showMessage("No logs found matching your filters.");
+      return;
+    }
+
+    logTable.reset(filteredCount);
   }
 
   // Dashboard functions
-  function loadDashboard(filename = null) {
+
+  // Status timeline from the worker: hour labels, status codes and a flat
+  // hours x codes count matrix, in the shape of the server dashboard
+  function renderStatusTimeline({ labels, statusCodes, counts }) {
+    const timeline = labels.map((time, hour) => {
+      const item = { time };
+      statusCodes.forEach((code, column) => {
+        const count = counts[hour * statusCodes.length + column];
+        if (count) item[code] = count;
+      });
+      return item;
+    });
+
+    if (timeline.length === 0 && statusChart) {
+      statusChart.data.labels = [];
+      statusChart.data.datasets = [];
+      statusChart.update();
+      return;
+    }
+    renderStatusChart(timeline, statusCodes);
+  }
+
+  function loadLatencyDashboard(filename = null) {
     const url = filename
-      ? `/api/modsecurity/dashboard?file=${encodeURIComponent(filename)}`
-      : "/api/modsecurity/dashboard";
+      ? `/api/modsecurity/latency?file=${encodeURIComponent(filename)}&limit=6`
+      : "/api/modsecurity/latency?limit=6";
 
     fetch(url)
       .then((response) => response.json())
       .then((data) => {
-        if (data.error) {
-          console.error("Dashboard error:", data.error);
+        const cards = document.querySelectorAll(".latency-card");
+        if (data.error || !data.timed_transactions) {
+          cards.forEach((card) => (card.style.display = "none"));
           return;
         }
-        renderIpChart(data.top_ips);
-        renderStatusChart(data.status_timeline, data.status_codes);
+        cards.forEach((card) => (card.style.display = ""));
+        // Prefer the whole request duration; fall back to time spent in ModSecurity
+        const metric = data.overall.duration.count ? "duration" : "waf";
+        renderLatencyChart(data.timeline, metric);
+        renderLatencyBreakdownChart(data, metric);
       })
       .catch((error) => {
-        console.error("Error loading dashboard:", error);
+        console.error("Error loading latency dashboard:", error);
       });
   }
 
+  const LATENCY_QUANTILES = [
+    { key: "p50", label: "p50", color: "hsl(142.1, 76.2%, 36.3%)" },
+    { key: "p95", label: "p95", color: "hsl(24.6, 95%, 53.1%)" },
+    { key: "p99", label: "p99", color: "hsl(0, 84.2%, 60.2%)" },
+  ];
+
+  function latencyChartOptions(theme, metric) {
+    return {
+      responsive: true,
+      maintainAspectRatio: false,
+      interaction: {
+        intersect: false,
+        mode: "index",
+      },
+      plugins: {
+        legend: {
+          position: "top",
+          align: "start",
+          labels: {
+            color: theme.textColor,
+            usePointStyle: true,
+            pointStyle: "circle",
+            boxWidth: 8,
+            boxHeight: 8,
+          },
+        },
+        tooltip: {
+          backgroundColor: theme.tooltipBg,
+          titleColor: theme.textColor,
+          bodyColor: theme.textColor,
+          borderColor: theme.borderColor,
+          borderWidth: 1,
+          cornerRadius: 8,
+          padding: 12,
+          callbacks: {
+            label: (context) =>
+              `${context.dataset.label}: ${context.parsed.y} ms`,
+          },
+        },
+      },
+      scales: {
+        y: {
+          beginAtZero: true,
+          border: { display: false },
+          grid: { color: theme.gridColor, lineWidth: 1 },
+          ticks: { color: theme.mutedTextColor, padding: 8 },
+          title: {
+            display: true,
+            text: metric === "duration" ? "Request duration (ms)" : "ModSecurity time (ms)",
+            color: theme.mutedTextColor,
+          },
+        },
+        x: {
+          border: { display: false },
+          grid: { display: false },
+          ticks: { color: theme.mutedTextColor, padding: 8 },
+        },
+      },
+    };
+  }
+
+  function renderLatencyChart(timeline, metric) {
+    const ctx = document.getElementById("latencyChart").getContext("2d");
+    const theme = getChartTheme();
+
+    const labels = timeline.map((item) => item.time);
+    const datasets = LATENCY_QUANTILES.map((quantile) => ({
+      label: quantile.label,
+      data: timeline.map((item) => item[metric][quantile.key]),
+      borderColor: quantile.color,
+      backgroundColor: quantile.color,
+      tension: 0.3,
+      fill: false,
+      borderWidth: 2,
+      pointRadius: 3,
+    }));
+
+    if (latencyChart) {
+      latencyChart.destroy();
+    }
+    latencyChart = new Chart(ctx, {
+      type: "line",
+      data: { labels: labels, datasets: datasets },
+      options: latencyChartOptions(theme, metric),
+    });
+  }
+
+  function renderLatencyBreakdownChart(data, metric) {
+    const ctx = document
+      .getElementById("latencyBreakdownChart")
+      .getContext("2d");
+    const theme = getChartTheme();
+
+    const groups = [
+      { label: "Rule hit", values: data.rule_hit.hit[metric] },
+      { label: "No rule hit", values: data.rule_hit.no_hit[metric] },
+      ...data.paths.map((item) => ({ label: item.path, values: item[metric] })),
+    ].filter((group) => group.values.count > 0);
+
+    const datasets = LATENCY_QUANTILES.map((quantile) => ({
+      label: quantile.label,
+      data: groups.map((group) => group.values[quantile.key]),
+      backgroundColor: quantile.color,
+      borderRadius: 0,
+    }));
+
+    if (latencyBreakdownChart) {
+      latencyBreakdownChart.destroy();
+    }
+    latencyBreakdownChart = new Chart(ctx, {
+      type: "bar",
+      data: { labels: groups.map((group) => group.label), datasets: datasets },
+      options: latencyChartOptions(theme, metric),
+    });
+  }
+
   // Helper function to get theme-aware chart colors
   function getChartTheme() {
     const isDark =
@@ -496,9 +813,18 @@ document.addEventListener("DOMContentLoaded", function () {
               padding: 12,
               callbacks: {
                 afterLabel: function (context) {
-                  return selectedIP === context.label
-                    ? "(Click to remove filter)"
-                    : "(Click to filter)";
+                  const hint =
+                    selectedIP === context.label
+                      ? "(Click to remove filter)"
+                      : "(Click to filter)";
+                  const estimate =
+                    chartsMode === "approximate" &&
+                    sampleDashboard.top_ip_distribution.find(
+                      (item) => item.ip === context.label
+                    );
+                  return estimate
+                    ? [`95% CI: ${estimate.low.toLocaleString()} - ${estimate.high.toLocaleString()}`, hint]
+                    : hint;
                 },
               },
             },
@@ -997,18 +1323,11 @@ document.addEventListener("DOMContentLoaded", function () {
     // Update column filter
     columnFilters["source_ip"] = selectedIP;
 
-    // Apply filters to refresh the table
+    // Apply filters to refresh the table and the status chart
     applyFilters();
 
     // Update IP chart to reflect selection
-    loadDashboard(currentFile);
-
-    // Update status chart to reflect filtered data
-    if (statusChart) {
-      statusChart.destroy();
-      statusChart = null;
-    }
-    loadDashboard(currentFile);
+    renderIpChart(displayedIps());
   }
 
   function handleStatusFilterChange(filterValue) {
@@ -1044,48 +1363,28 @@ document.addEventListener("DOMContentLoaded", function () {
   }
 
   function applyFilters() {
-    filteredData = logData.filter((entry) => {
-      // Check timestamp range filter first
-      if (!isTimestampInRange(entry.display_timestamp || entry.timestamp)) {
-        return false;
-      }
-
-      // Check if status code is hidden in chart (always apply this filter)
-      if (statusChartHidden.size > 0) {
-        const entryStatus = entry.response_status?.toString();
-        // Extract just the status code number from "HTTP/1.1 403 Forbidden" -> "403"
-        const statusCodeMatch = entryStatus?.match(/\d{3}/);
-        const statusCode = statusCodeMatch ? statusCodeMatch[0] : null;
-
-        if (statusCode && statusChartHidden.has(statusCode)) {
-          return false;
-        }
-      }
-
-      // Then check column filters
-      return Object.entries(columnFilters).every(([column, filterValue]) => {
-        if (!filterValue) return true;
-
-        let cellValue = "";
-        if (column === "messages") {
-          cellValue = entry[column].join(" ").toLowerCase();
-        } else if (column === "source_port" || column === "destination_port") {
-          cellValue = entry[column].toString();
-        } else {
-          cellValue = (entry[column] || "").toString().toLowerCase();
-        }
-
-        return cellValue.includes(filterValue.toLowerCase());
-      });
+    clearTimeout(filterTimer);
+    filterTimer = null;
+    if (totalCount === 0) return;
+
+    queryId++;
+    dataWorker.postMessage({
+      type: "query",
+      id: queryId,
+      query: {
+        columnFilters,
+        hiddenStatuses: [...statusChartHidden],
+        slider: sliderPercents,
+        timestampFilter,
+        sort: currentSort.column ? currentSort : null,
+      },
     });
+  }
 
-    // Apply current sort
-    if (currentSort.column) {
-      applySorting(currentSort.column, currentSort.direction, false);
-    }
-
-    renderTable(filteredData);
-    updateRecordCounts();
+  // Apply the filters once typing or dragging pauses
+  function scheduleFilters() {
+    clearTimeout(filterTimer);
+    filterTimer = setTimeout(applyFilters, FILTER_DELAY);
   }
 
   // Add filtering event listeners
@@ -1101,7 +1400,7 @@ document.addEventListener("DOMContentLoaded", function () {
           handleStatusFilterChange(value);
         }
 
-        applyFilters();
+        scheduleFilters();
       });
     });
   }
@@ -1125,36 +1424,9 @@ document.addEventListener("DOMContentLoaded", function () {
     });
   }
 
-  function applySorting(column, direction, updateData = true) {
+  function applySorting(column, direction) {
     currentSort = { column, direction };
-
-    filteredData.sort((a, b) => {
-      let aVal, bVal;
-
-      if (column === "messages") {
-        aVal = a[column].join(" ");
-        bVal = b[column].join(" ");
-      } else if (column === "response_status") {
-        aVal = parseInt(a[column]) || 0;
-        bVal = parseInt(b[column]) || 0;
-      } else if (column === "source_port" || column === "destination_port") {
-        aVal = parseInt(a[column]) || 0;
-        bVal = parseInt(b[column]) || 0;
-      } else {
-        aVal = (a[column] || "").toString().toLowerCase();
-        bVal = (b[column] || "").toString().toLowerCase();
-      }
-
-      if (direction === "asc") {
-        return aVal < bVal ? -1 : aVal > bVal ? 1 : 0;
-      } else {
-        return aVal > bVal ? -1 : aVal < bVal ? 1 : 0;
-      }
-    });
-
-    if (updateData) {
-      renderTable(filteredData);
-    }
+    applyFilters();
 
     // Update sort indicators
     document.querySelectorAll(".sortable-header .sort-icon").forEach((icon) => {
@@ -1169,17 +1441,6 @@ document.addEventListener("DOMContentLoaded", function () {
     }
   }
 
-  function isTimestampInRange(timestamp) {
-    if (!timestampFilter.start || !timestampFilter.end) {
-      return true;
-    }
-
-    // Simple string comparison should work for our format "29 Jun 21:44"
-    return (
-      timestamp >= timestampFilter.start && timestamp <= timestampFilter.end
-    );
-  }
-
   // Function to refresh chart colors when theme changes
   function refreshChartsTheme() {
     const theme = getChartTheme();
@@ -1219,6 +1480,21 @@ document.addEventListener("DOMContentLoaded", function () {
 
       statusChart.update("none"); // Update without animation for instant theme change
     }
+
+    // Update latency chart colors
+    [latencyChart, latencyBreakdownChart].forEach((chart) => {
+      if (!chart) return;
+      chart.options.scales.y.grid.color = theme.gridColor;
+      chart.options.scales.y.ticks.color = theme.mutedTextColor;
+      chart.options.scales.y.title.color = theme.mutedTextColor;
+      chart.options.scales.x.ticks.color = theme.mutedTextColor;
+      chart.options.plugins.legend.labels.color = theme.textColor;
+      chart.options.plugins.tooltip.backgroundColor = theme.tooltipBg;
+      chart.options.plugins.tooltip.titleColor = theme.textColor;
+      chart.options.plugins.tooltip.bodyColor = theme.textColor;
+      chart.options.plugins.tooltip.borderColor = theme.borderColor;
+      chart.update("none");
+    });
   }
 
   // Theme toggle functionality
@@ -1327,6 +1603,7 @@ document.addEventListener("DOMContentLoaded", function () {
     // Initialize filter range to full range
     timestampFilter.start = timestampRange.min;
     timestampFilter.end = timestampRange.max;
+    sliderPercents = null;
 
     // Set up slider event listeners
     const startRange = document.getElementById("startRange");
@@ -1362,32 +1639,15 @@ document.addEventListener("DOMContentLoaded", function () {
       }
     }
 
-    // Convert slider values to timestamps
-    const timestamps = logData
-      .map((log) => log.display_timestamp || log.timestamp)
-      .filter((ts) => ts !== "N/A")
-      .sort();
-
-    if (timestamps.length === 0) return;
-
-    const startIndex = Math.floor((startValue / 100) * (timestamps.length - 1));
-    const endIndex = Math.floor((endValue / 100) * (timestamps.length - 1));
-
-    timestampFilter.start = timestamps[startIndex];
-    timestampFilter.end = timestamps[endIndex];
-
-    // Update display values
-    document.getElementById("startValue").textContent = timestampFilter.start;
-    document.getElementById("endValue").textContent = timestampFilter.end;
+    // The worker converts the slider values to timestamps; the display
+    // values and reset button are updated with its result
+    sliderPercents = { start: startValue, end: endValue };
 
     // Update visual range
     updateSliderRange();
 
     // Apply filters
-    applyFilters();
-
-    // Show/hide reset button
-    updateResetButton();
+    scheduleFilters();
   }
 
   function updateSliderRange() {
@@ -1427,6 +1687,7 @@ document.addEventListener("DOMContentLoaded", function () {
     // Reset filter range
     timestampFilter.start = timestampRange.min;
     timestampFilter.end = timestampRange.max;
+    sliderPercents = null;
 
     // Update display
     document.getElementById("startValue").textContent = timestampRange.min;
@@ -1445,8 +1706,8 @@ document.addEventListener("DOMContentLoaded", function () {
     const filteredRecordsElement = document.getElementById("filteredRecords");
 
     if (totalRecordsElement && filteredRecordsElement) {
-      totalRecordsElement.textContent = logData.length.toLocaleString();
-      filteredRecordsElement.textContent = filteredData.length.toLocaleString();
+      totalRecordsElement.textContent = totalCount.toLocaleString();
+      filteredRecordsElement.textContent = filteredCount.toLocaleString();
     }
   }
 
@@ -0,0 +1,181 @@
+// Windowed rendering for the log tables
+
+// Renders only the rows in view plus an overscan margin. Spacer rows above and
+// below stand in for the rest, so the scroll height matches the full list.
+// Row elements are created once and refilled while scrolling; row heights are
+// measured as rows are shown and estimated for the others.
+//
+// options:
+//   container     scrollable element around the table
+//   tbody         table body to render into
+//   columnCount   number of columns (for spacer and message rows)
+//   createRow()   returns a new, empty <tr>
+//   updateRow(row, entry, index)  fills a row; entry is null while it is loading
+//   getRow(index) returns the entry at index, or undefined if not loaded yet
+//   onRangeChange(start, end)     called after each render with the rendered range
+class VirtualTable {
+  constructor(options) {
+    this.container = options.container;
+    this.tbody = options.tbody;
+    this.columnCount = options.columnCount;
+    this.createRow = options.createRow;
+    this.updateRow = options.updateRow;
+    this.getRow = options.getRow;
+    this.onRangeChange = options.onRangeChange || null;
+    this.overscan = options.overscan || 10;
+    this.estimatedRowHeight = options.estimatedRowHeight || 48;
+
+    this.rowCount = 0;
+    this.heights = new Float64Array(0);
+    this.measured = new Uint8Array(0);
+    this.pool = []; // Recycled <tr> elements
+    this.start = 0;
+    this.end = 0;
+    this.framePending = false;
+
+    this.topSpacer = this.createSpacer();
+    this.bottomSpacer = this.createSpacer();
+
+    this.container.classList.add("virtual-scroll");
+    this.container.addEventListener("scroll", () => this.scheduleRender(), {
+      passive: true,
+    });
+    window.addEventListener("resize", () => this.scheduleRender());
+  }
+
+  createSpacer() {
+    const row = document.createElement("tr");
+    row.className = "virtual-spacer";
+    const cell = document.createElement("td");
+    cell.setAttribute("colspan", String(this.columnCount));
+    row.appendChild(cell);
+    return row;
+  }
+
+  // Show a single message row ("No logs found", errors) instead of data
+  showMessage(text) {
+    this.rowCount = 0;
+    this.tbody.innerHTML = "";
+    const row = document.createElement("tr");
+    const cell = document.createElement("td");
+    cell.setAttribute("colspan", String(this.columnCount));
+    cell.className = "loading";
+    cell.textContent = text;
+    row.appendChild(cell);
+    this.tbody.appendChild(row);
+  }
+
+  // Replace the data: new row count, scroll back to the top
+  reset(rowCount) {
+    this.rowCount = rowCount;
+    this.heights = new Float64Array(rowCount).fill(this.estimatedRowHeight);
+    this.measured = new Uint8Array(rowCount);
+    this.container.scrollTop = 0;
+    this.tbody.innerHTML = "";
+    this.tbody.appendChild(this.topSpacer);
+    this.tbody.appendChild(this.bottomSpacer);
+    this.start = 0;
+    this.end = 0;
+    this.render();
+  }
+
+  // Refill the rendered rows, e.g. after rows were loaded
+  refresh() {
+    if (this.rowCount > 0) this.render();
+  }
+
+  // Index of the entry a row element currently shows
+  indexOf(row) {
+    return row && row.virtualIndex !== undefined ? row.virtualIndex : -1;
+  }
+
+  scheduleRender() {
+    if (this.framePending || this.rowCount === 0) return;
+    this.framePending = true;
+    requestAnimationFrame(() => {
+      this.framePending = false;
+      this.render();
+    });
+  }
+
+  render() {
+    const heights = this.heights;
+    const count = this.rowCount;
+
+    // Visible window relative to the top of the body
+    const headerHeight = this.tbody.offsetTop;
+    const viewTop = Math.max(0, this.container.scrollTop - headerHeight);
+    const viewBottom = viewTop + this.container.clientHeight;
+
+    let index = 0;
+    let offset = 0;
+    while (index < count && offset + heights[index] <= viewTop) {
+      offset += heights[index++];
+    }
+    const start = Math.max(0, index - this.overscan);
+    while (index < count && offset < viewBottom) {
+      offset += heights[index++];
+    }
+    const end = Math.min(count, index + this.overscan);
+
+    let topPadding = 0;
+    for (let i = 0; i < start; i++) topPadding += heights[i];
+    let bottomPadding = 0;
+    for (let i = end; i < count; i++) bottomPadding += heights[i];
+
+    // Grow the pool as needed and detach rows that are no longer used
+    const needed = end - start;
+    while (this.pool.length < needed) {
+      this.pool.push(this.createRow());
+    }
+    for (let i = needed; i < this.pool.length; i++) {
+      if (this.pool[i].parentNode) this.pool[i].remove();
+    }
+
+    for (let i = 0; i < needed; i++) {
+      const row = this.pool[i];
+      const entryIndex = start + i;
+      const entry = this.getRow(entryIndex);
+      row.virtualIndex = entryIndex;
+      this.updateRow(row, entry === undefined ? null : entry, entryIndex);
+      row.classList.toggle("virtual-pending", entry === undefined);
+      if (row.parentNode !== this.tbody) {
+        this.tbody.insertBefore(row, this.bottomSpacer);
+      }
+    }
+
+    this.topSpacer.firstChild.style.height = `${topPadding}px`;
+    this.bottomSpacer.firstChild.style.height = `${bottomPadding}px`;
+    this.start = start;
+    this.end = end;
+
+    this.measure();
+
+    if (this.onRangeChange) this.onRangeChange(start, end);
+  }
+
+  // Record the real height of rendered rows and refine the estimate for the rest
+  measure() {
+    let measuredTotal = 0;
+    let measuredCount = 0;
+    for (let i = 0; i < this.end - this.start; i++) {
+      const row = this.pool[i];
+      const height = row.offsetHeight;
+      if (height > 0 && !row.classList.contains("virtual-pending")) {
+        this.heights[row.virtualIndex] = height;
+        this.measured[row.virtualIndex] = 1;
+        measuredTotal += height;
+        measuredCount++;
+      }
+    }
+    if (measuredCount === 0) return;
+
+    const estimate = measuredTotal / measuredCount;
+    if (Math.abs(estimate - this.estimatedRowHeight) > 1) {
+      this.estimatedRowHeight = estimate;
+      for (let i = 0; i < this.rowCount; i++) {
+        if (!this.measured[i]) this.heights[i] = estimate;
+      }
+    }
+  }
+}
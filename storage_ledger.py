@@ -0,0 +1,142 @@
+import os
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class StorageLedger:
+    """
+    In-memory record of the files under the uploads tree and their total size.
+
+    Upload and delete handlers update the ledger as they go, so storage checks are
+    O(1). A periodic reconcile() rebuilds it from disk with os.scandir to pick up
+    anything changed outside the application.
+    """
+
+    def __init__(self, root: str):
+        """Initialize an empty ledger for the given directory tree."""
+        self.root = root
+        self._lock = threading.Lock()
+        self._files: Dict[str, Tuple[int, float]] = {}  # path -> (size, mtime)
+        self._total_size = 0
+        self.reconciled = False
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normpath(path)
+
+    def record(self, path: str):
+        """Add or refresh a single file after it was written."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.forget(path)
+            return
+        key = self._key(path)
+        with self._lock:
+            previous = self._files.get(key)
+            if previous:
+                self._total_size -= previous[0]
+            self._files[key] = (stat.st_size, stat.st_mtime)
+            self._total_size += stat.st_size
+
+    def forget(self, path: str):
+        """Remove a single file after it was deleted."""
+        key = self._key(path)
+        with self._lock:
+            previous = self._files.pop(key, None)
+            if previous:
+                self._total_size -= previous[0]
+
+    def record_tree(self, path: str):
+        """Add or refresh every file below a directory after it was written."""
+        pending = [path]
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            self.record(entry.path)
+            except OSError as e:
+                logging.warning(f"Unable to scan {directory}: {str(e)}")
+
+    def forget_tree(self, path: str):
+        """Remove every file below a directory after it was deleted."""
+        prefix = self._key(path) + os.sep
+        with self._lock:
+            for key in [key for key in self._files if key.startswith(prefix)]:
+                self._total_size -= self._files.pop(key)[0]
+
+    def total_size(self) -> int:
+        """Total size in bytes of all tracked files."""
+        return self._total_size
+
+    def files(self, directory: Optional[str] = None) -> List[Tuple[str, float, int]]:
+        """
+        Snapshot of tracked files as (path, mtime, size) tuples.
+
+        Args:
+            directory (Optional[str]): Only return files directly inside this directory
+        """
+        with self._lock:
+            items = list(self._files.items())
+        if directory is not None:
+            directory = self._key(directory)
+            items = [(path, entry) for path, entry in items if os.path.dirname(path) == directory]
+        return [(path, mtime, size) for path, (size, mtime) in items]
+
+    def directories(self, directory: str) -> List[Tuple[str, float, int]]:
+        """
+        Snapshot of the immediate subdirectories of a directory as (path, newest mtime, total size)
+        tuples, aggregated over every tracked file below each subdirectory.
+        """
+        directory = self._key(directory)
+        prefix = directory + os.sep
+        trees = {}
+        with self._lock:
+            items = list(self._files.items())
+        for path, (size, mtime) in items:
+            if not path.startswith(prefix):
+                continue
+            relative = path[len(prefix):]
+            if os.sep not in relative:
+                continue
+            tree = os.path.join(directory, relative.split(os.sep, 1)[0])
+            newest, total = trees.get(tree, (0.0, 0))
+            trees[tree] = (max(newest, mtime), total + size)
+        return [(path, newest, total) for path, (newest, total) in trees.items()]
+
+    def reconcile(self) -> int:
+        """
+        Rebuild the ledger from disk with a single os.scandir walk.
+
+        Returns:
+            int: Total size in bytes after reconciling
+        """
+        files = {}
+        pending = [self.root]
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                stat = entry.stat(follow_symlinks=False)
+                                files[self._key(entry.path)] = (stat.st_size, stat.st_mtime)
+                        except OSError as e:
+                            logging.warning(f"Unable to stat {entry.path}: {str(e)}")
+            except OSError as e:
+                logging.warning(f"Unable to scan {directory}: {str(e)}")
+
+        total_size = sum(size for size, _ in files.values())
+        with self._lock:
+            self._files = files
+            self._total_size = total_size
+            self.reconciled = True
+        return total_size
@@ -0,0 +1,238 @@
+import queue
+import logging
+import threading
+from itertools import chain
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+import apache_error_parser
+import modsecurity_parser
+import log_summary
+from log_decoding import decode_bytes, translate_newlines
+from log_reader import READ_BLOCK_BYTES
+
+# Line-aligned blocks of this size are handed to the parser thread
+PARSE_BLOCK_BYTES = READ_BLOCK_BYTES
+
+# Blocks waiting for the parser; receiving pauses when the parser falls this far behind
+QUEUE_BLOCKS = 4
+
+# Log types the pipeline can parse while receiving
+PIPELINE_LOG_TYPES = ('modsecurity', 'apache-error')
+
+
+class UploadTooLarge(Exception):
+    """Raised when a streamed upload grows past the size limit."""
+
+
+class LimitedReader:
+    """
+    Read-through wrapper for a request stream that enforces a size limit as data
+    arrives, for bodies without (or with a wrong) Content-Length.
+    """
+
+    def __init__(self, stream: BinaryIO, max_bytes: Optional[int]):
+        """Wrap stream; max_bytes None means no limit."""
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        """Read like stream.read, raising UploadTooLarge past the limit."""
+        chunk = self.stream.read(size)
+        self.bytes_read += len(chunk)
+        if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+        return chunk
+
+
+class ParsePipeline:
+    """
+    Parse an upload on a background thread while it is being received.
+
+    feed() is called with every chunk written to disk. Chunks are cut into
+    line-aligned blocks and queued for a thread that runs the streaming parser
+    of the log type, so when the last byte arrives the parse is nearly done.
+    finish() waits for it and returns the summary manifest and, if requested,
+    the parsed records.
+
+    Result keys:
+        summary: Summary in the layout of log_summary.write_manifest
+        records: Parsed entries/transactions sorted newest first, or None
+        stats: Parser statistics (Apache error logs), or None
+    """
+
+    def __init__(self, log_type: str, keep_records: bool = False, source: str = 'upload'):
+        """
+        Start the parser thread.
+
+        Args:
+            log_type (str): 'modsecurity' or 'apache-error'
+            keep_records (bool): Collect the parsed records (for ingest and, for Apache error
+                logs, the page cache)
+            source (str): Name used in warning messages
+        """
+        if log_type not in PIPELINE_LOG_TYPES:
+            raise ValueError(f"Unsupported log type for streaming parse: {log_type}")
+        self.log_type = log_type
+        self.keep_records = keep_records
+        self.source = source
+        self._queue = queue.Queue(QUEUE_BLOCKS)
+        self._pending = bytearray()
+        self._aborted = False
+        self._input_done = False
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def feed(self, chunk: bytes):
+        """Queue the complete lines received so far once a block's worth has arrived."""
+        self._pending += chunk
+        if len(self._pending) >= PARSE_BLOCK_BYTES:
+            cut = self._pending.rfind(b'\n') + 1
+            if cut:
+                self._queue.put(bytes(self._pending[:cut]))
+                del self._pending[:cut]
+
+    def finish(self) -> Dict:
+        """
+        Hand over the last bytes and wait for the parse.
+
+        Returns:
+            Dict: {'summary', 'records', 'stats'}
+
+        Raises:
+            Exception: Whatever the parser raised
+        """
+        if self._pending:
+            self._queue.put(bytes(self._pending))
+            self._pending.clear()
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def abort(self):
+        """Stop parsing after a failed upload; queued blocks are discarded."""
+        self._aborted = True
+        self._pending.clear()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _byte_blocks(self) -> Iterator[bytes]:
+        """Blocks with LF line endings in arrival order, until finish() or abort()."""
+        while True:
+            block = self._queue.get()
+            if block is None:
+                self._input_done = True
+                return
+            if not self._aborted:
+                yield translate_newlines(block)
+
+    def _blocks(self) -> Iterator[str]:
+        """Decoded blocks in arrival order, until finish() or abort()."""
+        return map(decode_bytes, self._byte_blocks())
+
+    @staticmethod
+    def _lines(blocks) -> Iterator[str]:
+        """Split blocks into lines without their line endings, like MappedLogFile.iter_text_lines."""
+        for text in blocks:
+            lines = text.split('\n')
+            if not lines[-1]:
+                lines.pop()
+            yield from lines
+
+    def _run(self):
+        try:
+            if self.log_type == 'apache-error':
+                self._result = self._parse_apache_error()
+            else:
+                self._result = self._parse_modsecurity()
+        except Exception as e:
+            logging.warning(f"Streaming parse of {self.source} failed: {str(e)}")
+            self._error = e
+            # Keep taking blocks so the receiving side never blocks on a full queue
+            while not self._input_done:
+                if self._queue.get() is None:
+                    self._input_done = True
+
+    def _parse_apache_error(self) -> Dict:
+        parser = apache_error_parser.ApacheErrorLogParser()
+        lines = self._lines(self._blocks())
+
+        # Format detection sees the same leading non-empty lines as read_sample_lines
+        head = []
+        sample_lines = []
+        for line in lines:
+            head.append(line)
+            if line.strip():
+                sample_lines.append(line)
+                if len(sample_lines) >= log_summary.FORMAT_SAMPLE_LINES:
+                    break
+        detected_format = parser.specialize(sample_lines)
+
+        line_count = 0
+
+        def counted():
+            nonlocal line_count
+            for line in chain(head, lines):
+                line_count += 1
+                yield line
+
+        summary = log_summary.ApacheErrorSummary(detected_format)
+        entries: Optional[List[Dict]] = [] if self.keep_records else None
+        for entry in parser.iter_events(counted(), self.source):
+            summary.add(entry)
+            if entries is not None:
+                entries.append(entry)
+
+        stats = parser.get_stats()
+        if entries is not None:
+            entries.sort(key=lambda x: x.get('timestamp') or '1900-01-01T00:00:00', reverse=True)
+            stats['timestamp_range'] = apache_error_parser.calculate_timestamp_range(entries)
+        return {'summary': summary.result(stats, line_count), 'records': entries, 'stats': stats}
+
+    def _parse_modsecurity(self) -> Dict:
+        blocks = self._byte_blocks()
+
+        # Like detect_audit_log_format: the first non-blank text tells JSON from native
+        head = []
+        log_format = 'native'
+        for block in blocks:
+            head.append(block)
+            stripped = block.lstrip()
+            if stripped:
+                log_format = 'json' if stripped.startswith(b'{') else 'native'
+                break
+        blocks = chain(head, blocks)
+
+        line_count = 0
+
+        def counted_blocks():
+            nonlocal line_count
+            for block in blocks:
+                line_count += block.count(b'\n') + (not block.endswith(b'\n'))
+                yield block
+
+        def counted_lines():
+            nonlocal line_count
+            for line in self._lines(map(decode_bytes, blocks)):
+                line_count += 1
+                yield line
+
+        if log_format == 'json':
+            transactions = modsecurity_parser.iter_json_transactions(counted_lines(), self.source)
+        else:
+            transactions = modsecurity_parser.iter_native_transactions(counted_blocks(), self.source)
+
+        summary = log_summary.ModsecSummary(log_format)
+        records: Optional[List[Dict]] = [] if self.keep_records else None
+        for transaction in transactions:
+            summary.add(transaction)
+            if records is not None:
+                records.append(transaction)
+
+        if records is not None:
+            records.sort(key=lambda x: x['timestamp'] or '1900-01-01T00:00:00', reverse=True)
+        return {'summary': summary.result(line_count), 'records': records, 'stats': None}